@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Author, Post, Comment
+from .models import ArchivedComment, ArchivedPost, Author, Post, Comment, QueuedComment
 
 
 @admin.register(Author)
@@ -20,3 +20,37 @@ class CommentAdmin(admin.ModelAdmin):
     list_display = ("post", "user", "created")
     list_filter = ("created",)
     search_fields = ("content",)
+
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedPost)
+class ArchivedPostAdmin(ReadOnlyAdmin):
+    list_display = ("title", "author", "status", "published_date", "archived_at")
+    # Drilling down by date only scans the matching monthly partitions.
+    date_hierarchy = "published_date"
+    search_fields = ("title",)
+    # Skip the extra COUNT of the whole archive on filtered pages.
+    show_full_result_count = False
+
+
+@admin.register(ArchivedComment)
+class ArchivedCommentAdmin(ReadOnlyAdmin):
+    list_display = ("post_id", "user", "created", "archived_at")
+    date_hierarchy = "created"
+    show_full_result_count = False
+
+
+@admin.register(QueuedComment)
+class QueuedCommentAdmin(ReadOnlyAdmin):
+    list_display = ("id", "post_id", "user", "status", "created", "processed")
+    list_filter = ("status",)
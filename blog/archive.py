@@ -0,0 +1,165 @@
+"""
+Archival of withdrawn posts into month-partitioned archive tables.
+
+``blog_post`` keeps its single-column primary key and the comment foreign
+key, so it isn't partitioned itself. Instead, posts withdrawn (soft deleted)
+for a while move, with their comments, to ``blog_post_archive`` and
+``blog_comment_archive``. Those tables are range partitioned by month of
+``published_date`` / ``created``, so the hot tables and their indexes only
+hold live rows. Nothing in the API reads the archive; the admin's
+date drill-down over it scans only the matching months.
+
+Rows move in batches of ``DELETE ... RETURNING`` into ``INSERT``, one short
+transaction per batch. Posts are picked with ``FOR UPDATE SKIP LOCKED``, so
+concurrent writers are never waited on. Old months are purged by dropping
+whole partitions, which takes no row locks and leaves no dead tuples behind.
+"""
+import re
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import ArchivedComment, ArchivedPost, Comment, Post, QueuedComment
+
+ARCHIVE_BATCH_SIZE = 1000
+PARTITION_SUFFIX_RE = re.compile(r"_p(\d{4})_(\d{2})$")
+
+ARCHIVE_TABLES = (ArchivedPost._meta.db_table, ArchivedComment._meta.db_table)
+
+
+def month_start(value):
+    return value.astimezone(dt_timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(month):
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y_%m}"
+
+
+def archive_columns(model):
+    """Columns copied from the hot table: every archive column except ``archived_at``."""
+    return [field.column for field in model._meta.concrete_fields if field.name != "archived_at"]
+
+
+def existing_partitions(table):
+    """``{month: partition name}`` of the partitions attached to ``table``."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits"
+            " JOIN pg_class child ON child.oid = pg_inherits.inhrelid"
+            " WHERE pg_inherits.inhparent = %s::regclass",
+            [table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = PARTITION_SUFFIX_RE.search(name)
+        if match:
+            year, month = map(int, match.groups())
+            partitions[datetime(year, month, 1, tzinfo=dt_timezone.utc)] = name
+    return partitions
+
+
+def ensure_partitions(table, months, known):
+    """Create the monthly partitions of ``table`` missing from ``known`` (updated in place)."""
+    with connection.cursor() as cursor:
+        for month in sorted(set(months) - known):
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {connection.ops.quote_name(partition_name(table, month))}"
+                f" PARTITION OF {connection.ops.quote_name(table)} FOR VALUES FROM (%s) TO (%s)",
+                [month, next_month(month)],
+            )
+            known.add(month)
+
+
+def move_rows(source, target, columns, where, params):
+    """``DELETE`` matching rows of ``source`` and insert them into ``target``, returning the count."""
+    column_list = ", ".join(connection.ops.quote_name(column) for column in columns)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {source} WHERE {where} RETURNING {column_list})"
+            f" INSERT INTO {target} ({column_list}) SELECT {column_list} FROM moved",
+            params,
+        )
+        return cursor.rowcount
+
+
+def archive_batch(cutoff, batch_size, known):
+    """
+    Move up to ``batch_size`` posts withdrawn before ``cutoff``, with their
+    comments, in one transaction. Returns ``(posts, comments)`` moved.
+    """
+    post_table, comment_table = Post._meta.db_table, Comment._meta.db_table
+    post_archive, comment_archive = ArchivedPost._meta.db_table, ArchivedComment._meta.db_table
+    with transaction.atomic():
+        # Withdrawn posts take no writes, but an undelete might: skip rows being changed.
+        post_ids = list(
+            Post.objects.filter(active=False, updated__lt=cutoff)
+            .order_by("pk")
+            .select_for_update(skip_locked=True)
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not post_ids:
+            return 0, 0
+        post_dates = Post.objects.filter(pk__in=post_ids).values_list("published_date", flat=True)
+        comment_dates = Comment.objects.filter(post__in=post_ids).values_list("created", flat=True)
+        ensure_partitions(post_archive, map(month_start, post_dates), known[post_archive])
+        ensure_partitions(comment_archive, map(month_start, comment_dates), known[comment_archive])
+
+        # The queue's SET_NULL only runs in Django, and the raw DELETE below bypasses it.
+        QueuedComment.objects.filter(comment__post__in=post_ids).update(comment=None)
+        # Comments first: they reference the posts.
+        comments = move_rows(
+            comment_table, comment_archive, archive_columns(ArchivedComment), "post_id = ANY(%s)", [post_ids]
+        )
+        posts = move_rows(post_table, post_archive, archive_columns(ArchivedPost), "id = ANY(%s)", [post_ids])
+    return posts, comments
+
+
+def archive_posts(inactive_for=timedelta(days=30), batch_size=ARCHIVE_BATCH_SIZE, max_batches=None, pause=0):
+    """
+    Archive every post withdrawn more than ``inactive_for`` ago, batch by
+    batch, sleeping ``pause`` seconds in between. Returns ``(posts, comments)``.
+    """
+    cutoff = timezone.now() - inactive_for
+    known = {table: set(existing_partitions(table)) for table in ARCHIVE_TABLES}
+    total_posts = total_comments = batches = 0
+    while max_batches is None or batches < max_batches:
+        posts, comments = archive_batch(cutoff, batch_size, known)
+        total_posts += posts
+        total_comments += comments
+        batches += 1
+        if posts < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return total_posts, total_comments
+
+
+def purge_archive(before):
+    """
+    Drop the archive partitions of months entirely before ``before``.
+    Comments go by their own ``created`` month. Returns the dropped partition names.
+    """
+    cutoff = month_start(before)
+    dropped = []
+    for table in ARCHIVE_TABLES:
+        for month, name in sorted(existing_partitions(table).items()):
+            if next_month(month) > cutoff:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE {connection.ops.quote_name(name)}")
+            dropped.append(name)
+    return dropped
+
+
+def vacuum_hot_tables():
+    """Reclaim the space of archived rows so the hot tables and indexes stop growing."""
+    with connection.cursor() as cursor:
+        for model in (Post, Comment):
+            cursor.execute(f"VACUUM (ANALYZE) {connection.ops.quote_name(model._meta.db_table)}")
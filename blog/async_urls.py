@@ -0,0 +1,9 @@
+from django.urls import path
+from .async_views import AsyncAuthorListAPI, AsyncPostDetailAPI, AsyncPostListAPI
+
+# Same paths and names as their sync versions in blog.urls; see core.asgi_urls.
+urlpatterns = [
+    path("authors/", AsyncAuthorListAPI.as_view(), name="api_author_list"),
+    path("posts/", AsyncPostListAPI.as_view(), name="api_post_list"),
+    path("posts/<int:pk>/", AsyncPostDetailAPI.as_view(), name="api_post_detail"),
+]
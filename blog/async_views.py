@@ -0,0 +1,168 @@
+"""
+Async read endpoints for ASGI deployments (routed by ``blog.async_urls``,
+which ``core.asgi`` puts in front of the sync URLs).
+
+Each view mirrors a sync DRF view (``sync_view``) and reuses an instance of it
+for everything that doesn't wait on I/O: content negotiation, permissions,
+filtering, ordering, sparse fieldsets, query planning, pagination links and
+rendering. Only the queries and cache calls are awaited, so responses are the
+same as over WSGI while one process keeps many requests in flight.
+
+Rows are read with the async ORM. Helpers that run several queries in a row
+(conditional validators, counted pagination) are awaited through
+``sync_to_async`` in one hop, which is also how Django 4.2's async ORM runs
+each query. Session authentication needs the sync session store, so these
+views only accept JWTs.
+"""
+import datetime
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.http import Http404, HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views import View
+from rest_framework.response import Response
+
+from .cache import CachedResponseMixin
+from .mixins import ConditionalMixin, ValuesReadMixin
+from .views import AuthorListAPI, PostDetailAPI, PostListAPI
+
+
+async def aget_object_or_404(queryset, **lookup):
+    try:
+        return await queryset.aget(**lookup)
+    except (ObjectDoesNotExist, TypeError, ValueError, ValidationError):
+        raise Http404
+
+
+class AsyncReadAPI(View):
+    """Run ``sync_view``'s GET through its DRF hooks, awaiting the I/O."""
+
+    sync_view = None
+
+    async def get(self, request, *args, **kwargs):
+        view = self.sync_view()
+        view.args, view.kwargs = args, kwargs
+        view.request = view.initialize_request(request, *args, **kwargs)
+        view.headers = view.default_response_headers
+        try:
+            await self.initial(view)
+            response = await self.conditional(view)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        return self.rendered(view.finalize_response(view.request, response, *args, **kwargs))
+
+    async def initial(self, view):
+        """``APIView.initial`` with authentication awaited."""
+        request = view.request
+        view.format_kwarg = view.get_format_suffix(**view.kwargs)
+        request.accepted_renderer, request.accepted_media_type = view.perform_content_negotiation(request)
+        request.version, request.versioning_scheme = view.determine_version(request, *view.args, **view.kwargs)
+        await self.authenticate(request)
+        view.check_permissions(request)
+        view.check_throttles(request)
+
+    async def authenticate(self, request):
+        request._authenticator = None
+        request.user, request.auth = AnonymousUser(), None
+        for authenticator in request.authenticators:
+            if not hasattr(authenticator, "aauthenticate"):
+                continue
+            result = await authenticator.aauthenticate(request)
+            if result is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = result
+                return
+
+    async def conditional(self, view):
+        """``ConditionalGetMixin`` / ``django.views.decorators.http.condition`` for async views."""
+        if not isinstance(view, ConditionalMixin):
+            return await self.cached(view)
+        etag, last_modified = await sync_to_async(view.conditional_state)()
+        etag = quote_etag(etag) if etag is not None else None
+        if last_modified:
+            if not timezone.is_aware(last_modified):
+                last_modified = timezone.make_aware(last_modified, datetime.timezone.utc)
+            last_modified = int(last_modified.timestamp())
+        response = get_conditional_response(view.request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = await self.cached(view)
+        if last_modified and not response.has_header("Last-Modified"):
+            response.headers["Last-Modified"] = http_date(last_modified)
+        if etag:
+            response.headers.setdefault("ETag", etag)
+        return response
+
+    async def cached(self, view):
+        if isinstance(view, CachedResponseMixin):
+            return await view.aget_cached(view.request, lambda: self.build(view))
+        return await self.build(view)
+
+    async def build(self, view):
+        raise NotImplementedError
+
+    @staticmethod
+    def uses_values_serializer(view):
+        return isinstance(view, ValuesReadMixin) and view.use_values_serializer()
+
+    @staticmethod
+    def rendered(response):
+        # Django renders a returned TemplateResponse in a thread; render it here instead.
+        if not hasattr(response, "render"):
+            return response
+        response.render()
+        plain = HttpResponse(response.content, status=response.status_code)
+        for header, value in response.items():
+            plain.headers[header] = value
+        return plain
+
+
+class AsyncListAPI(AsyncReadAPI):
+    """Async ``ListAPIView.list`` / ``ValuesReadMixin.list``."""
+
+    async def build(self, view):
+        queryset = view.filter_queryset(view.get_queryset())
+        values = self.uses_values_serializer(view)
+        if values:
+            fields = view.get_values_fields()
+            ordering = [field.lstrip("-") for field in queryset.query.order_by]
+            queryset = view.values_serializer_class.prepare(queryset, *ordering, fields=fields)
+        page = await sync_to_async(view.paginate_queryset)(queryset)
+        rows = page if page is not None else [row async for row in queryset]
+        if values:
+            data = await view.values_serializer_class(rows, many=True, fields=fields).adata()
+        else:
+            data = view.get_serializer(rows, many=True).data
+        return view.get_paginated_response(data) if page is not None else Response(data)
+
+
+class AsyncRetrieveAPI(AsyncReadAPI):
+    """Async ``RetrieveAPIView.retrieve`` / ``ValuesReadMixin.retrieve``."""
+
+    async def build(self, view):
+        queryset = view.filter_queryset(view.get_queryset())
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        lookup = {view.lookup_field: view.kwargs[lookup_url_kwarg]}
+        if self.uses_values_serializer(view):
+            fields = view.get_values_fields()
+            row = await aget_object_or_404(view.values_serializer_class.prepare(queryset, fields=fields), **lookup)
+            view.check_object_permissions(view.request, row)
+            return Response(await view.values_serializer_class(row, fields=fields).adata())
+        instance = await aget_object_or_404(queryset, **lookup)
+        view.check_object_permissions(view.request, instance)
+        return Response(view.get_serializer(instance).data)
+
+
+class AsyncPostListAPI(AsyncListAPI):
+    sync_view = PostListAPI
+
+
+class AsyncPostDetailAPI(AsyncRetrieveAPI):
+    sync_view = PostDetailAPI
+
+
+class AsyncAuthorListAPI(AsyncListAPI):
+    sync_view = AuthorListAPI
@@ -0,0 +1,208 @@
+import asyncio
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from core.metrics import RESPONSE_CACHE, view_label
+from core.routers import pinned_to_primary, primary_reads
+from core.timing import phase
+
+POST_LIST_SCOPE = "post-list"
+POST_DETAIL_SCOPE = "post-detail"
+TRENDING_CACHE_KEY = "trending-posts"
+
+
+def response_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def post_scope(pk):
+    return f"post:{pk}"
+
+
+def generation_key(scope):
+    return f"response-generation:{scope}"
+
+
+def invalidate_scopes(*scopes):
+    """
+    Move each scope to a new generation so every response cached under
+    the old one is ignored (and left to expire).
+    """
+    cache = response_cache()
+    for scope in scopes:
+        try:
+            cache.incr(generation_key(scope))
+        except ValueError:
+            cache.set(generation_key(scope), time.time_ns(), None)
+
+
+def forget_trending(pk=None):
+    """Drop the cached trending list, or only if it shows post ``pk``."""
+    cache = response_cache()
+    if pk is not None:
+        entry = cache.get(TRENDING_CACHE_KEY)
+        if entry is None or pk not in entry["ids"]:
+            return
+    cache.delete(TRENDING_CACHE_KEY)
+
+
+def current_generations(cache, scopes):
+    keys = [generation_key(scope) for scope in scopes]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # Seeded from the clock so an evicted generation never falls back to an old value.
+            cache.add(key, time.time_ns(), None)
+            generations[key] = cache.get(key)
+    return [str(generations[key]) for key in keys]
+
+
+def normalize_query_params(query_params):
+    """Sorted, de-duplicated query string so equivalent requests share a key."""
+    items = sorted(
+        (key, value)
+        for key in query_params
+        for value in set(query_params.getlist(key))
+    )
+    return "&".join(f"{key}={value}" for key, value in items)
+
+
+class CachedResponseMixin:
+    """
+    Cache the serialized data of successful GET responses.
+
+    Keys combine the path, the normalized query params and the current
+    generation of each scope returned by ``get_cache_scopes``; writes bump
+    those generations (see ``blog.signals``).
+
+    Entries carry a soft expiry. Once it passes, the first worker to take the
+    refresh lock rebuilds the response while the others keep serving the stale
+    copy, so an expiring hot key doesn't send every worker to the database.
+    Without any copy to fall back on, workers wait briefly for the leader.
+
+    When the view is also conditional, the ETag/Last-Modified pair is stored
+    with the entry so cache hits can answer preconditions without a query.
+
+    With replicas, entries are built from the primary, and clients pinned
+    after a write skip the cache (see ``core.routers``).
+    """
+
+    def get_cache_scopes(self):
+        raise NotImplementedError
+
+    def cached_entry(self):
+        if not hasattr(self, "_cached_entry") and pinned_to_primary():
+            self._response_cache_key = self._cached_entry = None
+        if not hasattr(self, "_cached_entry"):
+            with phase("cache"):
+                cache = response_cache()
+                self._response_cache_key = self.get_response_cache_key(cache, self.request)
+                self._cached_entry = cache.get(self._response_cache_key)
+        return self._cached_entry
+
+    async def acached_entry(self):
+        if not hasattr(self, "_cached_entry"):
+            await sync_to_async(self.cached_entry)()
+        return self._cached_entry
+
+    def cached_validators(self):
+        entry = self.cached_entry()
+        return entry["validators"] if entry is not None else None
+
+    def get(self, request, *args, **kwargs):
+        if pinned_to_primary():
+            return super().get(request, *args, **kwargs)
+        cache = response_cache()
+        entry = self.cached_entry()
+        key = self._response_cache_key
+        view = view_label(request)
+        if entry is not None and entry["expires"] > time.time():
+            RESPONSE_CACHE.labels(view, "hit").inc()
+            return Response(entry["data"])
+
+        lock_key = f"{key}:lock"
+        if cache.add(lock_key, 1, settings.RESPONSE_CACHE_LOCK_TIMEOUT):
+            RESPONSE_CACHE.labels(view, "miss").inc()
+            try:
+                return self.refresh_cached_response(cache, key, request, *args, **kwargs)
+            finally:
+                cache.delete(lock_key)
+
+        if entry is not None:
+            RESPONSE_CACHE.labels(view, "stale").inc()
+            return Response(entry["data"])
+
+        RESPONSE_CACHE.labels(view, "wait").inc()
+        deadline = time.monotonic() + settings.RESPONSE_CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry is not None:
+                return Response(entry["data"])
+        return super().get(request, *args, **kwargs)
+
+    async def aget_cached(self, request, build):
+        """``get`` for async views; ``build()`` is awaited for the uncached response."""
+        if pinned_to_primary():
+            return await build()
+        cache = response_cache()
+        entry = await self.acached_entry()
+        key = self._response_cache_key
+        view = view_label(request)
+        if entry is not None and entry["expires"] > time.time():
+            RESPONSE_CACHE.labels(view, "hit").inc()
+            return Response(entry["data"])
+
+        lock_key = f"{key}:lock"
+        if await cache.aadd(lock_key, 1, settings.RESPONSE_CACHE_LOCK_TIMEOUT):
+            RESPONSE_CACHE.labels(view, "miss").inc()
+            try:
+                with primary_reads():
+                    response = await build()
+                    entry = self.make_cached_entry(response)
+                if entry is not None:
+                    await cache.aset(key, entry, settings.RESPONSE_CACHE_TIMEOUT + settings.RESPONSE_CACHE_STALE_TIMEOUT)
+                return response
+            finally:
+                await cache.adelete(lock_key)
+
+        if entry is not None:
+            RESPONSE_CACHE.labels(view, "stale").inc()
+            return Response(entry["data"])
+
+        RESPONSE_CACHE.labels(view, "wait").inc()
+        deadline = time.monotonic() + settings.RESPONSE_CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            entry = await cache.aget(key)
+            if entry is not None:
+                return Response(entry["data"])
+        return await build()
+
+    def refresh_cached_response(self, cache, key, request, *args, **kwargs):
+        with primary_reads():
+            response = super().get(request, *args, **kwargs)
+            entry = self.make_cached_entry(response)
+        if entry is not None:
+            cache.set(key, entry, settings.RESPONSE_CACHE_TIMEOUT + settings.RESPONSE_CACHE_STALE_TIMEOUT)
+        return response
+
+    def make_cached_entry(self, response):
+        if response.status_code != 200:
+            return None
+        validators = self.conditional_state() if hasattr(self, "conditional_state") else None
+        return {"data": response.data, "expires": time.time() + settings.RESPONSE_CACHE_TIMEOUT, "validators": validators}
+
+    def get_response_cache_key(self, cache, request):
+        parts = [
+            request.path,
+            normalize_query_params(request.query_params),
+            *current_generations(cache, self.get_cache_scopes()),
+        ]
+        digest = hashlib.sha1("|".join(parts).encode()).hexdigest()
+        return f"response:{self.__class__.__name__}:{digest}"
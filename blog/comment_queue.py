@@ -0,0 +1,141 @@
+"""
+Write-behind comment ingestion (``COMMENT_WRITE_BEHIND``).
+
+During bursts on a popular post, every synchronous comment reads the post,
+inserts a comment and bumps ``Post.comment_count``, so concurrent requests
+queue up on the post row lock. In write-behind mode ``CommentCreateAPI``
+only appends a ``QueuedComment`` row, which reads and locks nothing, and
+answers 202. ``flush_comment_queue`` workers then claim pending rows with
+``FOR UPDATE SKIP LOCKED``, check their posts in one query, ``bulk_create``
+the comments and apply the counters once per post per batch.
+
+The queue is a table, so accepted comments survive restarts, and any number
+of web processes and workers can share it.
+"""
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import counters, signals
+from .models import Comment, Post, QueuedComment
+
+# How long a process trusts its last queue depth reading, counting its own enqueues on top.
+DEPTH_CHECK_SECONDS = 1.0
+
+
+class QueueFull(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many comments are waiting to be saved, retry later."
+    default_code = "comment_queue_full"
+
+    def __init__(self):
+        super().__init__()
+        # DRF's exception handler turns ``wait`` into a Retry-After header.
+        self.wait = math.ceil(settings.COMMENT_QUEUE_FLUSH_INTERVAL)
+
+
+class QueueDepth:
+    """
+    Per-process estimate of pending comments, so back-pressure costs a query
+    at most once per ``DEPTH_CHECK_SECONDS`` rather than on every request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._depth = 0
+        self._checked = None
+
+    def read(self):
+        # Exact, but stops one past the limit: a full queue is all back-pressure needs to know.
+        limit = settings.COMMENT_QUEUE_MAX_PENDING + 1
+        return QueuedComment.objects.filter(status=QueuedComment.PENDING)[:limit].count()
+
+    def current(self):
+        with self._lock:
+            if self._checked is not None and time.monotonic() - self._checked < DEPTH_CHECK_SECONDS:
+                return self._depth
+        depth = self.read()
+        with self._lock:
+            self._depth, self._checked = depth, time.monotonic()
+        return depth
+
+    def added(self):
+        with self._lock:
+            self._depth += 1
+
+    def clear(self):
+        with self._lock:
+            self._depth, self._checked = 0, None
+
+
+queue_depth = QueueDepth()
+
+
+def check_capacity():
+    if queue_depth.current() >= settings.COMMENT_QUEUE_MAX_PENDING:
+        raise QueueFull()
+
+
+def enqueue(post_id, content, user=None):
+    queued = QueuedComment.objects.create(post_id=post_id, content=content, user=user)
+    queue_depth.added()
+    return queued
+
+
+def rejection(post_id, post):
+    # The messages CommentCreateSerializer would have answered with.
+    if post is None:
+        return f'Invalid pk "{post_id}" - object does not exist.'
+    if not post.active:
+        return "Cannot comment on inactive posts."
+    return ""
+
+
+def flush(batch_size=None):
+    """
+    Insert up to ``batch_size`` of the oldest pending comments in one
+    transaction and record each outcome. Returns how many entries were processed.
+    """
+    batch_size = batch_size or settings.COMMENT_QUEUE_FLUSH_SIZE
+    with transaction.atomic():
+        queued = list(
+            QueuedComment.objects.filter(status=QueuedComment.PENDING)
+            .order_by("id")
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        if not queued:
+            return 0
+        posts = Post.objects.only("id", "active").in_bulk({item.post_id for item in queued})
+        comments = []
+        now = timezone.now()
+        for item in queued:
+            item.processed = now
+            item.error = rejection(item.post_id, posts.get(item.post_id))
+            if item.error:
+                item.status = QueuedComment.REJECTED
+                continue
+            item.status = QueuedComment.CREATED
+            item.comment = Comment(
+                post_id=item.post_id, content=item.content, user_id=item.user_id, created=item.created
+            )
+            comments.append(item.comment)
+        if comments:
+            Comment.objects.bulk_create(comments)
+            counters.comments_added([comment.post_id for comment in comments])
+            signals.comments_bulk_created(comments)
+        QueuedComment.objects.bulk_update(queued, ["status", "comment", "error", "processed"])
+    return len(queued)
+
+
+def purge_processed(older_than=None):
+    """Delete flushed entries older than ``older_than`` (default ``COMMENT_QUEUE_RETENTION_HOURS``)."""
+    older_than = older_than or timedelta(hours=settings.COMMENT_QUEUE_RETENTION_HOURS)
+    deleted, _ = QueuedComment.objects.filter(processed__lt=timezone.now() - older_than).delete()
+    return deleted
@@ -0,0 +1,158 @@
+"""
+Denormalized counters: ``Post.comment_count``, ``Post.hot_score`` and
+``Author.post_count`` / ``Author.last_published_date``.
+
+Writes adjust them with single ``UPDATE`` statements built from F expressions,
+so concurrent requests never lose an increment. ``updated`` is bumped with them
+because the rendered row changed (ETags and cached list pages follow it).
+Paths that bypass these helpers (admin, bulk loads, raw SQL) leave drift that
+``reconcile_counters`` repairs.
+"""
+import math
+from collections import Counter
+
+from django.db.models import (
+    Case, Count, DateTimeField, F, FloatField, IntegerField, Max, OuterRef, Subquery, Value, When,
+)
+from django.db.models.functions import Abs, Coalesce, Greatest, Least, Ln, Now, Power
+from django.utils import timezone
+
+from core.pagination import invalidate_counts
+from .cache import POST_DETAIL_SCOPE, POST_LIST_SCOPE, invalidate_scopes
+from .models import Author, Comment, Post, hot_weight
+
+RECONCILE_BATCH_SIZE = 1000
+
+
+def comment_added(post_id):
+    Post.objects.filter(pk=post_id).update(
+        comment_count=F("comment_count") + 1,
+        hot_score=hot_score_plus(Value(hot_weight(timezone.now()), output_field=FloatField())),
+        updated=Now(),
+    )
+
+
+def comments_added(post_ids):
+    """``comment_added`` for a batch, in one ``UPDATE`` (``post_ids`` may repeat)."""
+    added = Counter(post_ids)
+    if not added:
+        return
+    now = hot_weight(timezone.now())
+    weights = {pk: now + math.log2(count) for pk, count in added.items()}
+    Post.objects.filter(pk__in=added).update(
+        comment_count=F("comment_count") + per_row(added, IntegerField()),
+        hot_score=hot_score_plus(per_row(weights, FloatField())),
+        updated=Now(),
+    )
+
+
+def hot_score_plus(weight):
+    """
+    ``hot_score`` with an event of log2 weight ``weight`` added, i.e.
+    ``log2(2 ** hot_score + 2 ** weight)`` computed without overflowing.
+    """
+    # Past 60 halvings the smaller term no longer changes a double; capped so power() can't underflow.
+    gap = Least(Abs(F("hot_score") - weight), Value(60.0))
+    return Greatest(F("hot_score"), weight) + Ln(Value(1.0) + Power(Value(0.5), gap)) / Value(math.log(2))
+
+
+def post_published(post):
+    """Count a newly active post towards its author."""
+    published = Value(post.published_date)
+    Author.objects.filter(pk=post.author_id).update(
+        post_count=F("post_count") + 1,
+        last_published_date=Greatest(Coalesce("last_published_date", published), published),
+        updated=Now(),
+    )
+
+
+def posts_published(posts):
+    """``post_published`` for a batch, in one ``UPDATE``."""
+    added = Counter(post.author_id for post in posts)
+    if not added:
+        return
+    latest = {}
+    for post in posts:
+        latest[post.author_id] = max(latest.get(post.author_id, post.published_date), post.published_date)
+    published = per_row(latest, DateTimeField())
+    Author.objects.filter(pk__in=added).update(
+        post_count=F("post_count") + per_row(added, IntegerField()),
+        last_published_date=Greatest(Coalesce("last_published_date", published), published),
+        updated=Now(),
+    )
+
+
+def per_row(values, output_field):
+    """An expression that is ``values[pk]`` on each row, for batched UPDATEs."""
+    return Case(*[When(pk=pk, then=Value(value)) for pk, value in values.items()], output_field=output_field)
+
+
+def post_withdrawn(post):
+    """Stop counting a post that was deactivated (already saved as inactive)."""
+    Author.objects.filter(pk=post.author_id).update(
+        # Clamped in case the counter had already drifted low.
+        post_count=Greatest(F("post_count") - 1, 0),
+        # A maximum can't be decremented, so recompute it in the same statement.
+        last_published_date=latest_published_date(),
+        updated=Now(),
+    )
+
+
+def comment_total():
+    return Subquery(
+        Comment.objects.filter(post=OuterRef("pk")).order_by().values("post").annotate(total=Count("pk")).values("total")
+    )
+
+
+def active_post_total():
+    return Subquery(
+        Post.objects.filter(author=OuterRef("pk"), active=True)
+        .order_by().values("author").annotate(total=Count("pk")).values("total")
+    )
+
+
+def latest_published_date():
+    return Subquery(
+        Post.objects.filter(author=OuterRef("pk"), active=True)
+        .order_by().values("author").annotate(latest=Max("published_date")).values("latest")
+    )
+
+
+def reconcile_counters(batch_size=RECONCILE_BATCH_SIZE):
+    """
+    Recompute every counter in primary-key batches and rewrite only the rows
+    that drifted. Returns ``(posts fixed, authors fixed)``.
+
+    Drifted rows are found by comparing in Python but fixed by an ``UPDATE``
+    that recomputes the value, so a comment added meanwhile isn't overwritten.
+    """
+    # Counter UPDATEs bypass the model signals, so cached responses are dropped here.
+    posts_fixed = fix_batches(Post, {"comment_count": Coalesce(comment_total(), 0)}, batch_size)
+    authors_fixed = fix_batches(
+        Author,
+        {
+            "post_count": Coalesce(active_post_total(), 0),
+            "last_published_date": latest_published_date(),
+        },
+        batch_size,
+    )
+    if posts_fixed or authors_fixed:
+        invalidate_scopes(POST_LIST_SCOPE, POST_DETAIL_SCOPE)
+        invalidate_counts(Post)
+        invalidate_counts(Author)
+    return posts_fixed, authors_fixed
+
+
+def fix_batches(model, counters, batch_size):
+    actual = {f"actual_{name}": expression for name, expression in counters.items()}
+    queryset = model.objects.annotate(**actual).order_by("pk").values("pk", *counters, *actual)
+    fixed = 0
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return fixed
+        last_pk = batch[-1]["pk"]
+        ids = [row["pk"] for row in batch if any(row[name] != row[f"actual_{name}"] for name in counters)]
+        if ids:
+            fixed += model.objects.filter(pk__in=ids).update(**counters, updated=Now())
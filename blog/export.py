@@ -0,0 +1,108 @@
+"""
+Streaming bulk export of posts (``/api/posts/export/``).
+
+Rows are read through a server-side cursor in ``EXPORT_CHUNK_SIZE`` batches
+and encoded batch by batch into a ``StreamingHttpResponse``, so memory stays
+flat however many posts match and nothing is counted. ``PostFilter``
+filters apply as on the post list.
+
+Posts come oldest first, ordered by ``(published_date, id)``. An interrupted
+export resumes from the last row received with
+``?after_published_date=...&after_id=...``.
+"""
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import generics, permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import DateTimeField, IntegerField, empty
+
+from core.renderers import CSVRenderer, NDJSONRenderer
+from .fast_serializers import PostExportValuesSerializer
+from .filters import PostFilter
+from .models import Post
+from .serializers import get_sparse_fields
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+async def aiterate(iterator):
+    """Consume a sync iterator from an async response, one item per thread hop."""
+    # thread_sensitive keeps every step on the request's thread, and so on its connection.
+    step = sync_to_async(next, thread_sensitive=True)
+    while (item := await step(iterator, None)) is not None:
+        yield item
+
+
+class PostExportAPI(generics.GenericAPIView):
+    """
+    Every matching post as NDJSON (default) or CSV (``?format=csv`` or
+    ``Accept: text/csv``). ``?include_comments=true`` adds each post's
+    comments, fetched once per batch. ``?fields=`` / ``?exclude=`` trim the
+    columns as on the post list.
+    """
+
+    queryset = Post.objects.filter(active=True)
+    permission_classes = [permissions.AllowAny]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = PostFilter
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    values_serializer_class = PostExportValuesSerializer
+    ordering = ["published_date", "id"]
+
+    def get(self, request, *args, **kwargs):
+        fields = self.get_export_fields()
+        queryset = self.filter_queryset(self.get_queryset()).order_by(*self.ordering)
+        position = self.get_resume_position()
+        if position is not None:
+            published_date, pk = position
+            queryset = queryset.filter(
+                Q(published_date__gt=published_date) | Q(published_date=published_date, id__gt=pk)
+            )
+        rows = self.values_serializer_class.prepare(queryset, *self.ordering, fields=fields)
+        renderer = request.accepted_renderer
+        content = self.stream(rows, fields, renderer)
+        if isinstance(request._request, ASGIRequest):
+            # A sync iterator would be read to the end before sending under ASGI.
+            content = aiterate(content)
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type += f"; charset={renderer.charset}"
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response.headers["Content-Disposition"] = f'attachment; filename="posts.{renderer.format}"'
+        return response
+
+    def get_export_fields(self):
+        available = self.values_serializer_class.field_names()
+        if self.request.query_params.get("include_comments", "").lower() not in ("1", "true"):
+            available.remove("comments")
+        return get_sparse_fields(self.request, available) or available
+
+    def get_resume_position(self):
+        params = self.request.query_params
+        if "after_published_date" not in params and "after_id" not in params:
+            return None
+        errors = {}
+        position = []
+        for name, field in (("after_published_date", DateTimeField()), ("after_id", IntegerField(min_value=0))):
+            try:
+                position.append(field.run_validation(params.get(name, empty)))
+            except ValidationError as exc:
+                errors[name] = exc.detail
+        if errors:
+            raise ValidationError(errors)
+        return position
+
+    def stream(self, rows, fields, renderer):
+        yield renderer.header(fields)
+        for batch in batches(rows.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE), settings.EXPORT_CHUNK_SIZE):
+            yield renderer.encode_rows(self.values_serializer_class(batch, many=True, fields=fields).data, fields)
@@ -0,0 +1,179 @@
+from collections import defaultdict
+
+from django.conf import settings
+from rest_framework import serializers
+
+from core.timing import phase
+from .models import Comment, limit_per_parent
+from .serializers import (
+    CommentSerializer, PostDetailSerializer, PostExportSerializer, PostListSerializer, TrendingPostSerializer,
+)
+
+
+class ValuesSerializer:
+    """
+    Read-only serializer that renders ``.values()`` rows instead of model instances.
+
+    The output plan is compiled once per class from the ``ModelSerializer`` it
+    mirrors (``serializer_class``): same field names and order, same
+    ``to_representation`` (or its trivial ``str``/``int`` equivalent), so the
+    rendered JSON is byte-identical while skipping DRF's per-field
+    ``get_attribute`` machinery.
+
+    ``lookups`` overrides the ORM path of fields whose source isn't a plain
+    column (e.g. ``StringRelatedField``). ``nested`` maps a field to
+    ``(values serializer, model, fk lookup)``; children are fetched for the
+    whole batch of rows in a single query.
+
+    ``fields`` restricts the output to a sparse fieldset (see
+    ``blog.serializers.get_sparse_fields``); pass the same value to ``prepare``
+    so only those columns are selected.
+    """
+
+    serializer_class = None
+    lookups = {}
+    nested = {}
+
+    def __init__(self, instance=None, many=False, context=None, fields=None):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+        self.plan = self.select_plan(fields)
+
+    @classmethod
+    def compile(cls):
+        if "_plan" not in cls.__dict__:
+            plan = []
+            for name, field in cls.serializer_class().fields.items():
+                if field.write_only:
+                    continue
+                if name in cls.nested:
+                    plan.append((name, None, None))
+                    continue
+                lookup = cls.lookups.get(name, field.source.replace(".", "__"))
+                plan.append((name, lookup, cls.converter_for(field)))
+            cls._plan = tuple(plan)
+        return cls._plan
+
+    @staticmethod
+    def converter_for(field):
+        # Exact type checks: subclasses may override to_representation.
+        if type(field) is serializers.CharField:
+            return str
+        if type(field) is serializers.IntegerField:
+            return int
+        if type(field) is serializers.StringRelatedField:
+            return str
+        return field.to_representation
+
+    @classmethod
+    def select_plan(cls, fields=None):
+        plan = cls.compile()
+        if fields is None:
+            return plan
+        return tuple(entry for entry in plan if entry[0] in fields)
+
+    @classmethod
+    def field_names(cls):
+        return [name for name, _, _ in cls.compile()]
+
+    @classmethod
+    def value_lookups(cls, fields=None):
+        return [lookup for _, lookup, _ in cls.select_plan(fields) if lookup is not None]
+
+    @classmethod
+    def prepare(cls, queryset, *extra_lookups, fields=None):
+        """Turn a view queryset into the ``.values()`` rows this serializer reads."""
+        lookups = dict.fromkeys(["id", *cls.value_lookups(fields), *extra_lookups])
+        return queryset.prefetch_related(None).values(*lookups)
+
+    def nested_querysets(self, rows):
+        """``(name, values serializer, fk, children)`` for each selected nested field."""
+        ids = [row["id"] for row in rows]
+        selected = {name for name, lookup, _ in self.plan if lookup is None}
+        for name, (serializer_class, model, fk) in self.nested.items():
+            if name not in selected:
+                continue
+            children = model._default_manager.none()
+            if ids:
+                children = self.nested_queryset(name, model, fk, ids)
+            yield name, serializer_class, fk, children.values(fk, *serializer_class.value_lookups())
+
+    @staticmethod
+    def group(serializer_class, fk, children):
+        grouped = defaultdict(list)
+        for child in children:
+            grouped[child[fk]].append(serializer_class().to_representation(child))
+        return grouped
+
+    def fetch_nested(self, rows):
+        return {
+            name: self.group(serializer_class, fk, children)
+            for name, serializer_class, fk, children in self.nested_querysets(rows)
+        }
+
+    async def afetch_nested(self, rows):
+        nested = {}
+        for name, serializer_class, fk, children in self.nested_querysets(rows):
+            nested[name] = self.group(serializer_class, fk, [child async for child in children])
+        return nested
+
+    def nested_queryset(self, name, model, fk, ids):
+        """Children of the rows in ``ids`` for nested field ``name``; override to limit them."""
+        return model._default_manager.filter(**{f"{fk}__in": ids})
+
+    def to_representation(self, row, children=None):
+        ret = {}
+        for name, lookup, convert in self.plan:
+            if lookup is None:
+                ret[name] = children[name].get(row["id"], []) if children else []
+                continue
+            value = row[lookup]
+            ret[name] = None if value is None else convert(value)
+        return ret
+
+    @property
+    def data(self):
+        with phase("serialize"):
+            rows = list(self.instance) if self.many else [self.instance]
+            children = self.fetch_nested(rows) if self.nested else None
+            data = [self.to_representation(row, children) for row in rows]
+        return data if self.many else data[0]
+
+    async def adata(self):
+        """``data`` for async views; ``instance`` must already be fetched rows."""
+        with phase("serialize"):
+            rows = list(self.instance) if self.many else [self.instance]
+            children = await self.afetch_nested(rows) if self.nested else None
+            data = [self.to_representation(row, children) for row in rows]
+        return data if self.many else data[0]
+
+
+class CommentValuesSerializer(ValuesSerializer):
+    serializer_class = CommentSerializer
+    lookups = {"user": "user__username"}
+
+
+class PostListValuesSerializer(ValuesSerializer):
+    serializer_class = PostListSerializer
+
+
+class TrendingPostValuesSerializer(ValuesSerializer):
+    serializer_class = TrendingPostSerializer
+
+
+class PostDetailValuesSerializer(ValuesSerializer):
+    serializer_class = PostDetailSerializer
+    nested = {"comments": (CommentValuesSerializer, Comment, "post_id")}
+
+    def nested_queryset(self, name, model, fk, ids):
+        queryset = super().nested_queryset(name, model, fk, ids)
+        return limit_per_parent(queryset, fk, settings.POST_DETAIL_COMMENT_LIMIT)
+
+
+class PostExportValuesSerializer(ValuesSerializer):
+    serializer_class = PostExportSerializer
+    nested = {"comments": (CommentValuesSerializer, Comment, "post_id")}
+
+    def nested_queryset(self, name, model, fk, ids):
+        return super().nested_queryset(name, model, fk, ids).order_by("created", "id")
@@ -1,12 +1,76 @@
+import re
+
 import django_filters
-from .models import Post
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from .models import Author, Post
+
+SEARCH_CONFIG = "english"
+SEARCH_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
 
 class PostFilter(django_filters.FilterSet):
     title = django_filters.CharFilter(field_name="title", lookup_expr="icontains")
     author_name = django_filters.CharFilter(field_name="author__name", lookup_expr="icontains")
     content = django_filters.CharFilter(field_name="content", lookup_expr="icontains")
     published_date = django_filters.DateFromToRangeFilter(field_name="published_date")
+    min_comments = django_filters.NumberFilter(field_name="comment_count", lookup_expr="gte")
 
     class Meta:
         model = Post
-        fields = ["title", "author_name", "published_date", "content"]
+        fields = ["title", "author_name", "published_date", "content", "min_comments"]
+
+
+class AuthorFilter(django_filters.FilterSet):
+    min_posts = django_filters.NumberFilter(field_name="post_count", lookup_expr="gte")
+    last_published_date = django_filters.DateFromToRangeFilter(field_name="last_published_date")
+
+    class Meta:
+        model = Author
+        fields = ["min_posts", "last_published_date"]
+
+
+def build_search_query(terms):
+    """
+    Turn free-text search terms into a prefix-matching tsquery.
+
+    Every token has to match (AND), and each one matches as a prefix so
+    partially typed words still find results.
+    """
+    tokens = [token for term in terms for token in SEARCH_TOKEN_RE.findall(term)]
+    if not tokens:
+        return None
+    raw = " & ".join(f"{token}:*" for token in tokens)
+    return SearchQuery(raw, search_type="raw", config=SEARCH_CONFIG)
+
+
+class PostSearchFilter(SearchFilter):
+    """
+    Full-text search over ``Post.search_vector`` (GIN indexed) instead of
+    ``ILIKE`` scans. Matches are annotated with ``search_rank``, cast from
+    ``real`` to double precision so cursor positions round-trip through JSON
+    exactly.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = build_search_query(self.get_search_terms(request))
+        if query is None:
+            return queryset
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=Cast(SearchRank(F("search_vector"), query), FloatField())
+        )
+
+
+class RankedOrderingFilter(OrderingFilter):
+    """
+    Order search results by relevance unless the client asked for an ordering.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view) or []
+        if self.ordering_param not in request.query_params and "search_rank" in queryset.query.annotations:
+            return ["-search_rank", *ordering]
+        return ordering
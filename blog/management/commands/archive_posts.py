@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.archive import ARCHIVE_BATCH_SIZE, archive_posts, purge_archive, vacuum_hot_tables
+
+
+def month(value):
+    try:
+        return datetime.strptime(value, "%Y-%m").replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise CommandError(f"--purge-before must look like YYYY-MM, got {value!r}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Move posts withdrawn for --inactive-days, with their comments, to the month-partitioned "
+        "archive tables in short batches; optionally drop archive months before --purge-before"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--inactive-days", type=int, default=30, help="Archive posts withdrawn this long ago")
+        parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="Posts moved per transaction")
+        parser.add_argument("--max-batches", type=int, help="Stop after this many batches")
+        parser.add_argument("--sleep", type=float, default=0, help="Seconds to pause between batches")
+        parser.add_argument("--purge-before", help="Drop archive partitions of months before this one (YYYY-MM)")
+        parser.add_argument("--vacuum", action="store_true", help="VACUUM ANALYZE blog_post and blog_comment after")
+
+    def handle(self, *args, **options):
+        purge_before = month(options["purge_before"]) if options["purge_before"] else None
+        posts, comments = archive_posts(
+            timedelta(days=options["inactive_days"]), options["batch_size"], options["max_batches"], options["sleep"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {posts} posts and {comments} comments."))
+        if purge_before is not None:
+            dropped = purge_archive(purge_before)
+            self.stdout.write(self.style.SUCCESS(f"Dropped {len(dropped)} archive partitions: {', '.join(dropped)}"))
+        if options["vacuum"]:
+            vacuum_hot_tables()
@@ -0,0 +1,264 @@
+import json
+import subprocess
+from itertools import count
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from blog.benchmarks import measure, summarize
+from blog.cache import POST_DETAIL_SCOPE, POST_LIST_SCOPE, forget_trending, invalidate_scopes
+from blog.models import Author, Comment, Post, QueuedComment
+from core.authentication import user_cache
+from core.pagination import CustomPagination, invalidate_counts
+
+# Row counts passed to bulk_seed by --scale.
+SCALES = {
+    "small": {"users": 1000, "authors": 500, "posts": 10000, "comments": 50000},
+    "medium": {"users": 10000, "authors": 5000, "posts": 100000, "comments": 1000000},
+    "large": {"users": 100000, "authors": 50000, "posts": 1000000, "comments": 10000000},
+}
+BENCH_PASSWORD = "bench-pass-1234"
+
+
+class Rollback(Exception):
+    pass
+
+
+class Endpoint:
+    """
+    One benchmarked request. ``url`` and ``data`` may be callables taking the
+    fixture dict and a per-endpoint call counter, for requests that must differ
+    on every call (unique emails, a fresh row to delete).
+    """
+
+    def __init__(self, label, url_name, method, url, data=None, auth=True, status=200):
+        self.label = label
+        self.url_name = url_name
+        self.method = method
+        self.url = url
+        self.data = data
+        self.auth = auth
+        self.status = status
+
+
+ENDPOINTS = [
+    # Reads first, so writes don't invalidate caches mid-measurement.
+    Endpoint("post list", "api_post_list", "get", "/api/posts/", auth=False),
+    Endpoint("post list deep page", "api_post_list", "get",
+             lambda f, i: f"/api/posts/?page={f['deep_page']}", auth=False),
+    Endpoint("post list cursor", "api_post_list", "get", "/api/posts/?cursor=&page_size=20", auth=False),
+    Endpoint("post list search", "api_post_list", "get", lambda f, i: f"/api/posts/?search={f['word']}", auth=False),
+    Endpoint("post list by comments", "api_post_list", "get", "/api/posts/?ordering=-comment_count", auth=False),
+    Endpoint("post list sparse", "api_post_list", "get", "/api/posts/?exclude=content", auth=False),
+    Endpoint("post detail", "api_post_detail", "get", lambda f, i: f"/api/posts/{f['hot_post']}/", auth=False),
+    Endpoint("post batch", "api_post_batch", "get",
+             lambda f, i: f"/api/posts/batch/?ids={','.join(map(str, f['batch_ids']))}", auth=False),
+    Endpoint("post trending", "api_post_trending", "get", "/api/posts/trending/", auth=False),
+    Endpoint("post comments", "api_post_comments", "get",
+             lambda f, i: f"/api/posts/{f['hot_post']}/comments/", auth=False),
+    Endpoint("post export", "api_post_export", "get", "/api/posts/export/?title=Bench+post&include_comments=true",
+             auth=False),
+    Endpoint("comment queue status", "api_comment_queue_status", "get",
+             lambda f, i: f"/api/comments/queued/{f['queued_comment']}/", auth=False),
+    Endpoint("author list", "api_author_list", "get", "/api/authors/"),
+    Endpoint("author detail", "api_author_detail", "get", lambda f, i: f"/api/authors/{f['author']}/"),
+    Endpoint("author timeline", "api_author_posts", "get",
+             lambda f, i: f"/api/authors/{f['hot_author']}/posts/", auth=False),
+    Endpoint("author timeline page 2", "api_author_posts", "get", lambda f, i: f["timeline_page_2"], auth=False),
+    Endpoint("token obtain", "token_obtain_pair", "post", "/api/token/",
+             lambda f, i: {"username": f["username"], "password": BENCH_PASSWORD}, auth=False),
+    Endpoint("token refresh", "token_refresh", "post", "/api/token/refresh/",
+             lambda f, i: {"refresh": f["refresh"]}, auth=False),
+    Endpoint("author create", "api_author_create", "post", "/api/authors/create/",
+             lambda f, i: {"name": f"Bench {i}", "email": f"bench-create-{i}@example.com"}, status=201),
+    Endpoint("author update", "api_author_update", "put", lambda f, i: f"/api/authors/{f['author']}/edit/",
+             lambda f, i: {"name": f"Bench Author {i}", "email": "bench-author@example.com"}),
+    Endpoint("post create", "api_post_create", "post", "/api/posts/create/",
+             lambda f, i: {"title": f"Bench post {i}", "content": "Benchmark content. " * 50,
+                           "published_date": timezone.now().isoformat(), "author": f["author"]}, status=201),
+    Endpoint("post bulk create", "api_post_bulk_create", "post", "/api/posts/bulk/",
+             lambda f, i: [{"title": f"Bench bulk {i}-{n}", "content": "Benchmark content. " * 50,
+                            "published_date": timezone.now().isoformat(), "author": f["author"]} for n in range(50)],
+             status=201),
+    Endpoint("post edit", "api_post_edit", "put", lambda f, i: f"/api/posts/{f['post']}/edit/",
+             lambda f, i: {"title": f"Edited {i}", "content": "Edited content. " * 50, "active": True}),
+    Endpoint("comment create", "api_comment_create", "post", "/api/comments/create/",
+             lambda f, i: {"post": f["post"], "content": f"Bench comment {i}"}, status=201),
+    Endpoint("comment bulk create", "api_comment_bulk_create", "post", "/api/comments/bulk/",
+             lambda f, i: [{"post": f["batch_ids"][n % len(f["batch_ids"])], "content": f"Bench comment {i}-{n}"}
+                           for n in range(50)], status=201),
+    Endpoint("post delete", "api_post_delete", "delete",
+             lambda f, i: f"/api/posts/{f['post_targets'][i]}/delete/", status=204),
+    Endpoint("author delete", "api_author_delete", "delete",
+             lambda f, i: f"/api/authors/{f['author_targets'][i]}/delete/", status=204),
+]
+
+
+class Command(BaseCommand):
+    help = "Measure latency, queries per request and throughput of every API endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=50, help="Timed requests per endpoint")
+        parser.add_argument("--only", nargs="+", default=[], help="Run endpoints whose label contains any of these")
+        parser.add_argument("--scale", choices=sorted(SCALES), help="bulk_seed this many rows first (committed)")
+        parser.add_argument("--seed", type=int, default=0, help="Seed for --scale")
+        parser.add_argument("--no-response-cache", action="store_true", help="Measure cache misses on cached reads")
+        parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+        parser.add_argument("--output", help="Also write the JSON results to this file")
+        parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+
+    def handle(self, *args, **options):
+        if options["scale"]:
+            call_command("bulk_seed", seed=options["seed"], stdout=self.stderr, **SCALES[options["scale"]])
+        endpoints = [
+            endpoint for endpoint in ENDPOINTS
+            if not options["only"] or any(term in endpoint.label for term in options["only"])
+        ]
+        if not endpoints:
+            raise CommandError("--only matched no endpoint.")
+
+        overrides = {"ALLOWED_HOSTS": ["testserver"]}
+        if options["no_response_cache"]:
+            overrides["RESPONSE_CACHE_TIMEOUT"] = 0
+        try:
+            with override_settings(**overrides), transaction.atomic():
+                fixtures = self.fixtures(options["repeat"])
+                results = [self.run(endpoint, fixtures, options["repeat"]) for endpoint in endpoints]
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            # Responses cached during the run describe rows that were just rolled back.
+            invalidate_scopes(POST_LIST_SCOPE, POST_DETAIL_SCOPE)
+            forget_trending()
+            invalidate_counts(Post)
+            user_cache.clear()
+
+        report = {"meta": self.metadata(options), "results": results}
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.print_table(results)
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                self.print_comparison(json.load(f)["results"], results)
+
+    def fixtures(self, repeat):
+        """Rows the endpoints act on, created inside the rolled-back transaction."""
+        user = User.objects.create_user(username="bench-api", password=BENCH_PASSWORD)
+        author = Author.objects.create(name="Bench Author", email="bench-api@example.com", user=user)
+        post = Post.objects.create(title="Bench post", content="Benchmark content. " * 50, author=author)
+        Comment.objects.bulk_create(Comment(post=post, content=f"Comment {i}", user=user) for i in range(50))
+        hot_post = (
+            Post.objects.filter(active=True).order_by("-comment_count", "id").values_list("id", flat=True).first()
+        )
+        hot_author = Author.objects.order_by("-post_count", "id").values_list("id", flat=True).first()
+        timeline = f"/api/authors/{hot_author}/posts/"
+        extra = repeat + 2  # warmup + timed calls + the query-count call
+        post_targets = Post.objects.bulk_create(
+            Post(title=f"Delete me {i}", content="x", author=author) for i in range(extra)
+        )
+        author_targets = Author.objects.bulk_create(
+            Author(name=f"Delete me {i}", email=f"bench-delete-{i}@example.com", user=user)
+            for i in range(extra)
+        )
+        queued_comment = QueuedComment.objects.create(post_id=post.pk, content="Queued comment", user=user)
+        refresh = RefreshToken.for_user(user)
+        pages = Post.objects.filter(active=True).count() // CustomPagination.page_size
+        return {
+            "deep_page": max(1, min(pages, 50)),
+            "username": user.username,
+            "author": author.pk,
+            "post": post.pk,
+            "hot_post": hot_post,
+            "hot_author": hot_author,
+            "timeline_page_2": APIClient().get(timeline).json()["next"] or timeline,
+            "batch_ids": [post.pk, *Post.objects.filter(active=True).values_list("id", flat=True)[:19]],
+            "word": "benchmark",
+            "refresh": str(refresh),
+            "access": str(refresh.access_token),
+            "queued_comment": queued_comment.token,
+            "post_targets": [p.pk for p in post_targets],
+            "author_targets": [a.pk for a in author_targets],
+        }
+
+    def run(self, endpoint, fixtures, repeat):
+        client = APIClient()
+        if endpoint.auth:
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {fixtures['access']}")
+        calls = count()
+
+        def call():
+            i = next(calls)
+            url = endpoint.url(fixtures, i) if callable(endpoint.url) else endpoint.url
+            data = endpoint.data(fixtures, i) if callable(endpoint.data) else endpoint.data
+            response = getattr(client, endpoint.method)(url, data, format="json")
+            if response.streaming:
+                # The queries run while the body is read.
+                b"".join(response.streaming_content)
+            if response.status_code != endpoint.status:
+                raise CommandError(f"{endpoint.label}: {endpoint.method.upper()} {url} returned {response.status_code}")
+
+        samples = measure(call, repeat)
+        with CaptureQueriesContext(connection) as ctx:
+            call()
+        return {
+            "endpoint": endpoint.label,
+            "url_name": endpoint.url_name,
+            "method": endpoint.method.upper(),
+            "queries_per_request": len(ctx.captured_queries),
+            "requests_per_s": round(len(samples) / sum(samples), 1),
+            **summarize(samples),
+        }
+
+    def metadata(self, options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            "commit": commit,
+            "repeat": options["repeat"],
+            "response_cache": not options["no_response_cache"],
+            "rows": {
+                "users": User.objects.count(),
+                "authors": Author.objects.count(),
+                "posts": Post.objects.count(),
+                "comments": Comment.objects.count(),
+            },
+        }
+
+    def print_table(self, results):
+        self.stdout.write(
+            f"{'endpoint':<24} {'method':<7} {'queries':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['endpoint']:<24} {row['method']:<7} {row['queries_per_request']:>7} {row['p50_ms']:>8.2f} "
+                f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['requests_per_s']:>8.1f}"
+            )
+
+    def print_comparison(self, before, after):
+        previous = {row["endpoint"]: row for row in before}
+        self.stdout.write(f"\n{'endpoint':<24} {'p50 before':>10} {'p50 now':>8} {'change':>8} {'queries':>9}")
+        for row in after:
+            old = previous.get(row["endpoint"])
+            if old is None:
+                continue
+            change = (row["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100 if old["p50_ms"] else 0
+            queries = f"{old['queries_per_request']}->{row['queries_per_request']}"
+            self.stdout.write(
+                f"{row['endpoint']:<24} {old['p50_ms']:>10.2f} {row['p50_ms']:>8.2f} {change:>+7.1f}% {queries:>9}"
+            )
+
@@ -0,0 +1,66 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from blog.benchmarks import measure, summarize
+from core.authentication import CachedJWTAuthentication, user_cache
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare per-request overhead of JWTAuthentication and CachedJWTAuthentication"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=2000)
+        parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                results = self.run(options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'backend':<26} {'queries':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+        for row in results:
+            self.stdout.write(
+                f"{row['backend']:<26} {row['queries_per_request']:>8} {row['p50_ms']:>8.3f} "
+                f"{row['p95_ms']:>8.3f} {row['p99_ms']:>8.3f} {row['mean_ms']:>8.3f}"
+            )
+
+    def run(self, repeat):
+        user = User.objects.create_user(username="bench-auth")
+        token = str(RefreshToken.for_user(user).access_token)
+        django_request = APIRequestFactory().get("/api/authors/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        user_cache.clear()
+
+        results = []
+        for backend in (JWTAuthentication(), CachedJWTAuthentication()):
+            def authenticate():
+                authenticated, _ = backend.authenticate(Request(django_request))
+                assert authenticated.pk == user.pk
+
+            samples = measure(authenticate, repeat)
+            with CaptureQueriesContext(connection) as ctx:
+                authenticate()
+            results.append({
+                "backend": type(backend).__name__,
+                "queries_per_request": len(ctx.captured_queries),
+                **summarize(samples),
+            })
+        user_cache.clear()
+        return results
@@ -0,0 +1,125 @@
+import http.client
+import json
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.benchmarks import summarize
+
+
+class Target:
+    def __init__(self, spec):
+        name, sep, url = spec.partition("=")
+        parts = urlsplit(url)
+        if not sep or parts.scheme != "http" or not parts.hostname:
+            raise CommandError(f"--target must look like name=http://host:port, got {spec!r}")
+        self.name = name
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip("/")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure throughput and latency of running deployments (e.g. gunicorn sync workers vs ASGI) "
+        "with a fixed number of concurrent keep-alive clients"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", action="append", required=True, help="name=http://host:port, repeatable")
+        parser.add_argument("--path", action="append", help="Request path, repeatable (default /api/posts/)")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds per target and concurrency")
+        parser.add_argument("--warmup", type=float, default=1.0, help="Untimed seconds before each run")
+        parser.add_argument("--token", help="JWT access token sent as a Bearer Authorization header")
+        parser.add_argument("--cache-bust", action="store_true", help="Add a unique query param to skip response caches")
+        parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+        parser.add_argument("--output", help="Also write the JSON results to this file")
+
+    def handle(self, *args, **options):
+        targets = [Target(spec) for spec in options["target"]]
+        paths = options["path"] or ["/api/posts/"]
+        headers = {"Accept": "application/json"}
+        if options["token"]:
+            headers["Authorization"] = f"Bearer {options['token']}"
+
+        results = []
+        for target in targets:
+            for concurrency in options["concurrency"]:
+                if options["warmup"]:
+                    self.run(target, paths, headers, concurrency, options["warmup"], options["cache_bust"])
+                row = self.run(target, paths, headers, concurrency, options["duration"], options["cache_bust"])
+                results.append({"target": target.name, "concurrency": concurrency, **row})
+                if not options["json"]:
+                    self.stderr.write(f"{target.name} x{concurrency}: {row['requests_per_s']} req/s")
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(results, f, indent=2)
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.print_table(results)
+
+    def run(self, target, paths, headers, concurrency, duration, cache_bust):
+        """``concurrency`` clients each send requests back to back for ``duration`` seconds."""
+        samples = []
+        statuses = Counter()
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def client(number):
+            connection = http.client.HTTPConnection(target.host, target.port, timeout=60)
+            local_samples, local_statuses = [], Counter()
+            sent = 0
+            while time.perf_counter() < deadline:
+                path = target.prefix + paths[sent % len(paths)]
+                if cache_bust:
+                    path += f"{'&' if '?' in path else '?'}bench={number}-{sent}"
+                sent += 1
+                started = time.perf_counter()
+                try:
+                    connection.request("GET", path, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    status = response.status
+                except (OSError, http.client.HTTPException):
+                    status = "error"
+                    connection.close()
+                local_samples.append(time.perf_counter() - started)
+                local_statuses[status] += 1
+            connection.close()
+            with lock:
+                samples.extend(local_samples)
+                statuses.update(local_statuses)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(number,)) for number in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        if not samples:
+            raise CommandError(f"{target.name}: no request completed in {duration}s")
+        errors = sum(n for status, n in statuses.items() if status == "error" or status >= 400)
+        return {
+            "requests": len(samples),
+            "errors": errors,
+            "requests_per_s": round((len(samples) - errors) / elapsed, 1),
+            "statuses": {str(status): n for status, n in sorted(statuses.items(), key=str)},
+            **summarize(samples),
+        }
+
+    def print_table(self, results):
+        self.stdout.write(
+            f"{'target':<12} {'clients':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>9} {'errors':>7}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['target']:<12} {row['concurrency']:>7} {row['requests_per_s']:>9.1f} {row['p50_ms']:>8.2f} "
+                f"{row['p95_ms']:>8.2f} {row['p99_ms']:>9.2f} {row['errors']:>7}"
+            )
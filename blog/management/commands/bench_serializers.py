@@ -0,0 +1,75 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from blog.benchmarks import measure
+from blog.fast_serializers import PostListValuesSerializer
+from blog.models import Author, Post
+from blog.serializers import PostListSerializer
+from blog.views import PostListAPI
+from core.renderers import FastJSONRenderer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare rows/second of the ModelSerializer and .values() read paths for the post list"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                results = self.run(options["sizes"], options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'rows':>6} {'drf rows/s':>12} {'fast rows/s':>12} {'speedup':>8}   (fetch + serialize + render)")
+        for row in results:
+            self.stdout.write(
+                f"{row['rows']:>6} {row['drf_rows_per_s']:>12,.0f} {row['fast_rows_per_s']:>12,.0f} {row['speedup']:>7.2f}x"
+            )
+
+    def run(self, sizes, repeat):
+        user = User.objects.create_user(username="bench-serializers")
+        author = Author.objects.create(name="Bench Author", email="bench-serializers@example.com", user=user)
+        Post.objects.bulk_create(
+            Post(title=f"Benchmark post {i}", content="Lorem ipsum dolor sit amet. " * 20, author=author, status="published")
+            for i in range(max(sizes))
+        )
+
+        # Same queryset shape the view uses.
+        view = PostListAPI()
+        queryset = view.plan_queryset(Post.objects.filter(active=True, author=author)).order_by("-published_date")
+        drf_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+
+        results = []
+        for size in sizes:
+            def drf():
+                drf_renderer.render(PostListSerializer(queryset[:size], many=True).data)
+
+            def fast():
+                rows = PostListValuesSerializer.prepare(queryset)[:size]
+                fast_renderer.render(PostListValuesSerializer(rows, many=True).data)
+
+            drf_rate = size * repeat / sum(measure(drf, repeat))
+            fast_rate = size * repeat / sum(measure(fast, repeat))
+            results.append({
+                "rows": size,
+                "drf_rows_per_s": round(drf_rate),
+                "fast_rows_per_s": round(fast_rate),
+                "speedup": round(fast_rate / drf_rate, 2),
+            })
+        return results
@@ -0,0 +1,76 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from blog.counters import reconcile_counters
+from blog.models import Post
+from blog.trending import refresh_hot_scores
+from blog.seeding import SEED_PASSWORD, TABLES, SeedPlan, copy_block, finish_tables, next_ids, sampler, text_pools
+from core.pagination import invalidate_counts
+
+
+class Command(BaseCommand):
+    help = "Generate a large, reproducible dataset of users, authors, posts and comments with COPY"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--authors", type=int, default=10000)
+        parser.add_argument("--posts", type=int, default=100000)
+        parser.add_argument("--comments", type=int, default=1000000)
+        parser.add_argument("--seed", type=int, default=0, help="Same seed and block size give the same data")
+        parser.add_argument("--block-size", type=int, default=10000, help="Rows per COPY")
+        parser.add_argument("--workers", type=int, default=1, help="Processes copying blocks in parallel")
+        parser.add_argument("--author-skew", type=float, default=0.0,
+                            help="Zipf exponent for posts per author (0 = uniform, ~1 = a few hot authors)")
+        parser.add_argument("--post-skew", type=float, default=0.0,
+                            help="Zipf exponent for comments per post (0 = uniform, ~1 = viral posts)")
+
+    def handle(self, *args, **options):
+        counts = {key: options[key] for key, _, _, _ in TABLES}
+        if any(count < 0 for count in counts.values()) or options["block_size"] < 1 or options["workers"] < 1:
+            raise CommandError("Counts must be non-negative; --block-size and --workers must be positive.")
+        for key, parent in [("authors", "users"), ("posts", "authors"), ("comments", "posts")]:
+            if counts[key] and not counts[parent]:
+                raise CommandError(f"--{key} needs at least one of --{parent}.")
+
+        plan = SeedPlan(options["seed"], counts, next_ids(), options["author_skew"], options["post_skew"])
+        # Built once here so forked workers share them.
+        text_pools(plan.seed)
+        if counts["posts"]:
+            sampler(counts["authors"], plan.author_skew)
+        if counts["comments"]:
+            sampler(counts["posts"], plan.post_skew)
+
+        started = time.perf_counter()
+        for key, _, _, _ in TABLES:
+            blocks = [
+                (start, min(options["block_size"], counts[key] - start))
+                for start in range(0, counts[key], options["block_size"])
+            ]
+            table_started = time.perf_counter()
+            written = self.copy_blocks(plan, key, blocks, options["workers"])
+            self.report(key, written, time.perf_counter() - table_started)
+
+        finish_tables()
+        reconcile_counters()
+        refresh_hot_scores()
+        invalidate_counts(Post)
+        self.report("total", sum(counts.values()), time.perf_counter() - started)
+        self.stdout.write(self.style.SUCCESS(f"Seeded users log in with password {SEED_PASSWORD!r}."))
+
+    def copy_blocks(self, plan, key, blocks, workers):
+        if workers == 1 or len(blocks) < 2:
+            return sum(copy_block(plan, key, start, count) for start, count in blocks)
+        # Children must open their own connections.
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [pool.submit(copy_block, plan, key, start, count) for start, count in blocks]
+            return sum(future.result() for future in futures)
+
+    def report(self, label, rows, seconds):
+        rate = rows / seconds if seconds else 0
+        self.stdout.write(f"{label:<9} {rows:>12,} rows {seconds:>9.2f}s {rate:>12,.0f} rows/s")
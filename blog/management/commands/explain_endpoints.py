@@ -0,0 +1,146 @@
+import json
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from blog.cache import POST_DETAIL_SCOPE, POST_LIST_SCOPE, forget_trending, invalidate_scopes
+from blog.models import Post
+from core.authentication import user_cache
+from core.pagination import invalidate_counts
+
+from .bench_api import ENDPOINTS, SCALES, Rollback
+from .bench_api import Command as BenchCommand
+
+# Server-side cursors (the export) are logged as DECLARE ... FOR SELECT.
+CURSOR_PREFIX = " CURSOR WITH HOLD FOR "
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def needless_seq_scans(plan, table_rows, min_rows):
+    """
+    ``(table, estimated table rows)`` of each sequential scan an index should have avoided.
+
+    Scans of tables under ``min_rows`` are cheap. A statement without a LIMIT
+    that needs at least half of a table, such as an exact COUNT, may also scan
+    it: reading it through an index wouldn't be faster.
+    """
+    nodes = list(plan_nodes(plan))
+    limited = any(node["Node Type"] == "Limit" for node in nodes)
+    for node in nodes:
+        if node["Node Type"] != "Seq Scan":
+            continue
+        rows = table_rows(node["Relation Name"])
+        if rows < min_rows or (not limited and node["Plan Rows"] >= rows / 2):
+            continue
+        yield node["Relation Name"], rows
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN every SELECT the read endpoints run and fail if the planner picks a sequential "
+        "scan of a large table (run it against seeded data, e.g. --scale small)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=sorted(SCALES), help="bulk_seed this many rows first (committed)")
+        parser.add_argument("--seed", type=int, default=0, help="Seed for --scale")
+        parser.add_argument("--only", nargs="+", default=[], help="Check endpoints whose label contains any of these")
+        parser.add_argument("--path", action="append", default=[], help="Also check this GET path, repeatable")
+        parser.add_argument(
+            "--min-rows", type=int, default=10000,
+            help="Ignore sequential scans of tables the planner estimates below this many rows",
+        )
+        parser.add_argument("--verbose-plans", action="store_true", help="Print the plan of every statement")
+        parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+
+    def handle(self, *args, **options):
+        if options["scale"]:
+            call_command("bulk_seed", seed=options["seed"], stdout=self.stderr, **SCALES[options["scale"]])
+        requests = [
+            (endpoint.label, endpoint.url, endpoint.auth) for endpoint in ENDPOINTS
+            if endpoint.method == "get"
+            and (not options["only"] or any(term in endpoint.label for term in options["only"]))
+        ]
+        requests += [(path, path, True) for path in options["path"]]
+        if not requests:
+            raise CommandError("--only matched no endpoint.")
+
+        # Every request should reach the database: no cached responses or counts.
+        overrides = {"ALLOWED_HOSTS": ["testserver"], "RESPONSE_CACHE_TIMEOUT": 0, "PAGINATION_COUNT_CACHE_TIMEOUT": 0}
+        forget_trending()
+        try:
+            with override_settings(**overrides), transaction.atomic():
+                fixtures = BenchCommand().fixtures(0)
+                results = [self.explain_request(label, url, auth, fixtures, options) for label, url, auth in requests]
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            invalidate_scopes(POST_LIST_SCOPE, POST_DETAIL_SCOPE)
+            forget_trending()
+            invalidate_counts(Post)
+            user_cache.clear()
+
+        failures = [(row["endpoint"], scan) for row in results for scan in row["seq_scans"]]
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            for row in results:
+                status = self.style.ERROR("SEQ SCAN") if row["seq_scans"] else self.style.SUCCESS("ok")
+                self.stdout.write(f"{row['endpoint']:<24} {row['statements']:>3} statements  {status}")
+                for scan in row["seq_scans"]:
+                    self.stdout.write(f"    {scan['table']} (~{scan['rows']} rows): {scan['sql'][:300]}")
+        if failures:
+            raise CommandError(
+                f"{len(failures)} sequential scan(s) of large tables in: "
+                + ", ".join(sorted({endpoint for endpoint, _ in failures}))
+            )
+
+    def explain_request(self, label, url, auth, fixtures, options):
+        client = APIClient()
+        if auth:
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {fixtures['access']}")
+        url = url(fixtures, 0) if callable(url) else url
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        if response.status_code != 200:
+            raise CommandError(f"{label}: GET {url} returned {response.status_code}")
+
+        statements = [self.select_sql(query["sql"]) for query in ctx.captured_queries]
+        statements = [sql for sql in statements if sql is not None]
+        seq_scans = []
+        for sql in statements:
+            plan = self.explain(sql)
+            if options["verbose_plans"]:
+                self.stdout.write(f"{label}: {sql}\n{json.dumps(plan, indent=2)}")
+            for table, rows in needless_seq_scans(plan, self.estimated_rows, options["min_rows"]):
+                seq_scans.append({"table": table, "rows": rows, "sql": sql})
+        return {"endpoint": label, "url": url, "statements": len(statements), "seq_scans": seq_scans}
+
+    @staticmethod
+    def select_sql(sql):
+        if CURSOR_PREFIX in sql:
+            sql = sql.split(CURSOR_PREFIX, 1)[1]
+        return sql if sql.lstrip().upper().startswith(("SELECT", "WITH")) else None
+
+    @staticmethod
+    def explain(sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            return cursor.fetchone()[0][0]["Plan"]
+
+    @staticmethod
+    def estimated_rows(table):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [table])
+            return max(int(cursor.fetchone()[0]), 0)
@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from blog.comment_queue import flush, purge_processed
+
+# How often the worker deletes flushed entries past COMMENT_QUEUE_RETENTION_HOURS.
+PURGE_EVERY_SECONDS = 600
+
+
+class Command(BaseCommand):
+    help = (
+        "Insert write-behind comments (COMMENT_WRITE_BEHIND) in batches. Runs until stopped; "
+        "several workers can share the queue"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.COMMENT_QUEUE_FLUSH_SIZE)
+        parser.add_argument(
+            "--interval", type=float, default=settings.COMMENT_QUEUE_FLUSH_INTERVAL,
+            help="Seconds to wait when the queue has less than a full batch",
+        )
+        parser.add_argument("--once", action="store_true", help="Drain the queue, purge old entries and exit")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        purged_at = None
+        total = 0
+        try:
+            while True:
+                if purged_at is None or time.monotonic() - purged_at >= PURGE_EVERY_SECONDS:
+                    purge_processed()
+                    purged_at = time.monotonic()
+                processed = flush(batch_size)
+                total += processed
+                if processed < batch_size:
+                    if options["once"]:
+                        break
+                    time.sleep(options["interval"])
+                    # Reconnect if the idle connection broke or outlived CONN_MAX_AGE.
+                    close_old_connections()
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} queued comments."))
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 from blog.models import Author, Post, Comment
+from blog.counters import reconcile_counters
 from django.utils import timezone
 import random
 from faker import Faker
@@ -55,4 +56,7 @@ class Command(BaseCommand):
                     user=user
                 )
 
+        # Rows above were created directly, so bring the denormalized counters up to date.
+        reconcile_counters()
+
         self.stdout.write(self.style.SUCCESS("Database seeded successfully with 100 posts and comments!"))
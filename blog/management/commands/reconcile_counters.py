@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from blog.counters import RECONCILE_BATCH_SIZE, reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute Post.comment_count and Author.post_count/last_published_date, fixing rows that drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=RECONCILE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        posts_fixed, authors_fixed = reconcile_counters(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Fixed counters on {posts_fixed} posts and {authors_fixed} authors."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from blog.trending import HOT_SCORE_BATCH_SIZE, refresh_hot_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Post.hot_score from publication and comment times, fixing rows that drifted "
+        "(deleted or archived comments, a changed TRENDING_HALF_LIFE_HOURS)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=HOT_SCORE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        fixed = refresh_hot_scores(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Fixed hot scores on {fixed} posts."))
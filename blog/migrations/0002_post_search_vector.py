@@ -0,0 +1,124 @@
+# Generated by Django 4.2.23 on 2026-10-18 18:56
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+BACKFILL_BATCH_SIZE = 10000
+
+SEARCH_TRIGGERS_SQL = """
+CREATE OR REPLACE FUNCTION blog_post_search_document(title text, author_name text, content text)
+RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(author_name, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(content, '')), 'C');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION blog_post_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := blog_post_search_document(
+        NEW.title,
+        (SELECT name FROM blog_author WHERE id = NEW.author_id),
+        NEW.content
+    );
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER blog_post_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, content, author_id ON blog_post
+    FOR EACH ROW EXECUTE FUNCTION blog_post_search_vector_update();
+
+CREATE OR REPLACE FUNCTION blog_author_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    UPDATE blog_post
+    SET search_vector = blog_post_search_document(title, NEW.name, content)
+    WHERE author_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER blog_author_search_vector_trigger
+    AFTER UPDATE OF name ON blog_author
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION blog_author_search_vector_update();
+"""
+
+DROP_SEARCH_TRIGGERS_SQL = """
+DROP TRIGGER IF EXISTS blog_author_search_vector_trigger ON blog_author;
+DROP FUNCTION IF EXISTS blog_author_search_vector_update();
+DROP TRIGGER IF EXISTS blog_post_search_vector_trigger ON blog_post;
+DROP FUNCTION IF EXISTS blog_post_search_vector_update();
+DROP FUNCTION IF EXISTS blog_post_search_document(text, text, text);
+"""
+
+
+def backfill_search_vectors(apps, schema_editor):
+    """Populate existing posts in id batches so no single statement locks the whole table."""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT coalesce(min(id), 0), coalesce(max(id), 0) FROM blog_post")
+        low, high = cursor.fetchone()
+        for start in range(low, high + 1, BACKFILL_BATCH_SIZE):
+            cursor.execute(
+                """
+                UPDATE blog_post AS p
+                SET search_vector = blog_post_search_document(p.title, a.name, p.content)
+                FROM blog_author AS a
+                WHERE a.id = p.author_id AND p.id >= %s AND p.id < %s
+                """,
+                [start, start + BACKFILL_BATCH_SIZE],
+            )
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """
+    Back the title/author_name ``icontains`` filters with trigram indexes.
+
+    Django compiles ``icontains`` to ``UPPER(col::text) LIKE UPPER(%s)``, so the
+    indexes are built on that expression. Skipped when pg_trgm is not available
+    on the server (e.g. some managed or minimal Postgres builds).
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS blog_post_title_trgm "
+            "ON blog_post USING gin ((UPPER(title::text)) gin_trgm_ops)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS blog_author_name_trgm "
+            "ON blog_author USING gin ((UPPER(name::text)) gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP INDEX IF EXISTS blog_post_title_trgm")
+        cursor.execute("DROP INDEX IF EXISTS blog_author_name_trgm")
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(SEARCH_TRIGGERS_SQL, DROP_SEARCH_TRIGGERS_SQL),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='blog_post_search__528e75_gin'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.23 on 2026-10-18 19:11
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+BACKFILL_BATCH_SIZE = 2000
+
+
+def backfill_excerpts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    batch = []
+    for post in Post.objects.only('id', 'content').order_by('id').iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        post.excerpt = Truncator(" ".join(post.content.split())).chars(200)
+        batch.append(post)
+        if len(batch) == BACKFILL_BATCH_SIZE:
+            Post.objects.bulk_update(batch, ['excerpt'])
+            batch = []
+    if batch:
+        Post.objects.bulk_update(batch, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_modification_times'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.RunPython(backfill_excerpts, migrations.RunPython.noop),
+    ]
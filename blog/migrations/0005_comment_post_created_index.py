@@ -0,0 +1,25 @@
+# Generated by Django 4.2.23 on 2026-10-18 19:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'ordering': ['-created', '-id'], 'verbose_name': 'Comment', 'verbose_name_plural': 'Comments'},
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', '-created', '-id'], name='blog_commen_post_id_9e3188_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='blog_commen_created_79f39f_idx',
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.23 on 2026-10-18 19:22
+
+from django.db import migrations, models
+
+
+BACKFILL_COUNTERS_SQL = """
+UPDATE blog_post
+SET comment_count = counts.total
+FROM (SELECT post_id, count(*) AS total FROM blog_comment GROUP BY post_id) AS counts
+WHERE counts.post_id = blog_post.id;
+
+UPDATE blog_author
+SET post_count = counts.total, last_published_date = counts.latest
+FROM (
+    SELECT author_id, count(*) AS total, max(published_date) AS latest
+    FROM blog_post WHERE active GROUP BY author_id
+) AS counts
+WHERE counts.author_id = blog_author.id;
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_comment_post_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='author',
+            name='last_published_date',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='author',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        # One pass over existing rows; later drift is fixed by `manage.py reconcile_counters`.
+        migrations.RunSQL(BACKFILL_COUNTERS_SQL, migrations.RunSQL.noop),
+    ]
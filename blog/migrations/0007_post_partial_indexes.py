@@ -0,0 +1,38 @@
+# Generated by Django 4.2.23 on 2026-10-18 20:04
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE/DROP INDEX CONCURRENTLY can't run in a transaction. Built without locking
+    # out writes; the new indexes come first so the old ones are never missing.
+    atomic = False
+
+    dependencies = [
+        ('blog', '0006_denormalized_counters'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='post',
+            index=models.Index(condition=models.Q(('active', True)), fields=['-published_date', '-id'], name='blog_post_active_pub_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='post',
+            index=models.Index(condition=models.Q(('active', True)), fields=['author', '-published_date'], name='blog_post_author_pub_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='post',
+            index=models.Index(condition=models.Q(('active', True)), fields=['-comment_count', '-id'], name='blog_post_comments_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='post',
+            name='blog_post_active_86db2c_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='post',
+            name='blog_post_publish_a3f863_idx',
+        ),
+    ]
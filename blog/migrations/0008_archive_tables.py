@@ -0,0 +1,86 @@
+# Generated by Django 4.2.23 on 2026-10-18 20:07
+
+from django.db import migrations, models
+
+# Archived rows, range partitioned by month (blog.archive creates the partitions as rows
+# arrive). A partitioned table's primary key must include the partition key.
+CREATE_ARCHIVE_SQL = """
+CREATE TABLE blog_post_archive (
+    id bigint NOT NULL,
+    title varchar(200) NOT NULL,
+    content text NOT NULL,
+    excerpt varchar(200) NOT NULL,
+    published_date timestamp with time zone NOT NULL,
+    author_id bigint NOT NULL,
+    status varchar(10) NOT NULL,
+    comment_count integer NOT NULL CHECK (comment_count >= 0),
+    updated timestamp with time zone NOT NULL,
+    archived_at timestamp with time zone NOT NULL DEFAULT now(),
+    PRIMARY KEY (id, published_date)
+) PARTITION BY RANGE (published_date);
+CREATE INDEX blog_post_archive_author_idx ON blog_post_archive (author_id, published_date);
+
+CREATE TABLE blog_comment_archive (
+    id bigint NOT NULL,
+    post_id bigint NOT NULL,
+    content text NOT NULL,
+    user_id integer NULL,
+    created timestamp with time zone NOT NULL,
+    archived_at timestamp with time zone NOT NULL DEFAULT now(),
+    PRIMARY KEY (id, created)
+) PARTITION BY RANGE (created);
+CREATE INDEX blog_comment_archive_post_idx ON blog_comment_archive (post_id, created);
+"""
+
+DROP_ARCHIVE_SQL = """
+DROP TABLE blog_comment_archive;
+DROP TABLE blog_post_archive;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_post_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_ARCHIVE_SQL, DROP_ARCHIVE_SQL),
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('content', models.TextField()),
+                ('created', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Archived comment',
+                'verbose_name_plural': 'Archived comments',
+                'db_table': 'blog_comment_archive',
+                'ordering': ['-created', '-id'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedPost',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('content', models.TextField()),
+                ('excerpt', models.CharField(blank=True, max_length=200)),
+                ('published_date', models.DateTimeField()),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('published', 'Published')], max_length=10)),
+                ('comment_count', models.PositiveIntegerField(default=0)),
+                ('updated', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Archived post',
+                'verbose_name_plural': 'Archived posts',
+                'db_table': 'blog_post_archive',
+                'ordering': ['-published_date'],
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.23 on 2026-10-18 20:16
+
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+# One pass over existing rows (see blog.trending.HOT_SCORE_SQL); later drift is fixed by
+# `manage.py refresh_hot_scores`.
+BACKFILL_HOT_SCORES_SQL = """
+WITH weights AS (
+    SELECT id AS post_id, (extract(epoch FROM published_date - %(epoch)s) / %(half_life)s)::float8 AS x
+    FROM blog_post
+    UNION ALL
+    SELECT post_id, (extract(epoch FROM created - %(epoch)s) / %(half_life)s)::float8
+    FROM blog_comment
+), peaked AS (
+    SELECT post_id, x, max(x) OVER (PARTITION BY post_id) AS peak FROM weights
+), scores AS (
+    SELECT post_id, peak + ln(sum(power(2.0::float8, greatest(x - peak, -1000.0)))) / ln(2.0) AS score
+    FROM peaked GROUP BY post_id, peak
+)
+UPDATE blog_post SET hot_score = scores.score
+FROM scores
+WHERE blog_post.id = scores.post_id
+"""
+
+BACKFILL_PARAMS = {
+    "epoch": datetime(2024, 1, 1, tzinfo=timezone.utc),
+    "half_life": getattr(settings, "TRENDING_HALF_LIFE_HOURS", 12) * 3600,
+}
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY can't run in a transaction.
+    atomic = False
+
+    dependencies = [
+        ('blog', '0009_comment_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.RunSQL([(BACKFILL_HOT_SCORES_SQL, BACKFILL_PARAMS)], migrations.RunSQL.noop),
+        AddIndexConcurrently(
+            model_name='post',
+            index=models.Index(condition=models.Q(('active', True)), fields=['-hot_score', '-id'], name='blog_post_hot_idx'),
+        ),
+    ]
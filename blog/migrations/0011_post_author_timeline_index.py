@@ -0,0 +1,25 @@
+# Generated by Django 4.2.23 on 2026-10-18 20:25
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # As in 0007: built without locking out writes, the replacement before the drop.
+    atomic = False
+
+    dependencies = [
+        ('blog', '0010_post_hot_score'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='post',
+            index=models.Index(condition=models.Q(('active', True)), fields=['author', '-published_date', '-id'], name='blog_post_author_timeline_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='post',
+            name='blog_post_author_pub_idx',
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.23 on 2026-10-18 21:02
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_post_author_timeline_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queuedcomment',
+            name='token',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        # One token per existing row; a Python default would give them all the same one.
+        migrations.RunSQL(
+            'UPDATE blog_queuedcomment SET token = gen_random_uuid() WHERE token IS NULL',
+            migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name='queuedcomment',
+            name='token',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+    ]
@@ -0,0 +1,165 @@
+import hashlib
+
+from django.conf import settings
+from django.utils.http import quote_etag
+from django.views.decorators.http import condition
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from .serializers import SparseFieldsMixin, get_sparse_fields, sparse_fields_requested
+
+
+class QueryPlanMixin:
+    """
+    Shape the view queryset from the relations its serializer reads.
+
+    Views declare what their serializer touches so list/detail endpoints
+    run a constant number of queries no matter how many rows they render.
+    When the client asks for a sparse fieldset (``?fields=`` / ``?exclude=``),
+    relations, ``annotation_fields`` and ``only_fields`` columns the output
+    doesn't need are dropped; ``required_fields`` are always kept (e.g. what
+    permission checks read).
+    """
+
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    annotation_fields = {}
+    only_fields = ()
+    required_fields = ("id",)
+
+    def get_queryset(self):
+        return self.plan_queryset(super().get_queryset())
+
+    def get_needed_lookups(self):
+        """ORM paths the requested output (and its ordering) reads, or None for all of them."""
+        request = getattr(self, "request", None)
+        if not issubclass(self.get_serializer_class(), SparseFieldsMixin) or not sparse_fields_requested(request):
+            return None
+        needed = {field.source.replace(".", "__") for field in self.get_serializer().fields.values()}
+        ordering = request.query_params.get("ordering", "").split(",") + list(getattr(self, "ordering", None) or [])
+        needed.update(field.strip().lstrip("-") for field in ordering if field.strip())
+        return needed
+
+    def plan_queryset(self, queryset):
+        needed = self.get_needed_lookups()
+
+        def wanted(path):
+            return needed is None or any(lookup == path or lookup.startswith(f"{path}__") for lookup in needed)
+
+        select_related = [path for path in self.select_related_fields if wanted(path)]
+        prefetch_related = [
+            lookup for lookup in self.prefetch_related_fields
+            if wanted(getattr(lookup, "prefetch_to", lookup))
+        ]
+        annotations = {name: expression for name, expression in self.annotation_fields.items() if wanted(name)}
+        only = [
+            path for path in self.only_fields
+            if needed is None or path in needed or path in self.required_fields
+        ]
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        if only:
+            queryset = queryset.only(*only)
+        return queryset
+
+
+class ValuesReadMixin:
+    """
+    Serve list/retrieve from ``.values()`` rows through ``values_serializer_class``
+    (see ``blog.fast_serializers``) while ``settings.FAST_SERIALIZATION`` is on.
+    Filtering, ordering, pagination, sparse fieldsets and the response shape
+    are unchanged; only the selected fields' columns are read.
+    """
+
+    values_serializer_class = None
+
+    def use_values_serializer(self):
+        return settings.FAST_SERIALIZATION and self.values_serializer_class is not None
+
+    def get_values_fields(self):
+        return get_sparse_fields(self.request, self.values_serializer_class.field_names())
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_values_serializer():
+            return super().list(request, *args, **kwargs)
+        fields = self.get_values_fields()
+        queryset = self.filter_queryset(self.get_queryset())
+        # Pagination reads the ordering values back from each row.
+        ordering = [field.lstrip("-") for field in queryset.query.order_by]
+        rows = self.values_serializer_class.prepare(queryset, *ordering, fields=fields)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.values_serializer_class(page, many=True, fields=fields).data)
+        return Response(self.values_serializer_class(rows, many=True, fields=fields).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_values_serializer():
+            return super().retrieve(request, *args, **kwargs)
+        fields = self.get_values_fields()
+        rows = self.values_serializer_class.prepare(self.filter_queryset(self.get_queryset()), fields=fields)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(rows, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request, row)
+        return Response(self.values_serializer_class(row, fields=fields).data)
+
+
+def make_etag(*parts):
+    return hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+class ConditionalMixin:
+    """
+    Evaluate HTTP preconditions before the view builds or serializes anything.
+
+    Views return ``(etag, last_modified)`` from ``get_conditional_state``,
+    computed from modification timestamps rather than the response body.
+    ``(None, None)`` means "unknown".
+    """
+
+    def get_conditional_state(self):
+        raise NotImplementedError
+
+    def conditional_state(self):
+        if not hasattr(self, "_conditional_state"):
+            self._conditional_state = self.get_conditional_state()
+        return self._conditional_state
+
+    def run_conditionally(self, handler, request, *args, **kwargs):
+        decorated = condition(
+            etag_func=lambda *a, **kw: self.conditional_state()[0],
+            last_modified_func=lambda *a, **kw: self.conditional_state()[1],
+        )(handler)
+        return decorated(request, *args, **kwargs)
+
+
+class ConditionalGetMixin(ConditionalMixin):
+    """Answer ``If-None-Match`` / ``If-Modified-Since`` with 304 Not Modified."""
+
+    def get(self, request, *args, **kwargs):
+        return self.run_conditionally(super().get, request, *args, **kwargs)
+
+
+class ConditionalUpdateMixin(ConditionalMixin):
+    """
+    Optimistic concurrency for updates: a stale ``If-Match`` gets 412.
+    The new ETag is returned with a successful update.
+    """
+
+    def update_conditionally(self, handler, request, *args, **kwargs):
+        response = self.run_conditionally(handler, request, *args, **kwargs)
+        if response.status_code == 200:
+            del self._conditional_state
+            etag = self.conditional_state()[0]
+            if etag:
+                response.headers["ETag"] = quote_etag(etag)
+        return response
+
+    def put(self, request, *args, **kwargs):
+        return self.update_conditionally(super().put, request, *args, **kwargs)
+
+    def patch(self, request, *args, **kwargs):
+        return self.update_conditionally(super().patch, request, *args, **kwargs)
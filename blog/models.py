@@ -1,14 +1,75 @@
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
 from django.db import models
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import User
 from django.utils import timezone
+from django.utils.text import Truncator
+
+EXCERPT_LENGTH = 200
+# Origin of Post.hot_score, see hot_weight and blog.trending.
+HOT_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def make_excerpt(content):
+    """Whitespace-collapsed preview of a post body, cut at EXCERPT_LENGTH characters."""
+    return Truncator(" ".join(content.split())).chars(EXCERPT_LENGTH)
+
+
+def hot_weight(when):
+    """
+    log2 of the weight an event at ``when`` adds to ``Post.hot_score``: it
+    doubles every ``TRENDING_HALF_LIFE_HOURS`` after ``HOT_EPOCH``, so
+    relative to now, older events have decayed by half per half-life.
+    """
+    return (when - HOT_EPOCH).total_seconds() / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+def limit_per_parent(queryset, fk, limit):
+    """First ``limit`` rows of ``queryset`` (in its ordering) for each value of ``fk``."""
+    ordering = [
+        F(field[1:]).desc() if field.startswith("-") else F(field).asc()
+        for field in queryset.query.order_by or queryset.model._meta.ordering
+    ]
+    row_number = Window(RowNumber(), partition_by=F(fk), order_by=ordering)
+    return queryset.annotate(row_number=row_number).filter(row_number__lte=limit)
+
+
+class CounterFieldsMixin:
+    """
+    Keep plain ``save()`` calls on existing rows from writing back stale
+    denormalized counters; only blog.counters changes them, atomically.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
 
 
-class Author(models.Model):
+class Author(CounterFieldsMixin, models.Model):
     name = models.CharField(max_length=100)
     # Should i make this nullable? as per assessment in CreateApi of Post it should be using author_name and not author_id
     email = models.EmailField(unique=True)
     # Different Pen Names? if it is then good. if not should be onetoone? i'll stick with the requirements
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    # Denormalized from the author's active posts, see blog.counters.
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+    last_published_date = models.DateTimeField(null=True, blank=True, editable=False)
+    updated = models.DateTimeField(auto_now=True, db_index=True)
+
+    counter_fields = ("post_count", "last_published_date")
 
     class Meta:
         verbose_name = "Author"
@@ -18,7 +79,7 @@ class Author(models.Model):
         return self.name
 
 
-class Post(models.Model):
+class Post(CounterFieldsMixin, models.Model):
     STATUS_CHOICES = [
         ("draft", "Draft"),
         ("published", "Published"),
@@ -26,24 +87,68 @@ class Post(models.Model):
 
     title = models.CharField(max_length=200)
     content = models.TextField()
+    # Kept in sync with content on save so lists can show a preview without reading the body
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False)
     published_date = models.DateTimeField(default=timezone.now)
     author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name="posts")
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="draft")
     active = models.BooleanField(default=True)
+    # Denormalized, see blog.counters.
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # log2 of the decayed publication + comment weights (see hot_weight), for the trending list.
+    hot_score = models.FloatField(default=0.0, editable=False)
+    updated = models.DateTimeField(auto_now=True, db_index=True)
+    # Maintained by a database trigger (see migration 0002), weighted title > author > content
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    counter_fields = ("comment_count", "hot_score")
 
     class Meta:
         verbose_name = "Post"
         verbose_name_plural = "Posts"
         ordering = ["-published_date"]
+        # Every public read filters on active, so the ordering indexes are partial and
+        # skip withdrawn posts. Each ends with id, the keyset pagination tie-breaker.
         indexes = [
             models.Index(fields=["status"]),
-            models.Index(fields=["active"]),
-            models.Index(fields=["-published_date"]),
+            # The post list, date range filters and the export (scanned backwards).
+            models.Index(fields=["-published_date", "-id"], condition=Q(active=True), name="blog_post_active_pub_idx"),
+            # An author's timeline (and its keyset pages); also the author counter subqueries.
+            models.Index(
+                fields=["author", "-published_date", "-id"],
+                condition=Q(active=True),
+                name="blog_post_author_timeline_idx",
+            ),
+            # ?ordering=-comment_count and the min_comments filter.
+            models.Index(
+                fields=["-comment_count", "-id"], condition=Q(active=True), name="blog_post_comments_idx"
+            ),
+            # Trending: the top posts are the first entries of this index.
+            models.Index(fields=["-hot_score", "-id"], condition=Q(active=True), name="blog_post_hot_idx"),
+            GinIndex(fields=["search_vector"]),
         ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # So moving a post can refresh its previous author's timeline too (see blog.signals).
+        instance._loaded_author_id = instance.__dict__.get("author_id")
+        return instance
+
+    def save(self, *args, **kwargs):
+        if "content" not in self.get_deferred_fields():
+            self.excerpt = make_excerpt(self.content)
+        if self._state.adding and not self.hot_score:
+            # Publication counts as the first event.
+            self.hot_score = hot_weight(self.published_date)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "content" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "excerpt"}
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="comments")
@@ -54,10 +159,102 @@ class Comment(models.Model):
     class Meta:
         verbose_name = "Comment"
         verbose_name_plural = "Comments"
-        ordering = ["-created"]
+        ordering = ["-created", "-id"]
         indexes = [
-            models.Index(fields=["-created"]),
+            # Serves "latest comments of a post", including keyset pages over (created, id).
+            models.Index(fields=["post", "-created", "-id"]),
         ]
 
     def __str__(self):
         return f"Comment by {self.user or 'Anonymous'} on {self.post.title[:20]}"
+
+
+class QueuedComment(models.Model):
+    """
+    A comment accepted by ``CommentCreateAPI`` in write-behind mode
+    (``COMMENT_WRITE_BEHIND``), waiting for ``flush_comment_queue`` to insert it.
+
+    Enqueueing doesn't read or lock the post: ``post_id`` is checked when the
+    batch is flushed, and the outcome is kept here for the submitter to poll
+    by its random ``token``.
+    """
+
+    PENDING = "pending"
+    CREATED = "created"
+    REJECTED = "rejected"
+    STATUS_CHOICES = [(PENDING, "Pending"), (CREATED, "Created"), (REJECTED, "Rejected")]
+
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    post_id = models.BigIntegerField()
+    content = models.TextField()
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    created = models.DateTimeField(default=timezone.now)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    comment = models.ForeignKey(Comment, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    error = models.CharField(max_length=200, blank=True)
+    processed = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Queued comment"
+        verbose_name_plural = "Queued comments"
+        ordering = ["id"]
+        indexes = [
+            # The flusher's "oldest pending first" and the queue depth's min/max(id).
+            models.Index(fields=["id"], condition=Q(status="pending"), name="blog_queuedcomment_pending_idx"),
+        ]
+
+    def __str__(self):
+        return f"Queued comment {self.pk} on post {self.post_id} ({self.status})"
+
+
+class ArchivedPost(models.Model):
+    """
+    A withdrawn post moved out of ``blog_post`` by ``archive_posts``.
+
+    ``blog_post_archive`` is range partitioned by month of ``published_date``
+    (migration 0008), so its primary key is really ``(id, published_date)``;
+    ids stay unique because rows only arrive from ``blog_post``. Read-only.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=200)
+    content = models.TextField()
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True)
+    published_date = models.DateTimeField()
+    # Authors can be deleted after their posts were archived.
+    author = models.ForeignKey(Author, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    status = models.CharField(max_length=10, choices=Post.STATUS_CHOICES)
+    comment_count = models.PositiveIntegerField(default=0)
+    updated = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = "blog_post_archive"
+        verbose_name = "Archived post"
+        verbose_name_plural = "Archived posts"
+        ordering = ["-published_date"]
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedComment(models.Model):
+    """A comment archived with its post, in ``blog_comment_archive`` (partitioned by month of ``created``)."""
+
+    id = models.BigIntegerField(primary_key=True)
+    post = models.ForeignKey(ArchivedPost, on_delete=models.DO_NOTHING, db_constraint=False, related_name="comments")
+    content = models.TextField()
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name="+")
+    created = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = "blog_comment_archive"
+        verbose_name = "Archived comment"
+        verbose_name_plural = "Archived comments"
+        ordering = ["-created", "-id"]
+
+    def __str__(self):
+        return f"Archived comment {self.id} on post {self.post_id}"
@@ -0,0 +1,210 @@
+"""
+Row generators for ``manage.py bulk_seed``.
+
+Rows are written with Postgres ``COPY`` in blocks of ``block_size`` rows.
+Every block draws from its own RNG, seeded from ``(seed, table, block start)``,
+so the dataset only depends on the seed and block size, not on how blocks are
+spread over worker processes. Text comes from Faker pools generated once per
+seed, and ids are assigned up front so related rows can be generated in
+parallel.
+"""
+import io
+import itertools
+import math
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.utils import timezone
+from faker import Faker
+
+from .models import Author, Comment, Post, hot_weight, make_excerpt
+
+POOL_SIZE = 2000
+SEED_PASSWORD = "pass1234"
+HISTORY = timedelta(days=730)
+COMMENT_DELAY = timedelta(days=30)
+
+_pools = {}
+_samplers = {}
+
+
+class SeedPlan:
+    """What to generate: row counts, first id of each table and distribution knobs."""
+
+    def __init__(self, seed, counts, first_ids, author_skew=0.0, post_skew=0.0, now=None):
+        self.seed = seed
+        self.counts = counts
+        self.first_ids = first_ids
+        self.author_skew = author_skew
+        self.post_skew = post_skew
+        self.now = now or timezone.now()
+
+
+def text_pools(seed):
+    """Faker text generated once per seed; forked workers inherit it."""
+    if seed not in _pools:
+        fake = Faker()
+        fake.seed_instance(seed)
+        _pools[seed] = {
+            "names": [fake.name() for _ in range(POOL_SIZE)],
+            "titles": [fake.sentence(nb_words=6)[:200] for _ in range(POOL_SIZE)],
+            "paragraphs": [fake.paragraph(nb_sentences=5) for _ in range(POOL_SIZE)],
+            "sentences": [fake.sentence(nb_words=12) for _ in range(POOL_SIZE)],
+            "password": make_password(SEED_PASSWORD, salt=f"seed{seed}"),
+        }
+    return _pools[seed]
+
+
+class SkewedSampler:
+    """
+    Zipf-like choice of ``n`` items: the item of rank ``k`` is drawn with weight
+    ``1 / (k + 1) ** skew`` (``skew=0`` is uniform). Ranks map to indexes
+    through a fixed permutation so the hot items aren't simply the oldest rows.
+    """
+
+    def __init__(self, n, skew):
+        self.n = n
+        self.skew = skew
+        self.cum_weights = None
+        if skew > 0:
+            self.cum_weights = list(itertools.accumulate(1 / (k + 1) ** skew for k in range(n)))
+        self.stride = next(a for a in itertools.count(max(n // 2 + 1, 1)) if math.gcd(a, n) == 1)
+
+    def sample(self, rng, k):
+        if self.cum_weights is None:
+            return [rng.randrange(self.n) for _ in range(k)]
+        ranks = rng.choices(range(self.n), cum_weights=self.cum_weights, k=k)
+        return [rank * self.stride % self.n for rank in ranks]
+
+
+def sampler(n, skew):
+    if (n, skew) not in _samplers:
+        _samplers[n, skew] = SkewedSampler(n, skew)
+    return _samplers[n, skew]
+
+
+def block_rng(plan, table, start):
+    return random.Random(f"{plan.seed}:{table}:{start}")
+
+
+def post_published_date(plan, index):
+    # Spread over HISTORY in id order, so newer ids are newer posts, like real traffic.
+    return plan.now - HISTORY + HISTORY * (index + 0.5) / plan.counts["posts"]
+
+
+def user_rows(plan, start, count, rng):
+    pools = text_pools(plan.seed)
+    for index in range(start, start + count):
+        user_id = plan.first_ids["users"] + index
+        yield (
+            user_id, pools["password"], None, False, f"seed_user{user_id}", "", "",
+            f"seed_user{user_id}@example.com", False, True, plan.now,
+        )
+
+
+def author_rows(plan, start, count, rng):
+    names = text_pools(plan.seed)["names"]
+    for index in range(start, start + count):
+        author_id = plan.first_ids["authors"] + index
+        user_id = plan.first_ids["users"] + index % plan.counts["users"]
+        yield (author_id, rng.choice(names), f"seed_author{author_id}@example.com", user_id, 0, None, plan.now)
+
+
+def post_rows(plan, start, count, rng):
+    pools = text_pools(plan.seed)
+    authors = sampler(plan.counts["authors"], plan.author_skew).sample(rng, count)
+    for offset, index in enumerate(range(start, start + count)):
+        content = "\n\n".join(rng.choices(pools["paragraphs"], k=rng.randint(2, 8)))
+        yield (
+            plan.first_ids["posts"] + index,
+            rng.choice(pools["titles"]),
+            content,
+            make_excerpt(content),
+            post_published_date(plan, index),
+            plan.first_ids["authors"] + authors[offset],
+            "published" if rng.random() < 0.8 else "draft",
+            rng.random() < 0.95,
+            0,
+            # Publication only; bulk_seed adds the comments with refresh_hot_scores.
+            hot_weight(post_published_date(plan, index)),
+            plan.now,
+        )
+
+
+def comment_rows(plan, start, count, rng):
+    sentences = text_pools(plan.seed)["sentences"]
+    posts = sampler(plan.counts["posts"], plan.post_skew).sample(rng, count)
+    for offset, index in enumerate(range(start, start + count)):
+        post_index = posts[offset]
+        created = min(post_published_date(plan, post_index) + COMMENT_DELAY * rng.random(), plan.now)
+        anonymous = rng.random() < 0.3
+        yield (
+            plan.first_ids["comments"] + index,
+            plan.first_ids["posts"] + post_index,
+            rng.choice(sentences),
+            None if anonymous else plan.first_ids["users"] + rng.randrange(plan.counts["users"]),
+            created,
+        )
+
+
+# Tables in dependency order: (plan key, db table, columns, row generator).
+TABLES = [
+    ("users", "auth_user", [
+        "id", "password", "last_login", "is_superuser", "username", "first_name", "last_name",
+        "email", "is_staff", "is_active", "date_joined",
+    ], user_rows),
+    ("authors", Author._meta.db_table, [
+        "id", "name", "email", "user_id", "post_count", "last_published_date", "updated",
+    ], author_rows),
+    # search_vector is filled in by the insert trigger (migration 0002).
+    ("posts", Post._meta.db_table, [
+        "id", "title", "content", "excerpt", "published_date", "author_id", "status", "active",
+        "comment_count", "hot_score", "updated",
+    ], post_rows),
+    ("comments", Comment._meta.db_table, ["id", "post_id", "content", "user_id", "created"], comment_rows),
+]
+
+
+def copy_value(value):
+    """One field in COPY's text format."""
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    text = value.isoformat() if hasattr(value, "isoformat") else str(value)
+    return text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def copy_block(plan, key, start, count):
+    """Generate and COPY one block of rows; returns the number of rows written."""
+    _, table, columns, generate = next(entry for entry in TABLES if entry[0] == key)
+    buffer = io.StringIO()
+    for row in generate(plan, start, count, block_rng(plan, key, start)):
+        buffer.write("\t".join(copy_value(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+    return count
+
+
+def next_ids():
+    """First free id of every seeded table."""
+    with connection.cursor() as cursor:
+        first_ids = {}
+        for key, table, _, _ in TABLES:
+            cursor.execute(f"SELECT coalesce(max(id), 0) + 1 FROM {table}")
+            first_ids[key] = cursor.fetchone()[0]
+    return first_ids
+
+
+def finish_tables():
+    """Move id sequences past the explicit ids and refresh planner statistics."""
+    with connection.cursor() as cursor:
+        for _, table, _, _ in TABLES:
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), coalesce(max(id), 1)) FROM {table}"
+            )
+            cursor.execute(f"ANALYZE {table}")
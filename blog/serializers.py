@@ -1,13 +1,133 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Author, Post, Comment
 
+from core.timing import phase
+from .models import Author, Post, Comment, QueuedComment, hot_weight, make_excerpt
+from . import comment_queue, counters, signals
 
-class AuthorSerializer(serializers.ModelSerializer):
+
+def sparse_fields_requested(request):
+    if request is None:
+        return False
+    params = request.query_params if hasattr(request, "query_params") else request.GET
+    return bool(params.get("fields") or params.get("exclude"))
+
+
+def get_sparse_fields(request, available):
+    """
+    Field names picked by ``?fields=a,b`` and/or ``?exclude=c``, in ``available``
+    order, or None when the request asks for neither. Unknown names are ignored.
+    """
+    if not sparse_fields_requested(request):
+        return None
+    params = request.query_params if hasattr(request, "query_params") else request.GET
+    fields = [name for name in params.get("fields", "").split(",") if name]
+    exclude = {name for name in params.get("exclude", "").split(",") if name}
+    selected = set(fields) if fields else set(available)
+    return [name for name in available if name in selected and name not in exclude]
+
+
+class BatchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    ``PrimaryKeyRelatedField`` that ``BulkCreateListSerializer`` can point at
+    instances fetched for the whole batch (``batch``), instead of one query per item.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batch = None
+
+    def to_internal_value(self, data):
+        if self.batch is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return self.batch[self.pk_field.to_internal_value(data) if self.pk_field else int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
+class BulkCreateListSerializer(serializers.ListSerializer):
+    """
+    ``many=True`` create in a constant number of queries.
+
+    Related objects of every item are fetched in one query per field before
+    validation (see ``BatchedPrimaryKeyRelatedField``). The child serializer's
+    ``bulk_create`` then inserts all items at once.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) > settings.BULK_CREATE_MAX_ITEMS:
+            raise serializers.ValidationError(
+                {"non_field_errors": [f"At most {settings.BULK_CREATE_MAX_ITEMS} items per request."]}
+            )
+        related = [field for field in self.child.fields.values() if isinstance(field, BatchedPrimaryKeyRelatedField)]
+        for field in related:
+            field.batch = self.fetch_related(field, data)
+        try:
+            return super().to_internal_value(data)
+        finally:
+            for field in related:
+                field.batch = None
+
+    @staticmethod
+    def fetch_related(field, data):
+        pks = set()
+        for item in data if isinstance(data, list) else []:
+            try:
+                pks.add(int(item.get(field.field_name)))
+            except (AttributeError, TypeError, ValueError):
+                continue
+        return field.get_queryset().in_bulk(pks) if pks else {}
+
+    def create(self, validated_data):
+        return self.child.bulk_create(validated_data)
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    """``many=True`` counterpart of ``TimedDataMixin`` (set as the ``Meta.list_serializer_class``)."""
+
+    @property
+    def data(self):
+        with phase("serialize"):
+            return super().data
+
+
+class TimedDataMixin:
+    """Attribute building ``.data`` to the ``serialize`` Server-Timing phase."""
+
+    @property
+    def data(self):
+        with phase("serialize"):
+            return super().data
+
+
+class SparseFieldsMixin:
+    """
+    Let clients trim the top-level representation with ``?fields=`` / ``?exclude=``.
+    Nested serializers are left whole.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = get_sparse_fields(self.context.get("request"), list(self.fields))
+        if selected is not None:
+            for name in set(self.fields) - set(selected):
+                self.fields.pop(name)
+
+
+class AuthorSerializer(TimedDataMixin, SparseFieldsMixin, serializers.ModelSerializer):
     user = serializers.StringRelatedField(read_only=True)
 
     class Meta:
         model = Author
-        fields = ["id", "name", "email", "user"]
+        list_serializer_class = TimedListSerializer
+        fields = ["id", "name", "email", "user", "post_count", "last_published_date"]
 
 
 class AuthorCreateUpdateSerializer(serializers.ModelSerializer):
@@ -22,11 +142,12 @@ class AuthorCreateUpdateSerializer(serializers.ModelSerializer):
         return Author.objects.create(user=request.user, **validated_data)
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedDataMixin, serializers.ModelSerializer):
     user = serializers.StringRelatedField(read_only=True)
 
     class Meta:
         model = Comment
+        list_serializer_class = TimedListSerializer
         fields = ["id", "content", "user", "created"]
 
 
@@ -48,23 +169,95 @@ class CommentCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Request context is missing")
         
         user = request.user if request.user.is_authenticated else None
-        return Comment.objects.create(user=user, **validated_data)
+        with transaction.atomic():
+            comment = Comment.objects.create(user=user, **validated_data)
+            counters.comment_added(comment.post_id)
+        return comment
+
+
+class CommentBulkCreateSerializer(CommentCreateSerializer):
+    post = BatchedPrimaryKeyRelatedField(queryset=Post.objects.all())
+
+    class Meta(CommentCreateSerializer.Meta):
+        fields = ["id", *CommentCreateSerializer.Meta.fields]
+        list_serializer_class = BulkCreateListSerializer
 
+    def bulk_create(self, validated_data):
+        request = self.context.get("request")
+        if request is None:
+            raise serializers.ValidationError("Request context is missing")
 
-class PostListSerializer(serializers.ModelSerializer):
+        user = request.user if request.user.is_authenticated else None
+        comments = [Comment(user=user, **item) for item in validated_data]
+        with transaction.atomic():
+            Comment.objects.bulk_create(comments)
+            counters.comments_added([comment.post_id for comment in comments])
+            signals.comments_bulk_created(comments)
+        return comments
+
+
+class QueuedCommentSerializer(serializers.ModelSerializer):
+    """
+    Write-behind ``CommentCreateSerializer``: checks the payload without
+    touching the post, which ``comment_queue.flush`` validates later.
+    """
+
+    post = serializers.IntegerField(source="post_id", min_value=1)
+
+    class Meta:
+        model = QueuedComment
+        # The token, not the sequential id, is what the submitter polls by.
+        fields = ["token", "post", "content", "status", "comment", "error", "created"]
+        read_only_fields = ["status", "comment", "error", "created"]
+
+    def create(self, validated_data):
+        request = self.context.get("request")
+        if request is None:
+            raise serializers.ValidationError("Request context is missing")
+
+        user = request.user if request.user.is_authenticated else None
+        return comment_queue.enqueue(validated_data["post_id"], validated_data["content"], user)
+
+
+class PostListSerializer(TimedDataMixin, SparseFieldsMixin, serializers.ModelSerializer):
     author_name = serializers.CharField(source="author.name", read_only=True)
 
     class Meta:
         model = Post
-        fields = ["id", "title", "content", "published_date", "author_name"]
+        list_serializer_class = TimedListSerializer
+        fields = ["id", "title", "content", "excerpt", "published_date", "author_name", "comment_count"]
 
 
-class PostDetailSerializer(serializers.ModelSerializer):
+class PostExportSerializer(PostListSerializer):
+    # Every comment, oldest first; PostExportAPI only includes them on request.
+    comments = CommentSerializer(many=True, read_only=True)
+
+    class Meta(PostListSerializer.Meta):
+        fields = [*PostListSerializer.Meta.fields, "comments"]
+
+
+class HeatField(serializers.FloatField):
+    """A post's popularity now, from its ``hot_score``: publication and comments, decayed."""
+
+    def to_representation(self, value):
+        return round(2 ** (value - hot_weight(timezone.now())), 3)
+
+
+class TrendingPostSerializer(PostListSerializer):
+    heat = HeatField(source="hot_score", read_only=True)
+
+    class Meta(PostListSerializer.Meta):
+        fields = ["id", "title", "excerpt", "published_date", "author_name", "comment_count", "heat"]
+
+
+class PostDetailSerializer(TimedDataMixin, SparseFieldsMixin, serializers.ModelSerializer):
     author_name = serializers.CharField(source="author.name", read_only=True)
+    # Only the newest POST_DETAIL_COMMENT_LIMIT comments, see PostDetailAPI.
     comments = CommentSerializer(many=True, read_only=True)
 
     class Meta:
         model = Post
+        list_serializer_class = TimedListSerializer
         fields = [
             "id",
             "title",
@@ -73,6 +266,7 @@ class PostDetailSerializer(serializers.ModelSerializer):
             "author_name",
             "status",
             "active",
+            "comment_count",
             "comments",
         ]
 
@@ -87,10 +281,37 @@ class PostCreateSerializer(serializers.ModelSerializer):
         if request is None:
             raise serializers.ValidationError("Request context is missing")
         
-        if value.user != request.user:
+        if value.user_id != request.user.pk:
             raise serializers.ValidationError("You can only post as your own author profile.")
         return value
 
+    def create(self, validated_data):
+        with transaction.atomic():
+            post = super().create(validated_data)
+            if post.active:
+                counters.post_published(post)
+        return post
+
+
+class PostBulkCreateSerializer(PostCreateSerializer):
+    author = BatchedPrimaryKeyRelatedField(queryset=Author.objects.all())
+
+    class Meta(PostCreateSerializer.Meta):
+        fields = ["id", *PostCreateSerializer.Meta.fields]
+        list_serializer_class = BulkCreateListSerializer
+
+    def bulk_create(self, validated_data):
+        posts = [Post(**item) for item in validated_data]
+        for post in posts:
+            # bulk_create skips Post.save().
+            post.excerpt = make_excerpt(post.content)
+            post.hot_score = hot_weight(post.published_date)
+        with transaction.atomic():
+            Post.objects.bulk_create(posts)
+            counters.posts_published([post for post in posts if post.active])
+            signals.posts_bulk_created(posts)
+        return posts
+
 
 class PostEditSerializer(serializers.ModelSerializer):
     class Meta:
@@ -108,3 +329,14 @@ class PostEditSerializer(serializers.ModelSerializer):
         if self.instance.author.user != request.user:
             raise serializers.ValidationError("You can only edit your own posts.")
         return data
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            # The locked row's state, not the possibly stale instance's, decides what changed.
+            was_active = Post.objects.select_for_update().values_list("active", flat=True).get(pk=instance.pk)
+            post = super().update(instance, validated_data)
+            if post.active and not was_active:
+                counters.post_published(post)
+            elif was_active and not post.active:
+                counters.post_withdrawn(post)
+        return post
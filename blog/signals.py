@@ -0,0 +1,98 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.pagination import invalidate_counts
+from .cache import POST_DETAIL_SCOPE, POST_LIST_SCOPE, forget_trending, invalidate_scopes, post_scope
+from .models import Author, Comment, Post
+from .timeline import forget_timeline, warm_timeline
+
+
+def on_commit_too(func, *args):
+    """
+    Run now and again once the transaction commits, so a reader that cached
+    the pre-commit state in between doesn't outlive the write.
+    """
+    func(*args)
+    transaction.on_commit(lambda: func(*args))
+
+
+def timeline_changed(author_id):
+    # Rebuilt only from committed rows, so a rollback can't leave uncommitted ids cached.
+    forget_timeline(author_id)
+    transaction.on_commit(lambda: warm_timeline(author_id))
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Author)
+def invalidate_post_counts(sender, **kwargs):
+    # Author names feed the author_name filter and search, so they affect post counts too.
+    on_commit_too(invalidate_counts, Post)
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Author)
+def invalidate_author_counts(sender, **kwargs):
+    # Post writes move Author.post_count/last_published_date, which the author filters read.
+    on_commit_too(invalidate_counts, Author)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_comment_counts(sender, **kwargs):
+    # Comment writes move Post.comment_count, which ?min_comments= filters on.
+    on_commit_too(invalidate_counts, Post)
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_post_responses(sender, instance, **kwargs):
+    on_commit_too(invalidate_scopes, POST_LIST_SCOPE, post_scope(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_post_comment_responses(sender, instance, **kwargs):
+    # The list renders (and orders by) Post.comment_count.
+    on_commit_too(invalidate_scopes, POST_LIST_SCOPE, post_scope(instance.post_id))
+
+
+@receiver([post_save, post_delete], sender=Author)
+def invalidate_author_post_responses(sender, **kwargs):
+    # author_name is rendered on every post, so drop all cached post responses.
+    on_commit_too(invalidate_scopes, POST_LIST_SCOPE, POST_DETAIL_SCOPE)
+    on_commit_too(forget_trending)
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_trending(sender, instance, **kwargs):
+    # An edited or withdrawn post leaves the list at once; new posts enter it on the next refresh.
+    on_commit_too(forget_trending, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Post)
+def refresh_author_timeline(sender, instance, **kwargs):
+    # A post moved to another author leaves the timeline of the one it was loaded with.
+    previous = getattr(instance, "_loaded_author_id", None)
+    for author_id in {instance.author_id, previous} - {None}:
+        timeline_changed(author_id)
+    instance._loaded_author_id = instance.author_id
+
+
+@receiver(post_delete, sender=Author)
+def forget_author_timeline(sender, instance, **kwargs):
+    # After the rebuilds queued by the cascade-deleted posts.
+    on_commit_too(forget_timeline, instance.pk)
+
+
+# bulk_create sends no signals; these do what the receivers above would, once per batch.
+
+def posts_bulk_created(posts):
+    # New posts have no cached detail responses yet.
+    on_commit_too(invalidate_counts, Post)
+    on_commit_too(invalidate_counts, Author)
+    on_commit_too(invalidate_scopes, POST_LIST_SCOPE)
+    for author_id in {post.author_id for post in posts}:
+        timeline_changed(author_id)
+
+
+def comments_bulk_created(comments):
+    on_commit_too(invalidate_counts, Post)
+    on_commit_too(invalidate_scopes, POST_LIST_SCOPE, *{post_scope(comment.post_id) for comment in comments})
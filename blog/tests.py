@@ -1,12 +1,26 @@
 import pytest
+import math
+from unittest import mock
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 from django.utils import timezone
+from blog.cache import POST_LIST_SCOPE, generation_key
 from blog.models import Author, Post, Comment
+from blog.counters import reconcile_counters
+from core.authentication import user_cache
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Cached counts/responses/users outlive the per-test database rollback.
+    cache.clear()
+    user_cache.clear()
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -195,3 +209,1407 @@ def test_delete_post_wrong_user(jwt_client, author2, post):
 
     response = jwt_client.delete(f"/api/posts/{post.id}/delete/")
     assert response.status_code == 403, "Should not allow deleting another user's post"
+
+
+# Query count regressions
+
+def make_posts(author, count, **kwargs):
+    return [
+        Post.objects.create(
+            title=f"Bulk Post {i}",
+            content=f"Bulk Content {i}",
+            author=author,
+            status="published",
+            active=True,
+            **kwargs,
+        )
+        for i in range(count)
+    ]
+
+def capture_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200, f"GET {url} did not return 200 OK"
+    return [q["sql"] for q in ctx.captured_queries]
+
+def count_queries(client, url):
+    return len(capture_queries(client, url))
+
+@pytest.mark.django_db
+def test_post_list_query_count_is_constant(api_client, author, author2):
+    make_posts(author, 3)
+    small = count_queries(api_client, "/api/posts/?page_size=100&count=false")
+    make_posts(author2, 40)
+    large = count_queries(api_client, "/api/posts/?page_size=100&count=false")
+    assert small == large == 2, "Post list should run the ETag lookup and a single select"
+
+@pytest.mark.django_db
+def test_post_detail_query_count_is_constant(api_client, post, user, user2):
+    Comment.objects.create(post=post, content="First", user=user)
+    small = count_queries(api_client, f"/api/posts/{post.id}/")
+    for i in range(25):
+        Comment.objects.create(post=post, content=f"Comment {i}", user=user2 if i % 2 else None)
+    large = count_queries(api_client, f"/api/posts/{post.id}/")
+    assert small == large == 3, "Post detail should run the ETag lookup and fetch the post and its comments once"
+
+@pytest.mark.django_db
+def test_author_list_query_count_is_constant(api_client, user):
+    user.is_staff = True
+    user.save()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+    Author.objects.create(name="Solo", email="solo@example.com", user=user)
+    api_client.get("/api/authors/?count=false")  # caches the authenticated user
+    small = count_queries(api_client, "/api/authors/?count=false")
+    for i in range(15):
+        owner = User.objects.create_user(username=f"owner{i}", password="pass1234")
+        Author.objects.create(name=f"Author {i}", email=f"a{i}@example.com", user=owner)
+    large = count_queries(api_client, "/api/authors/?count=false")
+    assert small == large, "Author list query count should not grow with authors"
+
+
+# Full-text search
+
+def search_ids(client, query):
+    response = client.get("/api/posts/", {"search": query})
+    assert response.status_code == 200, f"Search for {query!r} did not return 200 OK"
+    return [p["id"] for p in response.json()["results"]]
+
+@pytest.mark.django_db
+def test_search_ranks_title_above_author_above_content(api_client, author):
+    pythonista = Author.objects.create(name="Python Weekly", email="weekly@example.com")
+    in_content = Post.objects.create(title="Misc", content="notes about python", author=author, active=True)
+    in_author = Post.objects.create(title="Roundup", content="nothing here", author=pythonista, active=True)
+    in_title = Post.objects.create(title="Python tips", content="nothing here", author=author, active=True)
+    Post.objects.create(title="Unrelated", content="golang", author=author, active=True)
+    assert search_ids(api_client, "python") == [in_title.id, in_author.id, in_content.id], "Search results not ranked by field weight"
+
+@pytest.mark.django_db
+def test_search_matches_prefixes_and_all_terms(api_client, author):
+    match = Post.objects.create(title="Django deployment guide", content="gunicorn and nginx", author=author, active=True)
+    Post.objects.create(title="Django models", content="fields", author=author, active=True)
+    assert search_ids(api_client, "djan deploy") == [match.id], "Prefix search should require every term"
+    assert search_ids(api_client, "!!!") != [], "Search without word tokens should not filter everything out"
+
+@pytest.mark.django_db
+def test_search_vector_follows_author_rename(api_client, post, author):
+    assert search_ids(api_client, "Zebediah") == []
+    author.name = "Zebediah"
+    author.save()
+    assert search_ids(api_client, "Zebediah") == [post.id], "Renaming an author should refresh their posts' search vectors"
+
+@pytest.mark.django_db
+def test_search_respects_explicit_ordering(api_client, author):
+    old = Post.objects.create(title="Cooking pasta", content="", author=author, active=True,
+                              published_date=timezone.now() - timedelta(days=3))
+    new = Post.objects.create(title="Pasta", content="pasta pasta", author=author, active=True)
+    response = api_client.get("/api/posts/", {"search": "pasta", "ordering": "published_date"})
+    assert [p["id"] for p in response.json()["results"]] == [old.id, new.id], "Explicit ordering should win over rank"
+
+
+# Keyset pagination
+
+def walk_cursor(client, url):
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, f"Cursor page {url} did not return 200 OK"
+        data = response.json()
+        assert "total_count" not in data, "Cursor pages should not count the whole table"
+        pages.append([p["id"] for p in data["results"]])
+        url = data["next"]
+    return pages
+
+@pytest.mark.django_db
+def test_post_cursor_pagination_walks_every_post_once(api_client, author):
+    same_time = timezone.now()
+    posts = make_posts(author, 7, published_date=same_time)
+    pages = walk_cursor(api_client, "/api/posts/?cursor=&page_size=3")
+    assert [len(page) for page in pages] == [3, 3, 1], "Unexpected cursor page sizes"
+    ids = [pk for page in pages for pk in page]
+    assert ids == sorted((p.id for p in posts), reverse=True), "Ties on published_date should break on -id"
+
+@pytest.mark.django_db
+def test_post_cursor_pagination_is_stable_under_inserts(api_client, author):
+    make_posts(author, 4)
+    first = api_client.get("/api/posts/?cursor=&page_size=2").json()
+    Post.objects.create(title="Breaking", content="news", author=author, active=True)
+    second = api_client.get(first["next"]).json()
+    seen = [p["id"] for p in first["results"]] + [p["id"] for p in second["results"]]
+    assert len(set(seen)) == 4, "A new post should not shift rows onto the next cursor page"
+
+    previous = api_client.get(second["previous"]).json()
+    assert [p["id"] for p in previous["results"]] == [p["id"] for p in first["results"]], "Previous link should return the prior page"
+
+@pytest.mark.django_db
+def test_post_cursor_pagination_follows_ordering_param(api_client, author):
+    for title in ["delta", "alpha", "charlie", "bravo"]:
+        Post.objects.create(title=title, content="x", author=author, active=True)
+    pages = walk_cursor(api_client, "/api/posts/?cursor=&page_size=3&ordering=title")
+    titles = [Post.objects.get(pk=pk).title for page in pages for pk in page]
+    assert titles == ["alpha", "bravo", "charlie", "delta"], "Cursor pages should follow ?ordering="
+
+@pytest.mark.django_db
+def test_author_cursor_pagination(api_client, user):
+    user.is_staff = True
+    user.save()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+    authors = [Author.objects.create(name=f"Author {i}", email=f"cursor{i}@example.com") for i in range(5)]
+    pages = walk_cursor(api_client, "/api/authors/?cursor=&page_size=2")
+    assert [pk for page in pages for pk in page] == [a.id for a in authors], "Author cursor pages should follow id order"
+
+@pytest.mark.django_db
+def test_search_cursor_pagination_walks_tied_ranks_once(api_client, author):
+    same_time = timezone.now()
+    posts = [Post.objects.create(title=f"Post {i}", content="kayak " * (1 + i % 3), author=author, active=True,
+                                 published_date=same_time) for i in range(8)]
+    pages = walk_cursor(api_client, "/api/posts/?cursor=&page_size=3&search=kayak")
+    ids = [pk for page in pages for pk in page]
+    assert sorted(ids) == sorted(p.id for p in posts), "Cursor pages over search results should return every match once"
+    repeats = {p.id: p.content.count("kayak") for p in posts}
+    assert ids == sorted(ids, key=lambda pk: (-repeats[pk], -pk)), "Cursor pages should follow rank, then -id"
+
+@pytest.mark.django_db
+def test_invalid_cursor_returns_404(api_client, post):
+    response = api_client.get("/api/posts/?cursor=not-a-cursor")
+    assert response.status_code == 404, "Garbage cursors should be rejected"
+
+
+# Pagination counts
+
+@pytest.mark.django_db
+def test_post_list_count_opt_out(api_client, author):
+    make_posts(author, 5)
+    queries = count_queries(api_client, "/api/posts/?count=false&page_size=2")
+    assert queries == 2, "count=false should skip the COUNT query"
+    data = api_client.get("/api/posts/?count=false&page_size=2").json()
+    assert "total_count" not in data and "total_pages" not in data, "count=false should omit totals"
+    assert data["next_page"] == 2 and data["current_count"] == 2, "count=false should still link the next page"
+    last = api_client.get("/api/posts/?count=false&page_size=2&page=3").json()
+    assert last["next"] is None and last["current_count"] == 1, "Last uncounted page should have no next link"
+
+@pytest.mark.django_db
+def test_post_list_count_is_cached_until_a_post_changes(api_client, author, settings):
+    settings.RESPONSE_CACHE_TIMEOUT = 0
+    make_posts(author, 3)
+    assert api_client.get("/api/posts/").json()["total_count"] == 3
+    assert not any("COUNT(*)" in sql for sql in capture_queries(api_client, "/api/posts/")), "Repeated list should reuse the cached count"
+    assert not any("COUNT(*)" in sql for sql in capture_queries(api_client, "/api/posts/?ordering=title")), "Ordering should not change the count cache key"
+    Post.objects.create(title="Fresh", content="post", author=author, active=True)
+    data = api_client.get("/api/posts/").json()
+    assert data["total_count"] == 4 and data["count_estimated"] is False, "Post writes should invalidate cached counts"
+
+@pytest.mark.django_db
+def test_author_and_comment_writes_invalidate_cached_counts(jwt_client, author, post, user, settings):
+    settings.RESPONSE_CACHE_TIMEOUT = 0
+    assert jwt_client.get("/api/authors/").json()["total_count"] == 1
+    Author.objects.create(name="Author Three", email="author3@example.com", user=user)
+    assert jwt_client.get("/api/authors/").json()["total_count"] == 2, "Author writes should invalidate author counts"
+    Author.objects.filter(name="Author Three").delete()
+    assert jwt_client.get("/api/authors/").json()["total_count"] == 1
+
+    assert jwt_client.get("/api/posts/?min_comments=1").json()["total_count"] == 0
+    assert jwt_client.post("/api/comments/create/", {"post": post.pk, "content": "First"}).status_code == 201
+    assert jwt_client.get("/api/posts/?min_comments=1").json()["total_count"] == 1, "Comments move comment_count totals"
+
+@pytest.mark.django_db
+def test_post_list_count_uses_planner_estimate_above_threshold(api_client, author, settings):
+    settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD = 0
+    make_posts(author, 3)
+    with CaptureQueriesContext(connection) as ctx:
+        data = api_client.get("/api/posts/").json()
+    assert data["count_estimated"] is True, "Large sets should report an estimated count"
+    assert not any("COUNT(*)" in q["sql"] for q in ctx.captured_queries), "Estimated counts should not run COUNT(*)"
+
+
+# Response cache
+
+@pytest.mark.django_db
+def test_post_list_is_served_from_cache(api_client, post):
+    first = api_client.get("/api/posts/?page_size=5&title=Post").json()
+    assert count_queries(api_client, "/api/posts/?title=Post&page_size=5") == 0, "Repeated list should hit the response cache"
+    assert api_client.get("/api/posts/?title=Post&page_size=5").json() == first, "Cached list should match the original"
+
+@pytest.mark.django_db
+def test_post_writes_invalidate_cached_responses(jwt_client, api_client, post, author):
+    api_client.get("/api/posts/")
+    api_client.get(f"/api/posts/{post.id}/")
+
+    created = jwt_client.post("/api/posts/create/", {"title": "Another", "content": "x", "author": author.id}, format="json")
+    assert created.json()["title"] in [p["title"] for p in api_client.get("/api/posts/").json()["results"]], "Create should invalidate the list"
+
+    jwt_client.put(f"/api/posts/{post.id}/edit/", {"title": "Renamed", "content": "x", "active": True}, format="json")
+    assert api_client.get(f"/api/posts/{post.id}/").json()["title"] == "Renamed", "Edit should invalidate the detail"
+
+    jwt_client.post("/api/comments/create/", {"post": post.id, "content": "Hi"}, format="json")
+    assert len(api_client.get(f"/api/posts/{post.id}/").json()["comments"]) == 1, "Comments should invalidate the detail"
+
+    jwt_client.delete(f"/api/posts/{post.id}/delete/")
+    assert api_client.get(f"/api/posts/{post.id}/").status_code == 404, "Soft delete should invalidate the detail"
+    assert post.id not in [p["id"] for p in api_client.get("/api/posts/").json()["results"]], "Soft delete should invalidate the list"
+
+@pytest.mark.django_db
+def test_expired_entry_is_served_stale_while_another_worker_refreshes(api_client, post, settings):
+    settings.RESPONSE_CACHE_TIMEOUT = 0
+    api_client.get(f"/api/posts/{post.id}/")
+    lock_keys = []
+    original_add = cache.add
+
+    def held_elsewhere(key, *args, **kwargs):
+        if key.endswith(":lock"):
+            lock_keys.append(key)
+            return False
+        return original_add(key, *args, **kwargs)
+
+    with mock.patch.object(cache, "add", side_effect=held_elsewhere):
+        assert count_queries(api_client, f"/api/posts/{post.id}/") == 0, "Stale entry should be served while locked"
+    assert lock_keys, "Expired entry should try to take the refresh lock"
+
+@pytest.mark.django_db
+def test_cold_key_waits_for_refreshing_worker_then_computes(api_client, post, settings):
+    settings.RESPONSE_CACHE_LOCK_WAIT = 0.1
+    original_add = cache.add
+    with mock.patch.object(cache, "add", side_effect=lambda key, *a, **kw: False if key.endswith(":lock") else original_add(key, *a, **kw)):
+        response = api_client.get(f"/api/posts/{post.id}/")
+    assert response.status_code == 200, "Waiting worker should fall back to computing the response"
+
+
+# Conditional requests
+
+@pytest.mark.django_db
+def test_post_detail_not_modified_until_comment_or_edit(api_client, post, user):
+    response = api_client.get(f"/api/posts/{post.id}/")
+    etag = response["ETag"]
+    assert response["Last-Modified"], "Post detail should send Last-Modified"
+    cache.clear()
+    assert count_queries(api_client, f"/api/posts/{post.id}/") == 3
+    cache.clear()
+    not_modified = api_client.get(f"/api/posts/{post.id}/", HTTP_IF_NONE_MATCH=etag)
+    assert not_modified.status_code == 304, "Matching If-None-Match should return 304"
+
+    Comment.objects.create(post=post, content="New", user=user)
+    assert api_client.get(f"/api/posts/{post.id}/", HTTP_IF_NONE_MATCH=etag).status_code == 200, "New comments should change the ETag"
+
+@pytest.mark.django_db
+def test_not_modified_skips_serialization_queries(api_client, post):
+    etag = api_client.get(f"/api/posts/{post.id}/")["ETag"]
+    cache.clear()
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(f"/api/posts/{post.id}/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert len(ctx.captured_queries) == 1, "A 304 should only run the validator lookup"
+
+@pytest.mark.django_db
+def test_post_list_etag_changes_with_writes_and_params(api_client, post, author):
+    etag = api_client.get("/api/posts/")["ETag"]
+    assert api_client.get("/api/posts/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert api_client.get("/api/posts/?page_size=5", HTTP_IF_NONE_MATCH=etag).status_code == 200, "ETag should depend on query params"
+    author.name = "Renamed Author"
+    author.save()
+    assert api_client.get("/api/posts/", HTTP_IF_NONE_MATCH=etag).status_code == 200, "Author writes should change the list ETag"
+
+@pytest.mark.django_db
+def test_post_list_etag_changes_when_an_older_post_is_deleted(api_client, post, author):
+    older = Post.objects.create(title="Older", content="x", author=author, active=True,
+                                published_date=timezone.now() - timedelta(days=1))
+    Post.objects.filter(pk=older.pk).update(updated=timezone.now() - timedelta(days=1))
+    etag = api_client.get("/api/posts/")["ETag"]
+    Post.objects.get(pk=older.pk).delete()
+    assert api_client.get("/api/posts/", HTTP_IF_NONE_MATCH=etag).status_code == 200, "Hard deletes should change the list ETag"
+
+@pytest.mark.django_db
+def test_post_edit_if_match(jwt_client, api_client, post):
+    etag = api_client.get(f"/api/posts/{post.id}/")["ETag"]
+    payload = {"title": "Edited", "content": "Edited", "active": True}
+    response = jwt_client.put(f"/api/posts/{post.id}/edit/", payload, format="json", HTTP_IF_MATCH=etag)
+    assert response.status_code == 200, "Matching If-Match should allow the edit"
+    assert response["ETag"] == api_client.get(f"/api/posts/{post.id}/")["ETag"], "Edit should return the new detail ETag"
+
+    stale = jwt_client.put(f"/api/posts/{post.id}/edit/", payload, format="json", HTTP_IF_MATCH=etag)
+    assert stale.status_code == 412, "A stale If-Match should be rejected"
+
+@pytest.mark.django_db
+def test_author_detail_etag_is_scoped_to_owner(jwt_client, author, author2):
+    etag = jwt_client.get(f"/api/authors/{author.id}/")["ETag"]
+    assert jwt_client.get(f"/api/authors/{author.id}/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert jwt_client.get(f"/api/authors/{author2.id}/", HTTP_IF_NONE_MATCH=etag).status_code == 403, "Other users' authors should not answer 304"
+    list_etag = jwt_client.get("/api/authors/")["ETag"]
+    assert jwt_client.get("/api/authors/", HTTP_IF_NONE_MATCH=list_etag).status_code == 304
+
+@pytest.mark.django_db
+def test_author_etags_change_when_the_username_changes(jwt_client, author, user):
+    detail_etag = jwt_client.get(f"/api/authors/{author.id}/")["ETag"]
+    list_etag = jwt_client.get("/api/authors/")["ETag"]
+    user.username = "renamed"
+    user.save()
+    assert jwt_client.get(f"/api/authors/{author.id}/", HTTP_IF_NONE_MATCH=detail_etag).status_code == 200
+    response = jwt_client.get("/api/authors/", HTTP_IF_NONE_MATCH=list_etag)
+    assert response.status_code == 200, "A username change should change the author list ETag"
+
+
+# Fast read path
+
+@pytest.fixture
+def tricky_posts(author, user):
+    posts = [
+        Post.objects.create(title="Ünïcødé ✓\u2028line", content='quotes " and \\ slashes\n', author=author, active=True),
+        Post.objects.create(title="Plain", content="x", author=author, active=True,
+                            published_date=timezone.now() - timedelta(days=1, microseconds=123)),
+    ]
+    Comment.objects.create(post=posts[0], content="by user", user=user)
+    Comment.objects.create(post=posts[0], content="anonymous\u2029", user=None)
+    return posts
+
+def render_both(client, url, settings):
+    settings.FAST_SERIALIZATION = False
+    cache.clear()
+    slow = client.get(url, HTTP_ACCEPT="application/json")
+    settings.FAST_SERIALIZATION = True
+    cache.clear()
+    fast = client.get(url, HTTP_ACCEPT="application/json")
+    assert slow.status_code == fast.status_code == 200, f"GET {url} failed"
+    return slow.content, fast.content
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", ["", "?page_size=1&page=2", "?cursor=&page_size=1", "?search=plain", "?ordering=title",
+                                   "?fields=id,excerpt", "?exclude=content&ordering=author__name"])
+def test_fast_post_list_is_byte_identical(api_client, tricky_posts, settings, query):
+    slow, fast = render_both(api_client, f"/api/posts/{query}", settings)
+    assert slow == fast, "Fast list output should match the ModelSerializer output byte for byte"
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", ["", "?fields=title,comments", "?exclude=comments"])
+def test_fast_post_detail_is_byte_identical(api_client, tricky_posts, settings, query):
+    slow, fast = render_both(api_client, f"/api/posts/{tricky_posts[0].id}/{query}", settings)
+    assert slow == fast, "Fast detail output should match the ModelSerializer output byte for byte"
+
+def test_fast_renderer_matches_json_renderer():
+    from decimal import Decimal
+    from rest_framework.renderers import JSONRenderer
+    from core.renderers import FastJSONRenderer
+
+    data = {"s": "é\u2028\u2029\x01 </script>", "n": [1, 2**40, None, True], "d": Decimal("1.50"),
+            "t": timezone.now(), "big": 2**70}
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data), "Renderer output should be byte-identical"
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("fast", [True, False])
+def test_post_list_sparse_fields_prune_columns(api_client, post, settings, fast):
+    settings.FAST_SERIALIZATION = fast
+    response = api_client.get("/api/posts/?fields=id,title,excerpt")
+    assert response.json()["results"] == [{"id": post.id, "title": "Post 1", "excerpt": "Content 1"}]
+    queries = capture_queries(api_client, "/api/posts/?exclude=content&count=false&page=1")
+    select = queries[-1]
+    assert '"blog_post"."content"' not in select, "Excluded content should not be read from the database"
+    assert '"blog_post"."excerpt"' in select, "Remaining fields should still be selected"
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("fast", [True, False])
+def test_post_detail_sparse_fields_skip_comments(api_client, post, user, settings, fast):
+    settings.FAST_SERIALIZATION = fast
+    Comment.objects.create(post=post, content="First", user=user)
+    url = f"/api/posts/{post.id}/?fields=id,title"
+    assert api_client.get(url).json() == {"id": post.id, "title": "Post 1"}
+    cache.clear()
+    assert count_queries(api_client, url) == 2, "Unselected comments should not be prefetched"
+
+@pytest.mark.django_db
+def test_author_sparse_fields(jwt_client, author):
+    response = jwt_client.get(f"/api/authors/{author.id}/?exclude=email,user,post_count,last_published_date")
+    assert response.status_code == 200, "Author detail with a sparse fieldset failed"
+    assert response.json() == {"id": author.id, "name": "Author One"}
+    response = jwt_client.get("/api/authors/?fields=name&count=false")
+    assert response.json()["results"] == [{"name": "Author One"}]
+
+@pytest.mark.django_db
+def test_post_excerpt_follows_content(jwt_client, post):
+    assert post.excerpt == "Content 1"
+    payload = {"title": "Edited", "content": "word " * 100, "active": True}
+    response = jwt_client.put(f"/api/posts/{post.id}/edit/", payload, format="json")
+    assert response.status_code == 200, "Failed to edit post as author"
+    post.refresh_from_db()
+    assert len(post.excerpt) <= 200 and post.excerpt.endswith("…"), "Long content should be truncated"
+    assert post.excerpt.startswith("word word"), "Excerpt should collapse whitespace"
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("fast", [True, False])
+def test_post_detail_embeds_latest_comments_and_count(api_client, post, user, settings, fast):
+    settings.FAST_SERIALIZATION = fast
+    settings.POST_DETAIL_COMMENT_LIMIT = 3
+    now = timezone.now()
+    comments = [
+        Comment.objects.create(post=post, content=f"Comment {i}", user=user, created=now - timedelta(minutes=i))
+        for i in range(5)
+    ]
+    reconcile_counters()
+    data = api_client.get(f"/api/posts/{post.id}/").json()
+    assert data["comment_count"] == 5
+    assert [c["id"] for c in data["comments"]] == [c.id for c in comments[:3]], "Only the newest comments should be embedded"
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("fast", [True, False])
+def test_post_comments_endpoint_pages_newest_first(api_client, post, user, user2, settings, fast):
+    settings.FAST_SERIALIZATION = fast
+    now = timezone.now()
+    for i in range(7):
+        Comment.objects.create(post=post, content=f"Comment {i}", user=user if i % 2 else None,
+                               created=now - timedelta(minutes=i // 2))
+    Comment.objects.create(post=Post.objects.create(title="Other", content="x", author=post.author), content="elsewhere")
+    url = f"/api/posts/{post.id}/comments/?page_size=3"
+    ids = [pk for page in walk_cursor(api_client, url) for pk in page]
+    expected = list(post.comments.order_by("-created", "-id").values_list("id", flat=True))
+    assert ids == expected, "Comments should be paged newest first, each exactly once"
+    small = count_queries(api_client, url)
+    for i in range(20):
+        Comment.objects.create(post=post, content=f"More {i}", user=user2)
+    assert count_queries(api_client, url) == small == 2, "Comment pages should check the post and run one select"
+
+@pytest.mark.django_db
+def test_post_comments_endpoint_hides_inactive_posts(api_client, inactive_post):
+    Comment.objects.create(post=inactive_post, content="hidden")
+    assert api_client.get(f"/api/posts/{inactive_post.id}/comments/").status_code == 404
+
+# Denormalized counters
+
+@pytest.mark.django_db
+def test_counters_follow_api_writes(jwt_client, author):
+    published = timezone.now() - timedelta(days=2)
+    payload = {"title": "Counted", "content": "x", "published_date": published.isoformat(), "author": author.id}
+    newer = {**payload, "title": "Newer", "published_date": timezone.now().isoformat()}
+    for data in (payload, newer):
+        assert jwt_client.post("/api/posts/create/", data, format="json").status_code == 201
+    post_id, newer_id = Post.objects.get(title="Counted").id, Post.objects.get(title="Newer").id
+    author.refresh_from_db()
+    assert author.post_count == 2
+    assert author.last_published_date == datetime.fromisoformat(newer["published_date"])
+
+    for i in range(3):
+        assert jwt_client.post("/api/comments/create/", {"post": post_id, "content": f"c{i}"}, format="json").status_code == 201
+    assert Post.objects.get(pk=post_id).comment_count == 3
+
+    assert jwt_client.delete(f"/api/posts/{newer_id}/delete/").status_code == 204
+    assert jwt_client.delete(f"/api/posts/{newer_id}/delete/").status_code == 204
+    author.refresh_from_db()
+    assert (author.post_count, author.last_published_date) == (1, published), "Deleting twice should only count once"
+
+    edit = {"title": "Counted", "content": "x", "active": False}
+    assert jwt_client.put(f"/api/posts/{post_id}/edit/", edit, format="json").status_code == 200
+    author.refresh_from_db()
+    assert (author.post_count, author.last_published_date) == (0, None)
+    assert reconcile_counters() == (0, 0), "API writes should leave nothing to reconcile"
+
+@pytest.mark.django_db
+def test_stale_instance_save_keeps_counters(jwt_client, post):
+    stale = Post.objects.get(pk=post.pk)
+    jwt_client.post("/api/comments/create/", {"post": post.id, "content": "hi"}, format="json")
+    stale.title = "Renamed"
+    stale.save()
+    post.refresh_from_db()
+    assert (post.title, post.comment_count) == ("Renamed", 1), "A full save should not write back a stale counter"
+
+@pytest.mark.django_db
+def test_withdrawing_from_stale_instances_counts_once(post, author, user):
+    from blog.serializers import PostEditSerializer
+    from blog.views import PostDeleteAPI
+
+    Author.objects.filter(pk=author.pk).update(post_count=2)
+    request = mock.Mock(user=user)
+    stale = [Post.objects.select_related("author__user").get(pk=post.pk) for _ in range(3)]
+    view = PostDeleteAPI()
+    view.request = request
+    view.perform_destroy(stale[0])
+    view.perform_destroy(stale[1])
+    edit = PostEditSerializer(stale[2], data={"active": False}, partial=True, context={"request": request})
+    assert edit.is_valid(), edit.errors
+    edit.save()
+    author.refresh_from_db()
+    assert author.post_count == 1, "Racing withdrawals of one post should decrement once"
+
+    edit = PostEditSerializer(stale[2], data={"active": True}, partial=True, context={"request": request})
+    assert edit.is_valid(), edit.errors
+    edit.save()
+    author.refresh_from_db()
+    assert author.post_count == 2
+
+@pytest.mark.django_db
+def test_reconcile_counters_command_fixes_drift(post, author, user):
+    from io import StringIO
+    from django.core.management import call_command
+
+    Comment.objects.create(post=post, content="direct", user=user)
+    Post.objects.filter(pk=post.pk).update(comment_count=7)
+    out = StringIO()
+    call_command("reconcile_counters", "--batch-size", "1", stdout=out)
+    post.refresh_from_db()
+    author.refresh_from_db()
+    assert post.comment_count == 1
+    assert (author.post_count, author.last_published_date) == (1, post.published_date)
+    assert "1 posts and 1 authors" in out.getvalue()
+
+@pytest.mark.django_db
+def test_lists_order_and_filter_on_counters(api_client, author, user):
+    posts = make_posts(author, 3)
+    for i, post in enumerate(posts):
+        for _ in range(i):
+            Comment.objects.create(post=post, content="c", user=user)
+    reconcile_counters()
+    data = api_client.get("/api/posts/?ordering=-comment_count&min_comments=1&count=false").json()
+    assert [(p["id"], p["comment_count"]) for p in data["results"]] == [(posts[2].id, 2), (posts[1].id, 1)]
+
+@pytest.mark.django_db
+def test_author_cursor_pagination_orders_nulls_last(api_client, user):
+    user.is_staff = True
+    user.save()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+    now = timezone.now()
+    for i in range(6):
+        owner = User.objects.create_user(username=f"writer{i}", password="pass1234")
+        author = Author.objects.create(name=f"Writer {i}", email=f"w{i}@example.com", user=owner)
+        if i % 2:
+            Post.objects.create(title="p", content="x", author=author, published_date=now - timedelta(days=i))
+    reconcile_counters()
+    for ordering in ["last_published_date", "-last_published_date"]:
+        expected = list(
+            Author.objects.order_by(ordering, "-id" if ordering.startswith("-") else "id").values_list("id", flat=True)
+        )
+        pages = walk_cursor(api_client, f"/api/authors/?cursor=&page_size=2&ordering={ordering}")
+        assert [pk for page in pages for pk in page] == expected, f"Cursor pages should cover every author once ({ordering})"
+
+# Cached JWT authentication
+
+@pytest.mark.django_db
+def test_jwt_auth_reads_user_once(jwt_client, author):
+    url = f"/api/authors/{author.id}/"
+    first = capture_queries(jwt_client, url)
+    assert any('"auth_user"' in sql for sql in first), "The first request should load the user"
+    again = capture_queries(jwt_client, url)
+    assert not any('FROM "auth_user"' in sql for sql in again), "Later requests should not select the user"
+    assert len(again) == len(first) - 1
+
+@pytest.mark.django_db
+def test_jwt_auth_rejects_deactivated_user(jwt_client, user, author):
+    assert jwt_client.get(f"/api/authors/{author.id}/").status_code == 200
+    user.is_active = False
+    user.save()
+    assert jwt_client.get(f"/api/authors/{author.id}/").status_code == 401, "Deactivation should evict the cached user"
+
+@pytest.mark.django_db
+def test_jwt_user_cache_is_bounded_and_expires(settings):
+    from core.authentication import UserCache
+
+    settings.AUTH_USER_CACHE_MAX_ENTRIES = 2
+    users = UserCache()
+    for user_id in (1, 2, 3):
+        users.set(user_id, f"user{user_id}")
+    assert users.get(1) is None and users.get(3) == "user3", "Oldest entry should be evicted"
+    settings.AUTH_USER_CACHE_TIMEOUT = 0
+    users.set(4, "user4")
+    assert users.get(4) is None, "Expired entries should not be returned"
+
+# Bulk seeding
+
+@pytest.mark.django_db
+def test_bulk_seed_creates_consistent_data(author):
+    from io import StringIO
+    from django.core.management import call_command
+
+    out = StringIO()
+    call_command("bulk_seed", users=4, authors=3, posts=25, comments=60, block_size=10,
+                 author_skew=1.2, post_skew=1.2, seed=3, stdout=out)
+    assert "total" in out.getvalue() and "rows/s" in out.getvalue()
+    seeded = Post.objects.exclude(author=author)
+    assert seeded.count() == 25
+    assert Comment.objects.count() == 60
+    assert User.objects.filter(username__startswith="seed_user").count() == 4
+    assert reconcile_counters() == (0, 0), "Seeding should leave the counters reconciled"
+    assert all(p.search_vector for p in seeded), "The search trigger should fill seeded posts"
+    assert Post.objects.create(title="after", content="x", author=author).pk > max(seeded.values_list("id", flat=True))
+
+def test_bulk_seed_blocks_are_deterministic():
+    from blog.seeding import SeedPlan, block_rng, comment_rows
+
+    now = timezone.now()
+    counts = {"users": 5, "authors": 5, "posts": 50, "comments": 100}
+    plans = [SeedPlan(11, counts, dict.fromkeys(counts, 1), post_skew=1.0, now=now) for _ in range(2)]
+    first, second = (list(comment_rows(plan, 40, 20, block_rng(plan, "comments", 40))) for plan in plans)
+    assert first == second, "A block should only depend on the seed and its position"
+
+# API benchmark suite
+
+def test_bench_api_covers_every_route():
+    from blog import urls
+    from blog.management.commands.bench_api import ENDPOINTS
+
+    routes = {pattern.name for pattern in urls.urlpatterns} | {"token_obtain_pair", "token_refresh"}
+    assert routes <= {endpoint.url_name for endpoint in ENDPOINTS}, "Every API route should be benchmarked"
+
+@pytest.mark.django_db
+def test_bench_api_reports_json(post):
+    import json
+    from io import StringIO
+    from django.core.management import call_command
+
+    out = StringIO()
+    call_command("bench_api", "--repeat", "2", "--json", stdout=out)
+    report = json.loads(out.getvalue())
+    assert report["meta"]["rows"]["posts"] == 1, "Benchmark rows should be rolled back"
+    assert {"p50_ms", "p95_ms", "p99_ms", "queries_per_request", "requests_per_s"} <= set(report["results"][0])
+
+# Server-Timing instrumentation
+
+@pytest.mark.django_db
+def test_server_timing_header_and_log(api_client, post, settings, caplog):
+    import json
+
+    settings.SERVER_TIMING_SAMPLE_RATE = 1.0
+    with caplog.at_level("INFO", logger="core.timing"), CaptureQueriesContext(connection) as ctx:
+        response = api_client.get("/api/posts/")
+    header = response.headers["Server-Timing"]
+    for name in ("db", "view", "serialize", "render", "total"):
+        assert f"{name};dur=" in header, f"Server-Timing should include {name}"
+    assert f'desc="{len(ctx.captured_queries)} queries' in header, "Every statement should be counted"
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["path"] == "/api/posts/" and record["queries"] == len(ctx.captured_queries)
+    assert "serialize_ms" in record
+
+    settings.FAST_SERIALIZATION = False
+    for url in ("/api/posts/?ordering=title", f"/api/posts/{post.pk}/"):
+        assert "serialize;dur=" in api_client.get(url).headers["Server-Timing"], "DRF serializers are timed too"
+
+@pytest.mark.django_db
+def test_server_timing_unsampled(api_client, post, settings):
+    settings.SERVER_TIMING_SAMPLE_RATE = 0
+    assert "Server-Timing" not in api_client.get("/api/posts/").headers
+
+@pytest.mark.django_db
+def test_server_timing_detects_duplicate_queries(post):
+    from core.timing import RequestTimer
+
+    timer = RequestTimer()
+    with connection.execute_wrapper(timer):
+        for pk in (post.pk, post.pk, post.pk + 1):
+            list(Post.objects.filter(pk=pk))
+    assert timer.query_count == 3
+    assert timer.duplicate_count == 1, "Only the identical statement should count as a duplicate"
+    assert [n for _, n in timer.repeated_statements(3)] == [3], "Same SQL with other params is a repeat"
+
+# Prometheus metrics
+
+@pytest.mark.django_db
+def test_metrics_count_requests_by_view(api_client, post, settings):
+    from prometheus_client import REGISTRY
+
+    settings.METRICS_TOKEN = "secret"
+
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    labels = {"view": "api_post_list", "method": "GET", "status": "200"}
+    before = sample("api_requests_total", **labels)
+    misses = sample("api_response_cache_total", view="api_post_list", result="miss")
+    hits = sample("api_response_cache_total", view="api_post_list", result="hit")
+    api_client.get("/api/posts/")
+    api_client.get("/api/posts/")
+    assert sample("api_requests_total", **labels) == before + 2
+    assert sample("api_response_cache_total", view="api_post_list", result="miss") == misses + 1
+    assert sample("api_response_cache_total", view="api_post_list", result="hit") == hits + 1
+    assert sample("api_request_queries_count", view="api_post_list") >= 2
+
+    body = api_client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret").content.decode()
+    assert 'api_request_duration_seconds_bucket{le="0.005",method="GET",view="api_post_list"}' in body
+
+@pytest.mark.django_db
+def test_metrics_token(api_client, settings):
+    settings.METRICS_TOKEN = "secret"
+    assert api_client.get("/metrics").status_code == 403
+    assert api_client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret").status_code == 200
+
+    settings.METRICS_TOKEN = ""
+    settings.DEBUG = False
+    assert api_client.get("/metrics").status_code == 403, "No token means no public metrics"
+    settings.DEBUG = True
+    assert api_client.get("/metrics").status_code == 200, "Local runserver scrapes work without a token"
+    assert api_client.get("/metrics", REMOTE_ADDR="203.0.113.5").status_code == 403
+
+# Async read views (ASGI)
+
+@pytest.fixture
+def async_get(settings):
+    from asgiref.sync import async_to_sync
+    from django.test import AsyncClient
+
+    settings.ROOT_URLCONF = "core.asgi_urls"
+    client = AsyncClient()
+
+    async def fetch(path, headers):
+        return await client.get(path, headers=headers)
+
+    def get(path, **extra):
+        # AsyncClient takes headers by name, not as HTTP_* META keys.
+        headers = {key[5:].replace("_", "-"): value for key, value in extra.items()}
+        return async_to_sync(fetch)(path, headers)
+    return get
+
+@pytest.mark.django_db(transaction=True)
+def test_async_views_match_sync_views(async_get, api_client, post, jwt_token):
+    Comment.objects.create(post=post, content="Hi", user=post.author.user)
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {jwt_token}"}
+    for path, headers in [
+        ("/api/posts/?ordering=title", {}),
+        ("/api/posts/?cursor=&fields=id,title", {}),
+        (f"/api/posts/{post.pk}/", {}),
+        ("/api/authors/", auth),
+    ]:
+        cache.clear()
+        response = async_get(path, **headers)
+        # Drop the cached response but keep the list generation, which is part of the ETag.
+        generation = cache.get(generation_key(POST_LIST_SCOPE))
+        cache.clear()
+        cache.set(generation_key(POST_LIST_SCOPE), generation, None)
+        expected = api_client.get(path, **headers)
+        assert response.status_code == expected.status_code == 200, path
+        assert response.json() == expected.json(), f"{path} should render the same over ASGI"
+        assert response.headers["ETag"] == expected.headers["ETag"], path
+
+@pytest.mark.django_db(transaction=True)
+def test_async_views_errors_and_preconditions(async_get, post, inactive_post):
+    assert async_get(f"/api/posts/{inactive_post.pk}/").status_code == 404
+    assert async_get("/api/authors/").status_code == 401, "Author list still requires a JWT"
+    assert async_get("/api/authors/", HTTP_AUTHORIZATION="Bearer bogus").status_code == 401
+    etag = async_get(f"/api/posts/{post.pk}/").headers["ETag"]
+    assert async_get(f"/api/posts/{post.pk}/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert async_get("/api/posts/", HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+# Read replicas
+
+@pytest.fixture
+def replica(settings):
+    from django.db import connections
+    from core.routers import replica_health
+
+    # A second connection to the test database stands in for a replica.
+    connections.settings["replica"] = dict(connections["default"].settings_dict)
+    settings.REPLICA_DATABASES = ["replica"]
+    replica_health.clear()
+    yield "replica"
+    connections["replica"].close()
+    del connections["replica"]
+    del connections.settings["replica"]
+    replica_health.clear()
+
+def queries_on(alias):
+    from django.db import connections
+    return CaptureQueriesContext(connections[alias])
+
+@pytest.mark.django_db(transaction=True)
+def test_replica_serves_reads_until_client_writes(replica, api_client, post, jwt_token):
+    with queries_on("default") as primary, queries_on(replica) as secondary:
+        assert api_client.get(f"/api/posts/{post.pk}/comments/").status_code == 200
+    assert secondary.captured_queries and not primary.captured_queries, "Safe requests should read from the replica"
+
+    response = api_client.post("/api/comments/create/", {"post": post.pk, "content": "Mine"}, format="json")
+    assert response.status_code == 201 and "replica_pin" in response.cookies
+    with queries_on("default") as primary, queries_on(replica) as secondary:
+        assert api_client.get(f"/api/posts/{post.pk}/").json()["comment_count"] == 1
+    assert primary.captured_queries and not secondary.captured_queries, "A writer should read its own writes"
+
+@pytest.mark.django_db(transaction=True)
+def test_replica_pin_follows_jwt_without_cookies(replica, post, jwt_token):
+    writer, reader = APIClient(), APIClient()
+    for client in (writer, reader):
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {jwt_token}")
+    response = writer.put(f"/api/posts/{post.pk}/edit/", {"title": "New", "content": "C", "active": True}, format="json")
+    assert response.status_code == 200
+    with queries_on(replica) as secondary:
+        assert reader.get(f"/api/posts/{post.pk}/").json()["title"] == "New"
+    assert not secondary.captured_queries, "The same token should stay pinned to the primary"
+
+@pytest.mark.django_db(transaction=True)
+def test_unavailable_replica_falls_back_to_primary(replica, api_client, post):
+    from django.db import connections
+    from core.routers import replica_health
+
+    connections.settings[replica]["PORT"] = "1"
+    connections[replica].settings_dict["PORT"] = "1"
+    assert api_client.get(f"/api/posts/{post.pk}/comments/").status_code == 200
+    assert replica_health.is_down(replica), "A failed replica should be skipped for a while"
+
+@pytest.mark.django_db(transaction=True)
+def test_shared_caches_are_filled_from_the_primary_and_skipped_when_pinned(replica, api_client, post, jwt_token):
+    def blog_reads(ctx):
+        return [query["sql"] for query in ctx.captured_queries if "blog_" in query["sql"]]
+
+    writer = APIClient()
+    writer.credentials(HTTP_AUTHORIZATION=f"Bearer {jwt_token}")
+    for url in ("/api/posts/", f"/api/posts/{post.pk}/", "/api/posts/trending/", f"/api/authors/{post.author_id}/posts/"):
+        assert writer.get(url).status_code == 200
+    assert writer.post("/api/comments/create/", {"post": post.pk, "content": "Mine"}, format="json").status_code == 201
+
+    # Another client refills the caches after the write: from the primary, never a (possibly lagging) replica.
+    with queries_on(replica) as secondary:
+        assert api_client.get("/api/posts/").json()["results"][0]["comment_count"] == 1
+        assert api_client.get(f"/api/posts/{post.pk}/").json()["comment_count"] == 1
+        assert api_client.get("/api/posts/trending/").status_code == 200
+    assert not blog_reads(secondary), "Shared caches must not be filled from a replica"
+
+    # The pinned writer reads its own write from the primary even though the entries are now cached.
+    with queries_on("default") as primary:
+        assert writer.get("/api/posts/").json()["results"][0]["comment_count"] == 1
+    assert blog_reads(primary), "Pinned clients skip the shared response cache"
+
+# Connection pooling
+
+@pytest.fixture
+def pooled():
+    from django.db import connections
+    from core.db_pool.base import close_pools
+
+    # A pooled alias for the test database, with one connection to make waiting easy to hit.
+    connections.settings["pooled"] = {
+        **connections["default"].settings_dict,
+        "ENGINE": "core.db_pool",
+        "CONN_MAX_AGE": 0,
+        "POOL": {"MAX_SIZE": 1, "TIMEOUT": 0.2, "CHECK_IDLE": 60},
+    }
+    yield connections["pooled"]
+    connections["pooled"].close()
+    close_pools()
+    del connections["pooled"]
+    del connections.settings["pooled"]
+
+def backend_pid(wrapper):
+    with wrapper.cursor() as cursor:
+        cursor.execute("SELECT pg_backend_pid()")
+        return cursor.fetchone()[0]
+
+@pytest.mark.django_db(transaction=True)
+def test_pool_reuses_connections_and_waits_when_full(pooled):
+    import threading
+    from django.db import OperationalError
+    from prometheus_client import REGISTRY
+
+    opened = REGISTRY.get_sample_value("api_db_connections_opened_total", {"alias": "pooled"}) or 0
+    first = backend_pid(pooled)
+    pooled.close()
+    assert backend_pid(pooled) == first, "A closed connection should go back to the pool and be reused"
+    assert REGISTRY.get_sample_value("api_db_connections_opened_total", {"alias": "pooled"}) == opened + 1
+    assert REGISTRY.get_sample_value("api_db_pool_connections", {"alias": "pooled", "state": "in_use"}) == 1
+
+    errors = []
+    def other_thread():
+        from django.db import connections
+        try:
+            connections["pooled"].ensure_connection()
+        except OperationalError as exc:
+            errors.append(exc)
+        finally:
+            connections["pooled"].close()
+    thread = threading.Thread(target=other_thread)
+    thread.start()
+    thread.join()
+    assert errors and "became free" in str(errors[0]), "A full pool should time out with an OperationalError"
+    assert REGISTRY.get_sample_value("api_db_pool_timeouts_total", {"alias": "pooled"}) >= 1
+
+@pytest.mark.django_db(transaction=True)
+def test_pool_discards_broken_and_mid_transaction_connections(pooled):
+    from django.db import connection as primary
+
+    first = backend_pid(pooled)
+    pooled.connection.cursor().execute("BEGIN")
+    pooled.close()
+    second = backend_pid(pooled)
+    assert second != first, "A connection returned inside a transaction should be closed, not reused"
+
+    pooled.close()
+    pooled._pool.check_idle = 0
+    with primary.cursor() as cursor:
+        cursor.execute("SELECT pg_terminate_backend(%s)", [second])
+    assert backend_pid(pooled) != second, "A dead idle connection should fail its health check and be replaced"
+
+@pytest.mark.django_db(transaction=True)
+def test_pool_health_check_runs_outside_the_lock(pooled):
+    import threading
+
+    pooled.ensure_connection()
+    pooled.close()
+    pool = pooled._pool
+    pool.check_idle = 0
+    lock_free = []
+    check = pool.reusable
+
+    def take_lock():
+        if pool._cond.acquire(timeout=1):
+            pool._cond.release()
+            lock_free.append(True)
+
+    def reusable(*args):
+        # Another thread must be able to take the pool lock while the check runs.
+        probe = threading.Thread(target=take_lock)
+        probe.start()
+        probe.join()
+        return check(*args)
+
+    with mock.patch.object(pool, "reusable", side_effect=reusable):
+        backend_pid(pooled)
+    assert lock_free == [True], "The SELECT 1 health check should not hold the pool lock"
+
+# Streaming export
+
+def export_lines(client, url):
+    response = client.get(url)
+    assert response.status_code == 200 and response.streaming, f"GET {url} should stream"
+    return b"".join(response.streaming_content).decode().splitlines()
+
+@pytest.mark.django_db
+def test_export_streams_filtered_posts_in_batches(api_client, author, user, settings):
+    import json
+    settings.EXPORT_CHUNK_SIZE = 2
+    posts = make_posts(author, 5, published_date=timezone.now())
+    Post.objects.create(title="Hidden", content="C", author=author, status="published", active=False)
+    for post in posts[:2]:
+        Comment.objects.create(post=post, content=f"On {post.pk}", user=user)
+
+    with CaptureQueriesContext(connection) as ctx:
+        lines = export_lines(api_client, "/api/posts/export/?include_comments=true&title=Bulk")
+    rows = [json.loads(line) for line in lines]
+    assert [row["id"] for row in rows] == [post.pk for post in posts], "Same-date posts should export in id order"
+    assert rows[0]["comments"][0]["content"] == f"On {posts[0].pk}" and rows[4]["comments"] == []
+    comment_queries = [q for q in ctx.captured_queries if "blog_comment" in q["sql"]]
+    assert len(comment_queries) == 3, "Comments should be fetched once per batch of posts"
+
+    resumed = export_lines(
+        api_client,
+        f"/api/posts/export/?after_published_date={rows[1]['published_date']}&after_id={rows[1]['id']}&fields=id",
+    )
+    assert [json.loads(line) for line in resumed] == [{"id": post.pk} for post in posts[2:]]
+
+@pytest.mark.django_db
+def test_export_csv_and_errors(api_client, post):
+    import csv
+    lines = export_lines(api_client, "/api/posts/export/?format=csv&fields=id,title,author_name")
+    assert list(csv.reader(lines)) == [["id", "title", "author_name"], [str(post.pk), post.title, post.author.name]]
+
+    response = api_client.get("/api/posts/export/?after_id=1")
+    assert response.status_code == 400 and b"after_published_date" in response.content
+
+@pytest.mark.django_db(transaction=True)
+def test_export_streams_under_asgi(settings, post):
+    from asgiref.sync import async_to_sync
+    from django.test import AsyncClient
+
+    settings.ROOT_URLCONF = "core.asgi_urls"
+
+    async def fetch():
+        response = await AsyncClient().get("/api/posts/export/?fields=id")
+        assert response.is_async, "ASGI responses should stream from an async iterator"
+        return b"".join([chunk async for chunk in response.streaming_content])
+    assert async_to_sync(fetch)() == f'{{"id":{post.pk}}}\n'.encode()
+
+# Bulk create and batch retrieve
+
+def post_payload(author, count, start=0):
+    return [
+        {"title": f"Bulk {i}", "content": f"Body {i} " * 40, "published_date": f"2024-01-{i % 28 + 1:02d}T00:00:00Z",
+         "author": author.pk}
+        for i in range(start, start + count)
+    ]
+
+@pytest.mark.django_db
+def test_bulk_post_create_keeps_counters_and_caches_in_sync(jwt_client, api_client, author):
+    assert api_client.get("/api/posts/").json()["total_count"] == 0
+
+    def create(count, start):
+        with CaptureQueriesContext(connection) as ctx:
+            response = jwt_client.post("/api/posts/bulk/", post_payload(author, count, start), format="json")
+        assert response.status_code == 201, response.content
+        return response.json(), len(ctx.captured_queries)
+
+    created, _ = create(2, 0)  # Also warms the authenticated-user cache.
+    _, few = create(2, 2)
+    _, many = create(18, 4)
+    assert few == many, "Bulk create should run the same number of queries for any batch size"
+    assert [row["title"] for row in created] == ["Bulk 0", "Bulk 1"] and all(row["id"] for row in created)
+
+    post = Post.objects.get(pk=created[0]["id"])
+    assert post.excerpt and post.content.startswith(post.excerpt.rstrip("…").rstrip())
+    author.refresh_from_db()
+    assert author.post_count == 22
+    assert author.last_published_date == max(Post.objects.values_list("published_date", flat=True))
+    assert api_client.get("/api/posts/").json()["total_count"] == 22, "Bulk create should invalidate cached lists"
+
+@pytest.mark.django_db
+def test_bulk_post_create_is_all_or_nothing(jwt_client, author, author2):
+    payload = post_payload(author, 2) + post_payload(author2, 1) + [{"title": "x", "author": 999999}]
+    response = jwt_client.post("/api/posts/bulk/", payload, format="json")
+    assert response.status_code == 400
+    errors = response.json()
+    assert errors[0] == {} and "author" in errors[2] and "content" in errors[3] and "author" in errors[3]
+    assert not Post.objects.exists(), "A batch with an invalid item should create nothing"
+
+    response = jwt_client.post("/api/posts/bulk/", {"title": "not a list"}, format="json")
+    assert response.status_code == 400
+
+@pytest.mark.django_db
+def test_bulk_comment_create(jwt_client, post, inactive_post, author, settings):
+    other = make_posts(author, 1)[0]
+    payload = [{"post": post.pk, "content": "a"}, {"post": other.pk, "content": "b"}, {"post": post.pk, "content": "c"}]
+    response = jwt_client.post("/api/comments/bulk/", payload, format="json")
+    assert response.status_code == 201 and len(response.json()) == 3
+    with CaptureQueriesContext(connection) as ctx:
+        jwt_client.post("/api/comments/bulk/", payload, format="json")
+    queries = len(ctx.captured_queries)
+    with CaptureQueriesContext(connection) as ctx:
+        jwt_client.post("/api/comments/bulk/", payload * 10, format="json")
+    assert len(ctx.captured_queries) == queries, "Bulk comments should run a constant number of queries"
+    post.refresh_from_db()
+    other.refresh_from_db()
+    assert (post.comment_count, other.comment_count) == (24, 12)
+    assert Comment.objects.filter(user__isnull=False).count() == 36
+
+    response = jwt_client.post("/api/comments/bulk/", [{"post": inactive_post.pk, "content": "x"}], format="json")
+    assert response.status_code == 400 and "inactive" in str(response.json())
+
+    settings.BULK_CREATE_MAX_ITEMS = 2
+    assert jwt_client.post("/api/comments/bulk/", payload, format="json").status_code == 400
+
+@pytest.mark.django_db
+def test_post_batch_returns_requested_posts_in_order(api_client, author, inactive_post, user):
+    posts = make_posts(author, 3)
+    Comment.objects.create(post=posts[1], content="Hi", user=user)
+    ids = [posts[2].pk, inactive_post.pk, posts[0].pk, 999999, posts[1].pk]
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(f"/api/posts/batch/?ids={','.join(map(str, ids))}")
+    assert response.status_code == 200
+    assert [row["id"] for row in response.json()] == [posts[2].pk, posts[0].pk, posts[1].pk]
+    assert len(ctx.captured_queries) == 2, "Posts and their comments should take one query each"
+    assert response.json()[2] == api_client.get(f"/api/posts/{posts[1].pk}/").json(), "Rows should match post detail"
+
+    assert api_client.get("/api/posts/batch/?ids=1,x").status_code == 400
+    assert api_client.get("/api/posts/batch/").status_code == 400
+
+# Query plans
+
+@pytest.mark.django_db
+def test_explain_endpoints_flags_unindexed_query_shapes():
+    from io import StringIO
+    from django.core.management import call_command
+    from django.core.management.base import CommandError
+
+    call_command("bulk_seed", users=50, authors=20, posts=12000, comments=12000, block_size=4000, stdout=StringIO())
+    out = StringIO()
+    call_command("explain_endpoints", stdout=out)
+    assert "SEQ SCAN" not in out.getvalue(), "Every endpoint should read posts and comments through an index"
+
+    with pytest.raises(CommandError, match="ordering=title"):
+        call_command("explain_endpoints", "--only", "post list", "--path", "/api/posts/?ordering=title", stdout=out)
+
+def test_needless_seq_scans_allow_small_tables_and_full_reads():
+    from blog.management.commands.explain_endpoints import needless_seq_scans
+
+    def scan(table, rows):
+        return {"Node Type": "Seq Scan", "Relation Name": table, "Plan Rows": rows}
+    sizes = {"blog_post": 50000, "blog_author": 100}.get
+    count = {"Node Type": "Aggregate", "Plans": [scan("blog_post", 40000)]}
+    page = {"Node Type": "Limit", "Plans": [{"Node Type": "Sort", "Plans": [scan("blog_post", 40000)]}]}
+    join = {"Node Type": "Limit", "Plans": [{"Node Type": "Hash Join", "Plans": [scan("blog_author", 100)]}]}
+    assert list(needless_seq_scans(count, sizes, 10000)) == [], "An exact count may read the whole table"
+    assert list(needless_seq_scans(page, sizes, 10000)) == [("blog_post", 50000)]
+    assert list(needless_seq_scans(join, sizes, 10000)) == []
+
+# Archival
+
+def explain(queryset):
+    with connection.cursor() as cursor:
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute(f"EXPLAIN {sql}", params)
+        return "\n".join(row[0] for row in cursor.fetchall())
+
+@pytest.mark.django_db
+def test_archive_moves_withdrawn_posts_into_monthly_partitions(api_client, post, inactive_post, author, user):
+    from django.core.management import call_command
+    from blog.archive import existing_partitions
+    from blog.models import ArchivedComment, ArchivedPost
+
+    long_ago = timezone.now() - timedelta(days=90)
+    old = Post.objects.create(
+        title="Old", content="Old content", author=author, active=False,
+        published_date=datetime(2024, 1, 15, tzinfo=dt_timezone.utc),
+    )
+    Comment.objects.create(post=old, content="Early", user=user, created=datetime(2024, 1, 20, tzinfo=dt_timezone.utc))
+    Comment.objects.create(post=old, content="Late", created=datetime(2024, 3, 2, tzinfo=dt_timezone.utc))
+    Post.objects.filter(pk=old.pk).update(updated=long_ago, comment_count=2)
+    Comment.objects.create(post=post, content="Stays")
+
+    call_command("archive_posts", "--batch-size", "1", stdout=mock.Mock())
+    assert not Post.objects.filter(pk=old.pk).exists(), "Posts withdrawn long enough leave the hot table"
+    assert Post.objects.filter(pk=inactive_post.pk).exists(), "Recently withdrawn posts stay"
+    assert list(Comment.objects.values_list("content", flat=True)) == ["Stays"]
+
+    archived = ArchivedPost.objects.get(pk=old.pk)
+    assert (archived.title, archived.author_id, archived.comment_count) == ("Old", author.pk, 2)
+    assert archived.archived_at is not None
+    assert sorted(ArchivedComment.objects.filter(post=archived).values_list("content", flat=True)) == ["Early", "Late"]
+    assert set(existing_partitions("blog_post_archive").values()) == {"blog_post_archive_p2024_01"}
+    assert set(existing_partitions("blog_comment_archive").values()) == {
+        "blog_comment_archive_p2024_01", "blog_comment_archive_p2024_03",
+    }
+
+    assert api_client.get("/api/posts/").json()["total_count"] == 1
+    assert api_client.get(f"/api/posts/{post.pk}/").status_code == 200
+    assert api_client.get(f"/api/posts/{old.pk}/").status_code == 404
+
+    # Date ranges, e.g. the admin's date drill-down, read only the matching months.
+    plan = explain(ArchivedComment.objects.filter(created__gte=datetime(2024, 3, 1, tzinfo=dt_timezone.utc)))
+    assert "blog_comment_archive_p2024_03" in plan and "p2024_01" not in plan, plan
+
+@pytest.mark.django_db
+def test_archive_purge_drops_old_partitions(author):
+    from django.core.management import call_command
+    from django.core.management.base import CommandError
+    from blog.archive import existing_partitions
+    from blog.models import ArchivedPost
+
+    for month in (1, 2, 3):
+        stale = Post.objects.create(
+            title=f"Old {month}", content="x", author=author, active=False,
+            published_date=datetime(2023, month, 10, tzinfo=dt_timezone.utc),
+        )
+        Post.objects.filter(pk=stale.pk).update(updated=timezone.now() - timedelta(days=60))
+    call_command("archive_posts", "--purge-before", "2023-03", stdout=mock.Mock())
+    assert set(existing_partitions("blog_post_archive").values()) == {"blog_post_archive_p2023_03"}
+    assert list(ArchivedPost.objects.values_list("title", flat=True)) == ["Old 3"]
+
+    with pytest.raises(CommandError, match="YYYY-MM"):
+        call_command("archive_posts", "--purge-before", "March")
+
+# Write-behind comments
+
+@pytest.fixture
+def write_behind(settings):
+    from blog.comment_queue import queue_depth
+
+    settings.COMMENT_WRITE_BEHIND = True
+    queue_depth.clear()
+    yield settings
+    queue_depth.clear()
+
+def flush_comment_queue():
+    from django.core.management import call_command
+
+    call_command("flush_comment_queue", "--once", stdout=mock.Mock())
+
+@pytest.mark.django_db
+def test_write_behind_comments_are_queued_then_flushed(write_behind, api_client, post, inactive_post, user):
+    from blog.models import QueuedComment
+
+    api_client.force_authenticate(user)
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.post("/api/comments/create/", {"post": post.pk, "content": "Queued"}, format="json")
+    assert response.status_code == 202, response.content
+    assert not any("blog_post" in query["sql"] for query in ctx.captured_queries), "Enqueueing must not read posts"
+    assert response.data["status"] == "pending"
+    assert not Comment.objects.exists(), "Comments are only inserted by the flush"
+    status_url = response["Location"]
+    rejected = [
+        api_client.post("/api/comments/create/", {"post": pk, "content": "No"}, format="json")["Location"]
+        for pk in (inactive_post.pk, 999999)
+    ]
+
+    flush_comment_queue()
+    result = api_client.get(status_url).json()
+    comment = Comment.objects.get()
+    assert (result["status"], result["comment"]) == ("created", comment.pk)
+    assert (comment.post_id, comment.content, comment.user) == (post.pk, "Queued", user)
+    assert Post.objects.get(pk=post.pk).comment_count == 1, "The flush keeps the counter in sync"
+    errors = [api_client.get(url).json() for url in rejected]
+    assert [(row["status"], row["error"]) for row in errors] == [
+        ("rejected", "Cannot comment on inactive posts."),
+        ("rejected", 'Invalid pk "999999" - object does not exist.'),
+    ]
+    assert api_client.post("/api/comments/create/", {"post": "x"}, format="json").status_code == 400
+
+    assert status_url.endswith(f"/{QueuedComment.objects.get(comment=comment).token}/")
+    assert "id" not in result, "Status replies don't reveal the sequential queue id"
+    pk = QueuedComment.objects.get(comment=comment).pk
+    assert api_client.get(f"/api/comments/queued/{pk}/").status_code == 404, "Entries can't be looked up by id"
+
+@pytest.mark.django_db
+def test_write_behind_queue_applies_back_pressure(write_behind, api_client, post):
+    from blog.comment_queue import queue_depth
+
+    write_behind.COMMENT_QUEUE_MAX_PENDING = 2
+    payload = {"post": post.pk, "content": "Burst"}
+    assert [api_client.post("/api/comments/create/", payload).status_code for _ in range(2)] == [202, 202]
+    response = api_client.post("/api/comments/create/", payload)
+    assert response.status_code == 503
+    assert response["Retry-After"] == "1"
+
+    flush_comment_queue()
+    queue_depth.clear()
+    assert api_client.post("/api/comments/create/", payload).status_code == 202
+    assert Post.objects.get(pk=post.pk).comment_count == 2
+
+@pytest.mark.django_db
+def test_write_behind_queue_depth_counts_only_pending_rows(write_behind, post):
+    from blog.comment_queue import queue_depth
+    from blog.models import QueuedComment
+
+    entries = [QueuedComment.objects.create(post_id=post.pk, content=f"Q{n}") for n in range(3)]
+    QueuedComment.objects.filter(pk=entries[1].pk).update(status=QueuedComment.REJECTED)
+    assert queue_depth.read() == 2, "Settled entries between pending ones should not count"
+    write_behind.COMMENT_QUEUE_MAX_PENDING = 1
+    QueuedComment.objects.create(post_id=post.pk, content="Q3")
+    assert queue_depth.read() == 2, "The count should stop one past the limit"
+
+@pytest.mark.django_db
+def test_archiving_keeps_queued_comments_of_moved_comments(write_behind, api_client, post):
+    from blog.archive import archive_posts
+    from blog.models import ArchivedComment, QueuedComment
+
+    assert api_client.post("/api/comments/create/", {"post": post.pk, "content": "Queued"}).status_code == 202
+    flush_comment_queue()
+    Post.objects.filter(pk=post.pk).update(active=False, updated=timezone.now() - timedelta(days=60))
+
+    assert archive_posts() == (1, 1)
+    # The deferred foreign key checks that would run at commit.
+    connection.check_constraints()
+    queued = QueuedComment.objects.get()
+    assert (queued.status, queued.comment_id) == ("created", None)
+    assert ArchivedComment.objects.get().content == "Queued"
+
+# Trending
+
+@pytest.mark.django_db
+def test_hot_score_grows_with_comments_and_decays_with_age(api_client, author, user):
+    from blog.models import hot_weight
+    from blog.trending import refresh_hot_scores
+
+    now = timezone.now()
+    old = Post.objects.create(title="Old", content="x", author=author, published_date=now - timedelta(days=3))
+    new = Post.objects.create(title="New", content="x", author=author, published_date=now)
+    assert old.hot_score == pytest.approx(hot_weight(now) - 6), "Three days is six 12-hour half-lives"
+    assert new.hot_score > old.hot_score
+
+    for _ in range(3):
+        assert api_client.post("/api/comments/create/", {"post": old.pk, "content": "Hot"}).status_code == 201
+    api_client.force_authenticate(user)
+    payload = [{"post": old.pk, "content": f"Bulk {n}"} for n in range(4)]
+    assert api_client.post("/api/comments/bulk/", payload, format="json").status_code == 201
+    old.refresh_from_db()
+    # Seven fresh comments plus the decayed publication: log2(7 + 2 ** -6).
+    assert old.hot_score == pytest.approx(hot_weight(timezone.now()) + math.log2(7 + 2 ** -6), abs=1e-3)
+    assert old.hot_score > new.hot_score
+
+    assert refresh_hot_scores() == 0, "Incremental scores match a full recompute"
+    Comment.objects.filter(post=old).delete()
+    assert refresh_hot_scores() == 1
+    old.refresh_from_db()
+    assert old.hot_score == pytest.approx(hot_weight(now) - 6)
+
+@pytest.mark.django_db
+def test_trending_endpoint_is_cached_and_refreshed(api_client, author, jwt_client, settings):
+    from blog import counters
+    from blog.cache import TRENDING_CACHE_KEY, response_cache
+
+    settings.TRENDING_SIZE = 2
+    posts = [Post.objects.create(title=f"P{n}", content="x", author=author) for n in range(3)]
+    counters.comments_added([posts[0].pk] * 5)
+
+    response = api_client.get("/api/posts/trending/")
+    assert response.status_code == 200
+    data = response.json()
+    assert [row["id"] for row in data] == [posts[0].pk, posts[2].pk]
+    assert set(data[0]) == {"id", "title", "excerpt", "published_date", "author_name", "comment_count", "heat"}
+    assert data[0]["heat"] == pytest.approx(6, abs=0.01) and data[1]["heat"] == pytest.approx(1, abs=0.01)
+    with CaptureQueriesContext(connection) as ctx:
+        assert api_client.get("/api/posts/trending/?limit=1").json() == data[:1]
+    assert len(ctx.captured_queries) == 0, "Served from the cached list"
+    assert api_client.get("/api/posts/trending/?limit=3").status_code == 400
+
+    # Past its refresh time the cached list is served while a rebuild runs in the background.
+    entry = response_cache().get(TRENDING_CACHE_KEY)
+    response_cache().set(TRENDING_CACHE_KEY, {**entry, "expires": 0})
+    with mock.patch("blog.trending.refresh_in_background") as refresh:
+        assert api_client.get("/api/posts/trending/").json() == data
+        assert api_client.get("/api/posts/trending/").json() == data
+    assert refresh.call_count == 1, "Only the request holding the refresh lock starts a rebuild"
+
+    # Withdrawing a listed post drops the list at once.
+    assert jwt_client.delete(f"/api/posts/{posts[0].pk}/delete/").status_code == 204
+    assert [row["id"] for row in api_client.get("/api/posts/trending/").json()] == [posts[2].pk, posts[1].pk]
+
+# Author timeline
+
+@pytest.mark.django_db
+def test_author_timeline_pages_newest_first(api_client, author, author2, inactive_post):
+    now = timezone.now()
+    posts = [
+        Post.objects.create(title=f"T{n}", content="x", author=author, published_date=now - timedelta(hours=n))
+        for n in range(5)
+    ]
+    Post.objects.create(title="Other", content="x", author=author2)
+
+    first = api_client.get(f"/api/authors/{author.pk}/posts/?page_size=3").json()
+    assert [row["id"] for row in first["results"]] == [post.pk for post in posts[:3]]
+    assert set(first["results"][0]) == {"id", "title", "content", "excerpt", "published_date", "author_name", "comment_count"}
+    second = api_client.get(first["next"]).json()
+    assert [row["id"] for row in second["results"]] == [post.pk for post in posts[3:]]
+    assert second["next"] is None
+    assert api_client.get("/api/authors/999999/posts/").status_code == 404
+    assert api_client.get("/api/authors/999999/posts/?cursor=").status_code == 404
+
+@pytest.mark.django_db
+def test_author_timeline_cache_stays_warm(jwt_client, author, settings, django_capture_on_commit_callbacks):
+    from blog.timeline import cached_timeline
+
+    reader = APIClient()
+    settings.AUTHOR_TIMELINE_CACHE_SIZE = 3
+    now = timezone.now()
+    with django_capture_on_commit_callbacks(execute=True):
+        posts = [
+            Post.objects.create(title=f"T{n}", content="x", author=author, published_date=now - timedelta(hours=n))
+            for n in range(4)
+        ]
+    assert cached_timeline(author.pk) == [post.pk for post in posts[:3]], "Creating a post rebuilds the cache"
+
+    url = f"/api/authors/{author.pk}/posts/?page_size=2"
+    with CaptureQueriesContext(connection) as ctx:
+        response = reader.get(url)
+    assert len(ctx.captured_queries) == 1, "A cached first page is one primary-key fetch"
+    assert [row["id"] for row in response.json()["results"]] == [posts[0].pk, posts[1].pk]
+    assert response.json()["next"] is not None
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert jwt_client.delete(f"/api/posts/{posts[0].pk}/delete/").status_code == 204
+    assert cached_timeline(author.pk) == [post.pk for post in posts[1:]], "Withdrawing a post rebuilds the cache"
+    with django_capture_on_commit_callbacks(execute=True):
+        payload = {"title": "Edited", "content": "x", "active": True}
+        assert jwt_client.put(f"/api/posts/{posts[1].pk}/edit/", payload, format="json").status_code == 200
+    assert reader.get(url).json()["results"][0]["title"] == "Edited"
+
+    # The cache holds 3 ids: a larger first page falls back to the index.
+    rows = reader.get(f"/api/authors/{author.pk}/posts/?page_size=5").json()["results"]
+    assert [row["id"] for row in rows] == [post.pk for post in posts[1:]]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        author.delete()
+    assert cached_timeline(author.pk) is None
+
+@pytest.mark.django_db
+def test_moving_a_post_refreshes_both_author_timelines(api_client, author, author2, django_capture_on_commit_callbacks):
+    from blog.timeline import cached_timeline
+
+    now = timezone.now()
+    with django_capture_on_commit_callbacks(execute=True):
+        posts = [
+            Post.objects.create(title=f"T{n}", content="x", author=author, published_date=now - timedelta(hours=n))
+            for n in range(3)
+        ]
+    with django_capture_on_commit_callbacks(execute=True):
+        moved = Post.objects.get(pk=posts[0].pk)
+        moved.author = author2
+        moved.save()
+    assert cached_timeline(author.pk) == [posts[1].pk, posts[2].pk], "The old author's timeline should drop the post"
+    assert cached_timeline(author2.pk) == [moved.pk], "The new author's timeline should gain the post"
+    first = api_client.get(f"/api/authors/{author.pk}/posts/?page_size=1").json()
+    assert [row["id"] for row in first["results"]] == [posts[1].pk]
+    assert first["next"] is not None, "The old author's first page should still link to the rest"
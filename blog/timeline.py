@@ -0,0 +1,57 @@
+"""
+Per-author timelines (``/api/authors/<pk>/posts/``).
+
+The ids of each author's ``AUTHOR_TIMELINE_CACHE_SIZE`` newest active posts
+are cached in timeline order, ``(published_date, id)`` descending. The
+cache is rebuilt from the ``(author, -published_date, -id)`` index once a
+post of the author is created, edited or withdrawn (see ``blog.signals``).
+A cached first page is then one primary-key fetch, and later pages seek
+on the same index.
+
+Only ids are cached, so titles, comment counts and so on are always read fresh.
+"""
+from django.conf import settings
+
+from core.routers import pinned_to_primary, primary_reads
+from .cache import response_cache
+from .models import Post
+
+TIMELINE_ORDERING = ["-published_date", "-id"]
+
+
+def timeline_key(author_id):
+    return f"author-timeline:{author_id}"
+
+
+def author_timeline(author_id):
+    return Post.objects.filter(author_id=author_id, active=True).order_by(*TIMELINE_ORDERING)
+
+
+def warm_timeline(author_id):
+    """Cache and return the ids of the author's newest posts, read from the primary."""
+    with primary_reads():
+        ids = list(author_timeline(author_id).values_list("id", flat=True)[:settings.AUTHOR_TIMELINE_CACHE_SIZE])
+    response_cache().set(timeline_key(author_id), ids, settings.AUTHOR_TIMELINE_CACHE_TIMEOUT)
+    return ids
+
+
+def cached_timeline(author_id):
+    """The author's cached newest post ids, or None when they aren't cached (or the client is pinned)."""
+    if pinned_to_primary():
+        return None
+    return response_cache().get(timeline_key(author_id))
+
+
+def forget_timeline(author_id):
+    response_cache().delete(timeline_key(author_id))
+
+
+def first_page_ids(ids, page_size):
+    """
+    The ids of the first page plus one more (so the paginator can tell
+    whether there is a next page), or None when ``ids`` doesn't hold them all.
+    """
+    if len(ids) <= page_size and len(ids) >= settings.AUTHOR_TIMELINE_CACHE_SIZE:
+        # Truncated at the cache size: later posts exist but aren't cached.
+        return None
+    return ids[:page_size + 1]
@@ -0,0 +1,130 @@
+"""
+Trending posts (``/api/posts/trending/``).
+
+``Post.hot_score`` is the log2 of a post's popularity: its publication and
+every comment count 1, and each count halves every
+``TRENDING_HALF_LIFE_HOURS``. The score is stored relative to the fixed
+``HOT_EPOCH`` rather than to now (see ``blog.models.hot_weight``). Decay
+scales every post by the same factor, so the order of stored scores stays
+right as time passes without rewriting any row. Each comment adds its weight
+in the same ``UPDATE`` as ``comment_count`` (``blog.counters``). The top
+posts are then the first rows of the partial ``(-hot_score, -id)`` index.
+
+Deleted, archived or bulk-loaded comments aren't subtracted or added
+incrementally; ``refresh_hot_scores`` recomputes scores from the comments.
+
+The rendered list is cached. Once it is ``TRENDING_REFRESH_SECONDS`` old,
+the first request to take the refresh lock starts a rebuild in a background
+thread, and every request keeps getting the cached list until it lands.
+With replicas, the list is built from the primary, and clients pinned after
+a write get it rendered afresh.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, connections
+
+from core.routers import pinned_to_primary, primary_reads
+from .cache import TRENDING_CACHE_KEY, response_cache
+from .fast_serializers import TrendingPostValuesSerializer
+from .models import HOT_EPOCH, Comment, Post
+
+HOT_SCORE_BATCH_SIZE = 5000
+# Incremental scores use the flush time rather than the comment's; ignore differences that small.
+HOT_SCORE_TOLERANCE = 1e-3
+
+# log2 of the summed weights of each post in (after, until], as a max plus a sum of
+# 2 ** (x - max) so nothing overflows. power() would raise on underflow, hence the floor.
+HOT_SCORE_SQL = f"""
+WITH weights AS (
+    SELECT id AS post_id, (extract(epoch FROM published_date - %(epoch)s) / %(half_life)s)::float8 AS x
+    FROM {Post._meta.db_table} WHERE id > %(after)s AND id <= %(until)s
+    UNION ALL
+    SELECT post_id, (extract(epoch FROM created - %(epoch)s) / %(half_life)s)::float8
+    FROM {Comment._meta.db_table} WHERE post_id > %(after)s AND post_id <= %(until)s
+), peaked AS (
+    SELECT post_id, x, max(x) OVER (PARTITION BY post_id) AS peak FROM weights
+), scores AS (
+    SELECT post_id, peak + ln(sum(power(2.0::float8, greatest(x - peak, -1000.0)))) / ln(2.0) AS score
+    FROM peaked GROUP BY post_id, peak
+)
+UPDATE {Post._meta.db_table} AS post SET hot_score = scores.score
+FROM scores
+WHERE post.id = scores.post_id AND abs(post.hot_score - scores.score) > %(tolerance)s
+"""
+
+
+def trending_queryset(limit):
+    return Post.objects.filter(active=True).order_by("-hot_score", "-id")[:limit]
+
+
+def render_trending():
+    rows = TrendingPostValuesSerializer.prepare(trending_queryset(settings.TRENDING_SIZE))
+    return TrendingPostValuesSerializer(rows, many=True).data
+
+
+def build_trending():
+    """Render and cache the current top ``TRENDING_SIZE`` posts, read from the primary."""
+    with primary_reads():
+        data = render_trending()
+    entry = {
+        "data": data,
+        "ids": {row["id"] for row in data},
+        "expires": time.time() + settings.TRENDING_REFRESH_SECONDS,
+    }
+    # Kept well past its refresh time so an idle site still has a list to serve while it rebuilds.
+    response_cache().set(TRENDING_CACHE_KEY, entry, settings.TRENDING_REFRESH_SECONDS * 10)
+    return data
+
+
+def refresh_in_background():
+    def run():
+        try:
+            build_trending()
+        finally:
+            response_cache().delete(f"{TRENDING_CACHE_KEY}:lock")
+            # This thread's own connections.
+            connections.close_all()
+
+    threading.Thread(target=run, name="trending-refresh", daemon=True).start()
+
+
+def trending_posts():
+    if pinned_to_primary():
+        # Neither served a list from before this client's write nor trusted to cache one.
+        return render_trending()
+    cache = response_cache()
+    entry = cache.get(TRENDING_CACHE_KEY)
+    if entry is None:
+        return build_trending()
+    if entry["expires"] <= time.time() and cache.add(
+        f"{TRENDING_CACHE_KEY}:lock", 1, settings.RESPONSE_CACHE_LOCK_TIMEOUT
+    ):
+        refresh_in_background()
+    return entry["data"]
+
+
+def refresh_hot_scores(batch_size=HOT_SCORE_BATCH_SIZE):
+    """
+    Recompute every ``hot_score`` from publication and comment times, in id
+    batches, rewriting only rows that drifted. Returns the number fixed.
+    """
+    params = {
+        "epoch": HOT_EPOCH,
+        "half_life": settings.TRENDING_HALF_LIFE_HOURS * 3600,
+        "tolerance": HOT_SCORE_TOLERANCE,
+    }
+    fixed = 0
+    last_pk = 0
+    while True:
+        ids = list(Post.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            break
+        with connection.cursor() as cursor:
+            cursor.execute(HOT_SCORE_SQL, {**params, "after": last_pk, "until": ids[-1]})
+            fixed += cursor.rowcount
+        last_pk = ids[-1]
+    if fixed:
+        response_cache().delete(TRENDING_CACHE_KEY)
+    return fixed
@@ -5,13 +5,21 @@ from .views import (
     AuthorDetailAPI,
     AuthorUpdateAPI,
     AuthorDeleteAPI,
+    AuthorPostListAPI,
     PostListAPI,
+    PostBatchAPI,
+    PostTrendingAPI,
     PostDetailAPI,
     PostCreateAPI,
+    PostBulkCreateAPI,
     PostEditAPI,
     PostDeleteAPI,
+    PostCommentListAPI,
     CommentCreateAPI,
+    CommentBulkCreateAPI,
+    CommentQueueStatusAPI,
 )
+from .export import PostExportAPI
 
 urlpatterns = [
     path("authors/", AuthorListAPI.as_view(), name="api_author_list"),
@@ -19,12 +27,20 @@ urlpatterns = [
     path("authors/<int:pk>/", AuthorDetailAPI.as_view(), name="api_author_detail"),
     path("authors/<int:pk>/edit/", AuthorUpdateAPI.as_view(), name="api_author_update"),
     path("authors/<int:pk>/delete/", AuthorDeleteAPI.as_view(), name="api_author_delete"),
+    path("authors/<int:pk>/posts/", AuthorPostListAPI.as_view(), name="api_author_posts"),
 
     path("posts/", PostListAPI.as_view(), name="api_post_list"),
+    path("posts/export/", PostExportAPI.as_view(), name="api_post_export"),
+    path("posts/batch/", PostBatchAPI.as_view(), name="api_post_batch"),
+    path("posts/trending/", PostTrendingAPI.as_view(), name="api_post_trending"),
     path("posts/create/", PostCreateAPI.as_view(), name="api_post_create"),
+    path("posts/bulk/", PostBulkCreateAPI.as_view(), name="api_post_bulk_create"),
     path("posts/<int:pk>/", PostDetailAPI.as_view(), name="api_post_detail"),
     path("posts/<int:pk>/edit/", PostEditAPI.as_view(), name="api_post_edit"),
     path("posts/<int:pk>/delete/", PostDeleteAPI.as_view(), name="api_post_delete"),
+    path("posts/<int:pk>/comments/", PostCommentListAPI.as_view(), name="api_post_comments"),
 
     path("comments/create/", CommentCreateAPI.as_view(), name="api_comment_create"),
+    path("comments/bulk/", CommentBulkCreateAPI.as_view(), name="api_comment_bulk_create"),
+    path("comments/queued/<uuid:token>/", CommentQueueStatusAPI.as_view(), name="api_comment_queue_status"),
 ]
@@ -1,111 +1,426 @@
-from rest_framework import generics, permissions
-from rest_framework.exceptions import PermissionDenied
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework import generics, permissions, serializers, status
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.fields import ArrayField
+from django.db import connections, transaction
+from django.db.models import Count, F, Func, IntegerField, Max, Prefetch, Value
+from django.db.models.functions import MD5
+from django.urls import reverse
 
-from .models import Author, Post, Comment
+from core.authentication import CachedJWTAuthentication
+from core.pagination import FeedPagination, KeysetPagination
+from core.renderers import FastJSONRenderer
+from core.routers import primary_reads
+from .models import Author, Post, Comment, QueuedComment, limit_per_parent
 from .serializers import (
     AuthorSerializer,
     AuthorCreateUpdateSerializer,
+    CommentSerializer,
     PostListSerializer,
     PostDetailSerializer,
     PostCreateSerializer,
+    PostBulkCreateSerializer,
     PostEditSerializer,
     CommentCreateSerializer,
+    CommentBulkCreateSerializer,
+    QueuedCommentSerializer,
 )
+from . import comment_queue, counters
 from .permissions import IsAuthorOwner
-from .filters import PostFilter
+from .filters import AuthorFilter, PostFilter, PostSearchFilter, RankedOrderingFilter
+from .mixins import ConditionalGetMixin, ConditionalUpdateMixin, QueryPlanMixin, ValuesReadMixin, make_etag
+from .fast_serializers import CommentValuesSerializer, PostDetailValuesSerializer, PostListValuesSerializer
+from .timeline import TIMELINE_ORDERING, cached_timeline, first_page_ids, warm_timeline
+from .trending import trending_posts
+from .cache import (
+    CachedResponseMixin,
+    POST_DETAIL_SCOPE,
+    POST_LIST_SCOPE,
+    current_generations,
+    normalize_query_params,
+    post_scope,
+    response_cache,
+)
+
+
+def post_conditional_state(queryset, pk):
+    """
+    ETag/Last-Modified for a post from its own, its author's and its newest
+    comment's timestamps (plus the comment count, so deletions change it too).
+    """
+    row = next(iter(
+        queryset.filter(pk=pk)
+        .order_by()
+        .values_list("updated", "author__updated")
+        .annotate(last_comment=Max("comments__created"), comment_count=Count("comments"))
+    ), None)
+    if row is None:
+        return None, None
+    updated, author_updated, last_comment, comment_count = row
+    etag = make_etag("post", pk, updated.isoformat(), author_updated.isoformat(), last_comment, comment_count)
+    return etag, max(filter(None, [updated, author_updated, last_comment]))
+
+
+def post_list_conditional_state(request):
+    """
+    The post list can only change when some post or author is written, so its
+    validators come from the two (indexed) newest modification times. Hard
+    deletes leave those alone, so the list's cache generation, bumped by every
+    post write and delete, goes into the ETag too.
+    """
+    # Raw SQL bypasses the router; ask it which database reads go to.
+    with connections[Post.objects.db].cursor() as cursor:
+        cursor.execute(
+            f"SELECT (SELECT max(updated) FROM {Post._meta.db_table}), "
+            f"(SELECT max(updated) FROM {Author._meta.db_table})"
+        )
+        post_updated, author_updated = cursor.fetchone()
+    generation, = current_generations(response_cache(), [POST_LIST_SCOPE])
+    etag = make_etag(
+        "posts", request.path, normalize_query_params(request.query_params), post_updated, author_updated, generation,
+    )
+    return etag, max(filter(None, [post_updated, author_updated]), default=None)
 
 
-class AuthorListAPI(generics.ListAPIView):
+class AuthorListAPI(ConditionalGetMixin, QueryPlanMixin, generics.ListAPIView):
+    queryset = Author.objects.all()
     serializer_class = AuthorSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_class = AuthorFilter
     search_fields = ['name', 'email']
-    renderer_classes = [JSONRenderer]
+    ordering_fields = ['id', 'name', 'email', 'post_count', 'last_published_date']
+    ordering = ['id']
+    renderer_classes = [FastJSONRenderer]
+    pagination_class = FeedPagination
+    select_related_fields = ["user"]
+    only_fields = ["id", "user", "name", "email", "post_count", "last_published_date", "user__username"]
+    required_fields = ["id", "user"]
 
     def get_queryset(self):
+        queryset = super().get_queryset()
         if self.request.user.is_staff:
-            return Author.objects.all()
-        return Author.objects.filter(user=self.request.user)
+            return queryset
+        return queryset.filter(user=self.request.user)
+
+    def get_conditional_state(self):
+        # Only authors this user can see feed the validators; the count catches deletions
+        # and the username digest catches renames, which don't touch Author.updated.
+        state = self.get_queryset().aggregate(
+            updated=Max("updated"),
+            total=Count("id"),
+            usernames=MD5(StringAgg("user__username", delimiter=",", ordering="id")),
+        )
+        request = self.request
+        etag = make_etag(
+            "authors", request.path, normalize_query_params(request.query_params),
+            request.user.pk, request.user.is_staff, state["updated"], state["total"], state["usernames"],
+        )
+        return etag, state["updated"]
 
 
 class AuthorCreateAPI(generics.CreateAPIView):
     serializer_class = AuthorCreateUpdateSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
 
-class AuthorDetailAPI(generics.RetrieveAPIView):
+class AuthorDetailAPI(ConditionalGetMixin, QueryPlanMixin, generics.RetrieveAPIView):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated, IsAuthorOwner]
+    select_related_fields = ["user"]
+    only_fields = ["id", "user", "name", "email", "post_count", "last_published_date", "user__username"]
+    required_fields = ["id", "user"]
+
+    def get_conditional_state(self):
+        # Limited to what IsAuthorOwner allows so a 304 never answers for someone else's author.
+        queryset = Author.objects.filter(pk=self.kwargs["pk"])
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        row = queryset.values_list("updated", "user__username").first()
+        if row is None:
+            return None, None
+        updated, username = row
+        return make_etag("author", self.kwargs["pk"], updated.isoformat(), username), updated
 
 
 class AuthorUpdateAPI(generics.UpdateAPIView):
     queryset = Author.objects.all()
     serializer_class = AuthorCreateUpdateSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated, IsAuthorOwner]
 
 
 class AuthorDeleteAPI(generics.DestroyAPIView):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated, IsAuthorOwner]
 
 
-class PostListAPI(generics.ListAPIView):
+def latest_comments_prefetch():
+    # Newest comments only; the full list is paged by PostCommentListAPI.
+    latest = limit_per_parent(Comment.objects.select_related("user"), "post", settings.POST_DETAIL_COMMENT_LIMIT)
+    return Prefetch("comments", queryset=latest)
+
+
+class PostListAPI(ConditionalGetMixin, CachedResponseMixin, ValuesReadMixin, QueryPlanMixin, generics.ListAPIView):
     queryset = Post.objects.filter(active=True)
     serializer_class = PostListSerializer
+    values_serializer_class = PostListValuesSerializer
     permission_classes = [permissions.AllowAny]
 
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, PostSearchFilter, RankedOrderingFilter]
     filterset_class = PostFilter
-    search_fields = ['title', 'content', 'author__name']
-    ordering_fields = ['published_date', 'title', 'author__name']
+    ordering_fields = ['published_date', 'title', 'author__name', 'comment_count']
     ordering = ['-published_date']
-    renderer_classes = [JSONRenderer]
+    renderer_classes = [FastJSONRenderer]
+    pagination_class = FeedPagination
+    select_related_fields = ["author"]
+    only_fields = ["id", "title", "content", "excerpt", "published_date", "author__name", "comment_count"]
+
+    def get_cache_scopes(self):
+        return [POST_LIST_SCOPE]
+
+    def get_conditional_state(self):
+        # Stored with the response when it is cached, so read from the primary like the response.
+        with primary_reads():
+            return self.cached_validators() or post_list_conditional_state(self.request)
 
 
-class PostDetailAPI(generics.RetrieveAPIView):
+class PostDetailAPI(ConditionalGetMixin, CachedResponseMixin, ValuesReadMixin, QueryPlanMixin, generics.RetrieveAPIView):
     queryset = Post.objects.filter(active=True)
     serializer_class = PostDetailSerializer
-    authentication_classes = [JWTAuthentication]
+    values_serializer_class = PostDetailValuesSerializer
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [permissions.AllowAny]
+    select_related_fields = ["author"]
+    only_fields = ["id", "title", "content", "published_date", "author__name", "status", "active", "comment_count"]
+
+    @property
+    def prefetch_related_fields(self):
+        return [latest_comments_prefetch()]
+
+    def get_cache_scopes(self):
+        return [POST_DETAIL_SCOPE, post_scope(self.kwargs["pk"])]
+
+    def get_conditional_state(self):
+        with primary_reads():
+            return self.cached_validators() or post_conditional_state(Post.objects.filter(active=True), self.kwargs["pk"])
+
+
+class PostBatchAPI(ValuesReadMixin, QueryPlanMixin, generics.ListAPIView):
+    """
+    ``GET /api/posts/batch/?ids=3,1,2``: the detail representation of several
+    posts in one query (plus one for their comments), in the order asked for.
+    Unknown and inactive ids are left out.
+    """
+
+    queryset = Post.objects.filter(active=True)
+    serializer_class = PostDetailSerializer
+    values_serializer_class = PostDetailValuesSerializer
+    permission_classes = [permissions.AllowAny]
+    renderer_classes = [FastJSONRenderer]
+    pagination_class = None
+    select_related_fields = ["author"]
+    only_fields = PostDetailAPI.only_fields
+
+    @property
+    def prefetch_related_fields(self):
+        return [latest_comments_prefetch()]
+
+    def get_queryset(self):
+        ids = self.get_ids()
+        ids_array = Value(ids, output_field=ArrayField(IntegerField()))
+        position = Func(ids_array, F("id"), function="array_position", output_field=IntegerField())
+        return super().get_queryset().filter(pk__in=ids).annotate(batch_position=position).order_by("batch_position")
+
+    def get_ids(self):
+        try:
+            ids = [int(pk) for pk in self.request.query_params.get("ids", "").split(",") if pk.strip()]
+        except ValueError:
+            raise ValidationError({"ids": ["Expected a comma-separated list of post ids."]})
+        if not ids:
+            raise ValidationError({"ids": ["This parameter is required."]})
+        if len(ids) > settings.POST_BATCH_MAX_IDS:
+            raise ValidationError({"ids": [f"At most {settings.POST_BATCH_MAX_IDS} ids per request."]})
+        return list(dict.fromkeys(ids))
+
+
+class PostTrendingAPI(generics.GenericAPIView):
+    """
+    ``GET /api/posts/trending/``: the hottest active posts first, at most
+    ``TRENDING_SIZE`` (or ``?limit=``). Served from a list cached and rebuilt
+    in the background (see ``blog.trending``), so it may lag by
+    ``TRENDING_REFRESH_SECONDS``.
+    """
+
+    permission_classes = [permissions.AllowAny]
+    renderer_classes = [FastJSONRenderer]
+
+    def get(self, request, *args, **kwargs):
+        return Response(trending_posts()[:self.get_limit()])
+
+    def get_limit(self):
+        field = serializers.IntegerField(min_value=1, max_value=settings.TRENDING_SIZE)
+        try:
+            return field.run_validation(self.request.query_params.get("limit", settings.TRENDING_SIZE))
+        except ValidationError as exc:
+            raise ValidationError({"limit": exc.detail})
+
+
+class PostCommentListAPI(ValuesReadMixin, QueryPlanMixin, generics.ListAPIView):
+    queryset = Comment.objects.all()
+    serializer_class = CommentSerializer
+    values_serializer_class = CommentValuesSerializer
+    permission_classes = [permissions.AllowAny]
+    renderer_classes = [FastJSONRenderer]
+    pagination_class = KeysetPagination
+    select_related_fields = ["user"]
+    only_fields = ["id", "content", "created", "user__username"]
+
+    def get_queryset(self):
+        # Newest first, matching the (post, -created, -id) index.
+        return super().get_queryset().filter(post_id=self.kwargs.get("pk")).order_by("-created", "-id")
+
+    def list(self, request, *args, **kwargs):
+        generics.get_object_or_404(Post.objects.filter(active=True).only("id"), pk=self.kwargs["pk"])
+        return super().list(request, *args, **kwargs)
+
+
+class AuthorPostListAPI(ValuesReadMixin, QueryPlanMixin, generics.ListAPIView):
+    """
+    ``GET /api/authors/<pk>/posts/``: an author's active posts, newest first,
+    cursor-paginated (follow ``next``). The first page is read by primary key
+    from the author's cached post ids (see ``blog.timeline``).
+    """
+
+    queryset = Post.objects.filter(active=True)
+    serializer_class = PostListSerializer
+    values_serializer_class = PostListValuesSerializer
+    permission_classes = [permissions.AllowAny]
+    renderer_classes = [FastJSONRenderer]
+    pagination_class = KeysetPagination
+    select_related_fields = ["author"]
+    only_fields = PostListAPI.only_fields
+    # Ids of the cached first page, set by list(); None reads the index.
+    _first_page_ids = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset().filter(author_id=self.kwargs["pk"])
+        if self._first_page_ids is not None:
+            queryset = queryset.filter(pk__in=self._first_page_ids)
+        # Matches the (author, -published_date, -id) index.
+        return queryset.order_by(*TIMELINE_ORDERING)
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator.cursor_query_param not in request.query_params:
+            ids = cached_timeline(self.kwargs["pk"])
+            if ids is None:
+                generics.get_object_or_404(Author.objects.only("id"), pk=self.kwargs["pk"])
+                ids = warm_timeline(self.kwargs["pk"])
+            self._first_page_ids = first_page_ids(ids, self.paginator.get_page_size(request))
+        else:
+            generics.get_object_or_404(Author.objects.only("id"), pk=self.kwargs["pk"])
+        return super().list(request, *args, **kwargs)
 
 
 class PostCreateAPI(generics.CreateAPIView):
     serializer_class = PostCreateSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+
+class PostBulkCreateAPI(generics.CreateAPIView):
+    """Create up to ``BULK_CREATE_MAX_ITEMS`` posts from a JSON array, all or none."""
+
+    serializer_class = PostBulkCreateSerializer
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_serializer(self, *args, **kwargs):
+        return super().get_serializer(*args, many=True, **kwargs)
 
-class PostEditAPI(generics.UpdateAPIView):
+
+class PostEditAPI(ConditionalUpdateMixin, QueryPlanMixin, generics.UpdateAPIView):
     queryset = Post.objects.all()
     serializer_class = PostEditSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    select_related_fields = ["author__user"]
+
+    def get_conditional_state(self):
+        # Same validators as PostDetailAPI, so clients send back the detail ETag in If-Match.
+        return post_conditional_state(Post.objects.all(), self.kwargs["pk"])
 
 
-class PostDeleteAPI(generics.DestroyAPIView):
+class PostDeleteAPI(QueryPlanMixin, generics.DestroyAPIView):
     queryset = Post.objects.all()
     serializer_class = PostListSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    select_related_fields = ["author__user"]
 
     def perform_destroy(self, instance):
         if instance.author.user != self.request.user:
             raise PermissionDenied("You can only delete your own posts.")
-        instance.active = False
-        instance.save()
+        with transaction.atomic():
+            # Decided on the locked row: a second DELETE from a stale instance must not count twice.
+            if not Post.objects.select_for_update().filter(pk=instance.pk, active=True).exists():
+                return
+            instance.active = False
+            instance.save()
+            counters.post_withdrawn(instance)
 
 
 class CommentCreateAPI(generics.CreateAPIView):
+    """
+    Create a comment. With ``COMMENT_WRITE_BEHIND`` it is queued instead:
+    202 with the queue entry, whose ``Location`` reports the outcome once
+    ``flush_comment_queue`` has processed it.
+    """
+
     serializer_class = CommentCreateSerializer
     permission_classes = [permissions.AllowAny]
+
+    def get_serializer_class(self):
+        return QueuedCommentSerializer if settings.COMMENT_WRITE_BEHIND else self.serializer_class
+
+    def create(self, request, *args, **kwargs):
+        if not settings.COMMENT_WRITE_BEHIND:
+            return super().create(request, *args, **kwargs)
+        comment_queue.check_capacity()
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        response["Location"] = reverse("api_comment_queue_status", args=[response.data["token"]])
+        return response
+
+
+class CommentQueueStatusAPI(generics.RetrieveAPIView):
+    """
+    A write-behind comment's status: ``pending``, then ``created`` (with
+    ``comment``) or ``rejected``. Looked up by the random token only the
+    submitter got back, so entries can't be enumerated.
+    """
+
+    queryset = QueuedComment.objects.all()
+    serializer_class = QueuedCommentSerializer
+    permission_classes = [permissions.AllowAny]
+    lookup_field = "token"
+
+
+class CommentBulkCreateAPI(generics.CreateAPIView):
+    """Create up to ``BULK_CREATE_MAX_ITEMS`` comments from a JSON array, all or none."""
+
+    serializer_class = CommentBulkCreateSerializer
+    permission_classes = [permissions.AllowAny]
+
+    def get_serializer(self, *args, **kwargs):
+        return super().get_serializer(*args, many=True, **kwargs)
@@ -12,5 +12,10 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+# Serve the async read views (blog.async_views) in front of the sync ones.
+os.environ.setdefault("ROOT_URLCONF", "core.asgi_urls")
+# Async views run their queries in short-lived threads, which would each keep a persistent
+# connection; close them after every request, or reuse them with DATABASE_POOL=true.
+os.environ.setdefault("DATABASE_CONN_MAX_AGE", "0")
 
 application = get_asgi_application()
@@ -0,0 +1,15 @@
+"""
+URL configuration for ASGI deployments (selected by ``core.asgi``).
+
+The async read views in ``blog.async_urls`` take precedence over the sync
+views at the same paths; everything else is served by ``core.urls``.
+"""
+
+from django.urls import include, path
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path("api/", include("blog.async_urls")),
+    *sync_urlpatterns,
+]
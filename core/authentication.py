@@ -0,0 +1,120 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .metrics import USER_CACHE
+from .timing import phase
+
+
+class UserCache:
+    """
+    Per-process LRU of users keyed by id (a string, like the token claim),
+    bounded by ``AUTH_USER_CACHE_MAX_ENTRIES``, with entries expiring after
+    ``AUTH_USER_CACHE_TIMEOUT`` seconds.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, user):
+        with self._lock:
+            self._entries[user_id] = (user, time.monotonic() + settings.AUTH_USER_CACHE_TIMEOUT)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > settings.AUTH_USER_CACHE_MAX_ENTRIES:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def discard_cached_user(sender, instance, **kwargs):
+    # Other processes only see the change once their copy expires.
+    user_cache.discard(str(getattr(instance, api_settings.USER_ID_FIELD)))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that resolves the token's user id through ``user_cache``
+    instead of selecting from ``auth_user`` on every request.
+
+    Only users that passed simplejwt's checks are cached, and saving or
+    deleting a user evicts it in this process, so a deactivated user is
+    rejected here at once and by other workers within
+    ``AUTH_USER_CACHE_TIMEOUT``. The password-change check runs per token.
+    """
+
+    def authenticate(self, request):
+        with phase("auth"):
+            return super().authenticate(request)
+
+    async def aauthenticate(self, request):
+        """``authenticate`` for async views; only a user cache miss reads the database."""
+        with phase("auth"):
+            header = self.get_header(request)
+            raw_token = self.get_raw_token(header) if header is not None else None
+            if raw_token is None:
+                return None
+            validated_token = self.get_validated_token(raw_token)
+            user_id, user = self.cached_user(validated_token)
+            if user is None:
+                user = await sync_to_async(super().get_user)(validated_token)
+                user_cache.set(user_id, user)
+            return copy.copy(user), validated_token
+
+    def get_user(self, validated_token):
+        user_id, user = self.cached_user(validated_token)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+        # Views may modify request.user; keep the cached instance pristine.
+        return copy.copy(user)
+
+    def cached_user(self, validated_token):
+        """``(user id, cached user or None)`` for the token; raises if the cached user's password changed."""
+        try:
+            # simplejwt writes the claim as a string; normalize older integer claims too.
+            user_id = str(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user = user_cache.get(user_id)
+        USER_CACHE.labels("miss" if user is None else "hit").inc()
+        if user is not None and api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user_id, user
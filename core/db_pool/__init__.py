@@ -0,0 +1,6 @@
+"""
+PostgreSQL backend that keeps connections in a per-process pool.
+
+Select it with ``ENGINE: "core.db_pool"`` and size it with the database's
+``POOL`` dict (see ``DATABASE_POOL`` in ``core.settings``).
+"""
@@ -0,0 +1,85 @@
+import os
+import threading
+
+from django.db.backends.postgresql import base, creation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from .pool import ConnectionPool
+
+POOL_DEFAULTS = {"MAX_SIZE": 4, "TIMEOUT": 10.0, "MAX_LIFETIME": 1800.0, "CHECK_IDLE": 5.0}
+
+_pools = {}
+_pools_pid = os.getpid()
+_pools_lock = threading.Lock()
+
+
+def pool_for(wrapper, conn_params):
+    """The process's pool for ``wrapper``'s alias and connection parameters."""
+    global _pools_pid
+    # Test database setup changes NAME under the same alias, so parameters are part of the key.
+    key = (wrapper.alias, repr(sorted(conn_params.items())))
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # Forked: the parent's sockets aren't ours to reuse or close.
+            _pools.clear()
+            _pools_pid = os.getpid()
+        if key not in _pools:
+            options = {**POOL_DEFAULTS, **wrapper.settings_dict.get("POOL", {})}
+            _pools[key] = ConnectionPool(
+                wrapper.alias,
+                max_size=int(options["MAX_SIZE"]),
+                timeout=float(options["TIMEOUT"]),
+                max_lifetime=float(options["MAX_LIFETIME"]),
+                check_idle=float(options["CHECK_IDLE"]),
+            )
+        return _pools[key]
+
+
+def close_pools():
+    """Close every idle pooled connection in this process."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections to the test database would block DROP DATABASE.
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL wrapper that checks connections out of a ``ConnectionPool``
+    and returns them when Django closes the connection.
+
+    Use it with ``CONN_MAX_AGE = 0``: each request then holds a connection only
+    while it runs, and the pool, not the request thread, keeps it open.
+    """
+
+    creation_class = DatabaseCreation
+
+    def get_new_connection(self, conn_params):
+        opened = []
+
+        def connect():
+            opened.append(True)
+            return super(DatabaseWrapper, self).get_new_connection(conn_params)
+
+        self._pool = pool_for(self, conn_params)
+        connection = self._pool.acquire(connect)
+        # Django still sends connection_created; core.metrics only counts real connects.
+        self.reused_pooled_connection = not opened
+        if not opened:
+            # Normally set by the parent when it connects; see its comments.
+            options = self.settings_dict["OPTIONS"]
+            self.isolation_level = IsolationLevel(options.get("isolation_level", IsolationLevel.READ_COMMITTED))
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            self._pool.release(self.connection)
@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from core.metrics import DB_POOL_CONNECTIONS, DB_POOL_MAX, DB_POOL_TIMEOUTS, DB_POOL_WAIT
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of at most ``max_size`` psycopg2 connections.
+
+    ``acquire`` hands out an idle connection, opens a new one below
+    ``max_size``, or waits up to ``timeout`` seconds for one to come back.
+    Connections idle for more than ``check_idle`` seconds are health-checked
+    with ``SELECT 1`` before reuse, outside the pool's lock. Connections older than ``max_lifetime``,
+    and those returned closed or mid-transaction, are closed and not reused.
+    """
+
+    def __init__(self, alias, max_size, timeout, max_lifetime, check_idle):
+        self.alias = alias
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_idle = check_idle
+        self._idle = deque()  # (connection, opened at, returned at); newest on the right
+        self._opened = {}  # id(connection) -> opened at, for every open connection
+        self._connecting = 0
+        self._cond = threading.Condition()
+        DB_POOL_MAX.labels(alias).set(max_size)
+        self._report()
+
+    @property
+    def size(self):
+        return len(self._opened) + self._connecting
+
+    @property
+    def in_use(self):
+        return len(self._opened) - len(self._idle)
+
+    def acquire(self, connect):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            idle = self._checkout(deadline)
+            if idle is None:
+                break
+            connection, opened, returned = idle
+            # Checked outside the lock, so a slow SELECT 1 doesn't hold up releases and other acquires.
+            if self.reusable(connection, opened, returned):
+                DB_POOL_WAIT.labels(self.alias).observe(time.monotonic() - started)
+                return connection
+            with self._cond:
+                self._discard(connection)
+                self._report()
+                self._cond.notify()
+        try:
+            connection = connect()
+        except Exception:
+            with self._cond:
+                self._connecting -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._connecting -= 1
+            self._opened[id(connection)] = time.monotonic()
+            self._report()
+        DB_POOL_WAIT.labels(self.alias).observe(time.monotonic() - started)
+        return connection
+
+    def _checkout(self, deadline):
+        """
+        Pop the newest idle connection, or return None after reserving a slot
+        to open one; waits for either until ``deadline``.
+        """
+        with self._cond:
+            while True:
+                if self._idle:
+                    idle = self._idle.pop()
+                    self._report()
+                    return idle
+                if self.size < self.max_size:
+                    # Take the slot now; the connection is opened outside the lock.
+                    self._connecting += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    DB_POOL_TIMEOUTS.labels(self.alias).inc()
+                    raise PoolTimeout(
+                        f"No connection to {self.alias!r} became free within {self.timeout}s "
+                        f"({self.max_size} in use); raise the pool's MAX_SIZE or reduce concurrency."
+                    )
+                self._cond.wait(remaining)
+
+    def release(self, connection):
+        with self._cond:
+            opened = self._opened.get(id(connection))
+            if opened is None:
+                connection.close()
+                return
+            if connection.closed or connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                self._discard(connection)
+            elif time.monotonic() - opened > self.max_lifetime:
+                self._discard(connection)
+            else:
+                self._idle.append((connection, opened, time.monotonic()))
+            self._report()
+            self._cond.notify()
+
+    def reusable(self, connection, opened, returned):
+        now = time.monotonic()
+        if connection.closed or now - opened > self.max_lifetime:
+            return False
+        if now - returned <= self.check_idle:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except psycopg2.Error:
+            return False
+        return True
+
+    def close(self):
+        with self._cond:
+            while self._idle:
+                self._discard(self._idle.pop()[0])
+            self._report()
+
+    def _discard(self, connection):
+        self._opened.pop(id(connection), None)
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+
+    def _report(self):
+        DB_POOL_CONNECTIONS.labels(self.alias, "in_use").set(self.in_use)
+        DB_POOL_CONNECTIONS.labels(self.alias, "idle").set(len(self._idle))
@@ -0,0 +1,181 @@
+"""
+Prometheus metrics for the API process, served at ``/metrics``.
+
+Under gunicorn, ``gunicorn.conf.py`` sets ``PROMETHEUS_MULTIPROC_DIR`` before
+any worker imports ``prometheus_client``, so every worker writes its samples
+to memory-mapped files in that directory and ``/metrics`` merges them: the
+numbers are the same whichever worker answers the scrape. Without the
+variable (runserver, tests) the process-local registry is used.
+
+Views are labelled by URL name (``api_post_list``...), never by path, so
+label cardinality stays bounded.
+"""
+import hmac
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from .queries import observe_queries
+
+UNRESOLVED = "<unresolved>"
+
+REQUESTS = Counter(
+    "api_requests_total", "Requests by view, method and status code.", ["view", "method", "status"]
+)
+LATENCY = Histogram(
+    "api_request_duration_seconds",
+    "Request latency by view.",
+    ["view", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0),
+)
+QUERIES = Histogram(
+    "api_request_queries",
+    "SQL statements per request by view.",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+DB_TIME = Histogram(
+    "api_request_db_seconds",
+    "Time spent in SQL per request by view.",
+    ["view"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+RESPONSE_CACHE = Counter(
+    "api_response_cache_total",
+    "Response cache lookups by view and result (hit, stale, miss, wait).",
+    ["view", "result"],
+)
+USER_CACHE = Counter("api_auth_user_cache_total", "Authenticated user cache lookups by result.", ["result"])
+DB_CONNECTIONS = Counter(
+    "api_db_connections_opened_total",
+    "Database connections opened by alias; a high rate relative to requests means connections aren't reused.",
+    ["alias"],
+)
+# Pool gauges are summed over live workers; see core.db_pool.
+DB_POOL_CONNECTIONS = Gauge(
+    "api_db_pool_connections",
+    "Pooled database connections by alias and state (in_use, idle).",
+    ["alias", "state"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_MAX = Gauge(
+    "api_db_pool_max_connections",
+    "Pool capacity by alias; in_use reaching it means requests queue for a connection.",
+    ["alias"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+    "api_db_pool_wait_seconds",
+    "Time to check a connection out of the pool by alias.",
+    ["alias"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "api_db_pool_timeouts_total", "Checkouts that gave up waiting for a free pooled connection.", ["alias"]
+)
+
+
+def view_label(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNRESOLVED
+    return match.url_name or match.view_name or UNRESOLVED
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    if getattr(connection, "reused_pooled_connection", False):
+        return
+    DB_CONNECTIONS.labels(connection.alias).inc()
+
+
+class QueryCounter:
+    """Query observer counting statements and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """Record latency, status and SQL use of every request, labelled by view."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with observe_queries(QueryCounter()) as queries:
+            response = self.get_response(request)
+        self.record(request, response, started, queries)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with observe_queries(QueryCounter()) as queries:
+            response = await self.get_response(request)
+        self.record(request, response, started, queries)
+        return response
+
+    @staticmethod
+    def record(request, response, started, queries):
+        view = view_label(request)
+        LATENCY.labels(view, request.method).observe(time.perf_counter() - started)
+        REQUESTS.labels(view, request.method, str(response.status_code)).inc()
+        QUERIES.labels(view).observe(queries.count)
+        DB_TIME.labels(view).observe(queries.seconds)
+
+
+def metrics_registry():
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+LOCAL_ADDRESSES = {"127.0.0.1", "::1"}
+
+
+def metrics_view(request):
+    """
+    Prometheus text exposition. Requires ``Bearer METRICS_TOKEN``; without a
+    token, only local requests under ``DEBUG`` (runserver) are answered.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        if not (settings.DEBUG and request.META.get("REMOTE_ADDR") in LOCAL_ADDRESSES):
+            return HttpResponseForbidden()
+    elif not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(metrics_registry()), content_type=CONTENT_TYPE_LATEST)
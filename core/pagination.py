@@ -1,29 +1,363 @@
+import base64
+import binascii
+import hashlib
+import json
 import math
+from functools import reduce
+from operator import or_
 
-from rest_framework.pagination import PageNumberPagination
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .routers import pinned_to_primary, primary_reads
+
+
+def count_version_key(model):
+    return f'pagination-count-version:{model._meta.label_lower}'
+
+
+def invalidate_counts(model):
+    """Drop every cached count for ``model`` by moving to a new cache version."""
+    key = count_version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+
+
+class CountingPaginator(Paginator):
+    """
+    Paginator whose ``count`` avoids a ``SELECT COUNT(*)`` where it can.
+
+    Exact counts are cached per normalized query (the SQL without ORDER BY)
+    and dropped through ``invalidate_counts`` when the model is written. Above
+    ``PAGINATION_COUNT_ESTIMATE_THRESHOLD`` rows the planner's estimate is used
+    instead, since an exact count of a large set costs a full scan.
+
+    Cached counts are counted on the primary, and clients pinned there after
+    a write neither read nor store them (see ``core.routers``).
+    """
+
+    @cached_property
+    def count(self):
+        self.estimated = False
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return len(queryset)
+
+        queryset = queryset.order_by()
+        sql, params = queryset.query.sql_with_params()
+        version = cache.get_or_set(count_version_key(queryset.model), 1, None)
+        digest = hashlib.sha1(f'{sql}|{params!r}'.encode()).hexdigest()
+        key = f'pagination-count:{queryset.model._meta.label_lower}:{version}:{digest}'
+
+        pinned = pinned_to_primary()
+        cached = None if pinned else cache.get(key)
+        if cached is not None:
+            self.estimated, total = cached
+            return total
+
+        with primary_reads():
+            estimate = self.estimate_count(queryset, sql, params)
+            if estimate is not None and estimate >= settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD:
+                self.estimated, total = True, estimate
+            else:
+                total = queryset.count()
+        if not pinned:
+            cache.set(key, (self.estimated, total), settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+        return total
+
+    @staticmethod
+    def estimate_count(queryset, sql, params):
+        """
+        Planner row estimate for the query, or None when an exact count is cheap.
+
+        The table-wide ``pg_class.reltuples`` is checked first (and cached briefly):
+        a filtered set can't be larger than its table, so small tables skip EXPLAIN.
+        """
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        table = queryset.model._meta.db_table
+
+        def table_rows():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [table])
+                return int(cursor.fetchone()[0])
+
+        # reltuples is -1 until the table has been analyzed, in which case ask the planner.
+        if 0 <= cache.get_or_set(f'pagination-reltuples:{table}', table_rows, 60) < settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class UncountedPage(Page):
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class UncountedPaginator(Paginator):
+    """
+    Paginator that never counts: it fetches one extra row to know whether
+    a next page exists. Used for ``?count=false``.
+    """
+
+    known_pages = 1
+
+    @property
+    def num_pages(self):
+        # Only the pages seen so far are known, which is all DRF's page controls need.
+        return self.known_pages
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('That page contains no results')
+        self.known_pages = number + 1 if len(rows) > self.per_page else number
+        return UncountedPage(rows[:self.per_page], number, self, has_next=len(rows) > self.per_page)
 
 
 class CustomPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 1000
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.include_count = request.query_params.get(self.count_query_param, '').lower() not in ('false', '0')
+        self.django_paginator_class = CountingPaginator if self.include_count else UncountedPaginator
+        return super().paginate_queryset(queryset, request, view)
 
     def get_paginated_response(self, data):
         params = self.request.query_params
 
-        page_size = int(params.get('page_size', 10))
-        total_count = self.page.paginator.count
-        total_pages = math.ceil(total_count/page_size)
-
-        return Response({
+        response = {
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
             'next_page': int(params.get('page', 1))+1 if self.page.has_next() else None,
             'previous_page': int(params.get('page', 1))-1 if self.page.has_previous() else None,
             'current_page': int(params.get('page', 1)),
-            'total_pages': total_pages,
-            'total_count': total_count,
+        }
+        if self.include_count:
+            paginator = self.page.paginator
+            total_count = paginator.count
+            response['total_pages'] = math.ceil(total_count/paginator.per_page)
+            response['total_count'] = total_count
+            response['count_estimated'] = paginator.estimated
+        response['current_count'] = len(data)
+        response['results'] = data
+        return Response(response)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on the ordering columns instead of OFFSET.
+
+    The ordering comes from the queryset (so ``OrderingFilter`` choices are
+    honoured) with the primary key appended as a tie-breaker, e.g.
+    ``(-published_date, -id)`` for posts. The cursor stores the ordering values
+    of the last (or first) row of the page, so deep pages cost the same as the
+    first one and inserts never shift results between pages. Nullable
+    ordering fields follow Postgres and sort NULLs as the largest value.
+    """
+
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.nullable = {
+            field.lstrip('-') for field in self.ordering
+            if getattr(self.resolve_field(queryset.model, field.lstrip('-')), 'null', False)
+        }
+        position, reverse = self.decode_cursor(request, queryset.model)
+
+        if position is not None:
+            queryset = queryset.filter(self.seek_filter(position, reverse))
+        order_by = [self.invert(field) for field in self.ordering] if reverse else self.ordering
+        rows = list(queryset.order_by(*order_by)[:self.page_size + 1])
+
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
             'current_count': len(data),
             'results': data,
-        })
\ No newline at end of file
+        })
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering or [])
+        if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            descending = bool(ordering) and ordering[0].startswith('-')
+            ordering.append('-pk' if descending else 'pk')
+        return ordering
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def seek_filter(self, position, reverse):
+        """
+        Rows strictly after ``position`` in ordering order (before it when paging back).
+
+        Expands the row comparison into ``a < x OR (a = x AND b < y) ...`` plus a
+        redundant bound on the first column so the planner can use its index.
+        """
+        clauses = []
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            clauses.append(equal & self.compare(name, value, 'lt' if descending else 'gt'))
+            equal &= Q(**{f'{name}__isnull': True} if value is None else {name: value})
+        first = self.ordering[0]
+        bound = self.compare(first.lstrip('-'), position[0], 'lte' if first.startswith('-') != reverse else 'gte')
+        return bound & reduce(or_, clauses)
+
+    def compare(self, name, value, lookup):
+        """``name <lookup> value`` where NULL, if the column allows it, is larger than anything."""
+        if name not in self.nullable:
+            return Q(**{f'{name}__{lookup}': value})
+        if lookup.startswith('gt'):
+            if value is None:
+                return Q(**{f'{name}__isnull': True}) if lookup == 'gte' else Q(pk__in=[])
+            return Q(**{f'{name}__{lookup}': value}) | Q(**{f'{name}__isnull': True})
+        if value is None:
+            return Q() if lookup == 'lte' else Q(**{f'{name}__isnull': False})
+        return Q(**{f'{name}__{lookup}': value})
+
+    def get_position(self, row):
+        return [self.get_row_value(row, field.lstrip('-')) for field in self.ordering]
+
+    @staticmethod
+    def get_row_value(row, lookup):
+        if isinstance(row, dict):
+            return row['id'] if lookup == 'pk' else row[lookup]
+        for attr in lookup.split(LOOKUP_SEP):
+            row = getattr(row, attr)
+        return row
+
+    @staticmethod
+    def resolve_field(model, lookup):
+        if lookup == 'pk':
+            return model._meta.pk
+        field = None
+        for name in lookup.split(LOOKUP_SEP):
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # Annotations such as search_rank round-trip as plain JSON values.
+                return None
+            model = field.related_model or model
+        return field
+
+    def encode_cursor(self, position, reverse=False):
+        # isoformat() keeps full microsecond precision, which the seek comparison needs.
+        position = [value.isoformat() if hasattr(value, 'isoformat') else value for value in position]
+        payload = json.dumps({'o': self.ordering, 'p': position, 'r': reverse})
+        encoded = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            if payload['o'] != self.ordering or len(payload['p']) != len(self.ordering):
+                raise ValueError('cursor does not match the requested ordering')
+            position = []
+            for field, value in zip(self.ordering, payload['p']):
+                model_field = self.resolve_field(model, field.lstrip('-'))
+                position.append(model_field.to_python(value) if model_field is not None else value)
+            return position, bool(payload['r'])
+        except (binascii.Error, KeyError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+
+class FeedPagination(CustomPagination):
+    """
+    Page-number pagination by default, keyset pagination once the client
+    sends ``?cursor=`` (an empty cursor starts from the first page).
+    """
+
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,49 @@
+"""
+Per-request observation of SQL statements.
+
+``observe_queries(observer)`` passes every statement run by the current
+request through ``observer``, an ``execute_wrapper``-style callable. That
+covers every database alias, and also the threads that the async ORM hands
+work to. Observers live in a context variable, which ``sync_to_async``
+carries into those threads, whereas a per-request
+``connection.execute_wrapper`` would only see the calling thread's
+connection. A single permanent wrapper, installed on each connection,
+dispatches to them.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_observers = ContextVar("query_observers", default=())
+
+
+def dispatch(execute, sql, params, many, context):
+    for observer in reversed(_observers.get()):
+        execute = partial(observer, execute)
+    return execute(sql, params, many, context)
+
+
+def install(connection):
+    if dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.append(dispatch)
+
+
+@receiver(connection_created)
+def install_on_connect(sender, connection, **kwargs):
+    install(connection)
+
+
+@contextmanager
+def observe_queries(observer):
+    # Connections opened before this module was imported never sent connection_created.
+    for connection in connections.all():
+        install(connection)
+    token = _observers.set((*_observers.get(), observer))
+    try:
+        yield observer
+    finally:
+        _observers.reset(token)
@@ -0,0 +1,115 @@
+import csv
+import io
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .timing import phase
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` that encodes with orjson when it is installed.
+
+    Output is byte-identical to DRF's compact, non-ASCII-escaping encoding for
+    the data our serializers produce: datetimes and other non-native values go
+    through DRF's encoder, ``U+2028``/``U+2029`` are escaped the same way, and
+    anything orjson rejects (e.g. integers over 64 bits) falls back to the
+    stdlib encoder, as does indented output (``Accept: ...; indent=4``).
+    Unlike the stdlib, orjson writes non-finite floats as ``null``.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with phase("render"):
+            return self.encode(data, accepted_media_type, renderer_context)
+
+    def encode(self, data, accepted_media_type, renderer_context):
+        if (
+            data is None
+            or orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except (TypeError, orjson.JSONEncodeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline-delimited JSON, one object per line.
+
+    Streaming views call ``header()`` once and then ``encode_rows()`` per batch.
+    ``render()`` handles ordinary responses, such as errors, the same way.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def __init__(self):
+        self.json = FastJSONRenderer()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        return self.encode_rows(rows, None)
+
+    def header(self, fields):
+        return b""
+
+    def encode_rows(self, rows, fields):
+        return b"".join(self.json.encode(row, None, None) + b"\n" for row in rows)
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    CSV with a header row. Lists and objects in a cell are written as JSON.
+
+    Like ``NDJSONRenderer``, it can stream: ``header()`` once, then
+    ``encode_rows()`` per batch.
+    """
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def __init__(self):
+        self.json = FastJSONRenderer()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        fields = list(rows[0]) if rows else []
+        return self.header(fields) + self.encode_rows(rows, fields)
+
+    def header(self, fields):
+        return self.write([fields])
+
+    def encode_rows(self, rows, fields):
+        return self.write([self.cell(row.get(field)) for field in fields] for row in rows)
+
+    def cell(self, value):
+        if isinstance(value, (list, dict)):
+            return self.json.encode(value, None, None).decode()
+        return "" if value is None else value
+
+    @staticmethod
+    def write(rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
@@ -0,0 +1,214 @@
+"""
+Read-replica routing (``DATABASE_REPLICAS``).
+
+``ReplicaRoutingMiddleware`` marks safe-method requests as replica readers.
+``ReplicaRouter`` then sends their reads to a replica picked once per
+request. Reads outside requests, like management commands, still go to the
+primary. Every write goes to the primary.
+
+Read-your-writes: after a successful write request, the client is pinned
+to the primary for ``REPLICA_PIN_SECONDS``. Pinning sets a cookie and also
+a cache entry keyed by the ``Authorization`` header, so JWT clients that
+ignore cookies are pinned too.
+
+A replica that fails to connect is skipped for ``REPLICA_RETRY_SECONDS``
+in this process; with none left, reads fall back to the primary.
+
+Shared caches (responses, counts, trending, timelines) would otherwise carry
+a lagging replica's rows to every client, the pinned writer included. So
+they are only filled inside ``primary_reads()``, and pinned requests skip
+them (``pinned_to_primary()``).
+"""
+import hashlib
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.functional import cached_property
+
+logger = logging.getLogger("core.routers")
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+PIN_COOKIE = "replica_pin"
+
+_routing = ContextVar("replica_routing", default=None)
+
+
+class ReplicaHealth:
+    """Per-process record of replicas that recently failed to connect."""
+
+    def __init__(self):
+        self._down_until = {}
+        self._lock = threading.Lock()
+
+    def is_down(self, alias):
+        with self._lock:
+            return self._down_until.get(alias, 0) > time.monotonic()
+
+    def mark_down(self, alias):
+        with self._lock:
+            self._down_until[alias] = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+
+    def usable(self, alias):
+        """Whether ``alias`` is up, opening its connection for this request if needed."""
+        if self.is_down(alias):
+            return False
+        connection = connections[alias]
+        if connection.connection is not None:
+            return True
+        try:
+            connection.ensure_connection()
+        except DatabaseError:
+            logger.warning("Replica %s is unavailable; reading from the primary", alias, exc_info=True)
+            self.mark_down(alias)
+            return False
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._down_until.clear()
+
+
+replica_health = ReplicaHealth()
+
+
+def pin_key(request):
+    authorization = request.headers.get("Authorization")
+    if not authorization:
+        return None
+    return f"replica-pin:{hashlib.sha1(authorization.encode()).hexdigest()}"
+
+
+def is_pinned(request):
+    if PIN_COOKIE in request.COOKIES:
+        return True
+    key = pin_key(request)
+    return key is not None and cache.get(key) is not None
+
+
+def pin_to_primary(request, response):
+    seconds = settings.REPLICA_PIN_SECONDS
+    key = pin_key(request)
+    if key is not None:
+        cache.set(key, 1, seconds)
+    response.set_cookie(PIN_COOKIE, "1", max_age=seconds, httponly=True, samesite="Lax")
+
+
+class ReplicaRead:
+    """The replica a safe request reads from, chosen on its first query."""
+
+    def __init__(self, request):
+        self.request = request
+        self.chosen = False
+        self.alias = None
+        # Depth of primary_reads() blocks.
+        self.primary_only = 0
+
+    @cached_property
+    def pinned(self):
+        return is_pinned(self.request)
+
+    def read_alias(self):
+        if self.primary_only:
+            return None
+        if not self.chosen:
+            self.alias = self.choose()
+            self.chosen = True
+        return self.alias
+
+    def choose(self):
+        if self.pinned:
+            return None
+        replicas = list(settings.REPLICA_DATABASES)
+        random.shuffle(replicas)
+        return next((alias for alias in replicas if replica_health.usable(alias)), None)
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block, e.g. to fill a cache other clients read."""
+    read = _routing.get()
+    if read is None:
+        yield
+        return
+    read.primary_only += 1
+    try:
+        yield
+    finally:
+        read.primary_only -= 1
+
+
+def pinned_to_primary():
+    """Whether the current request is pinned after a write, so must not use shared caches."""
+    read = _routing.get()
+    return read is not None and read.pinned
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        read = _routing.get()
+        # None lets Django use the primary.
+        return read.read_alias() if read is not None else None
+
+    def db_for_write(self, model, **hints):
+        # Explicit, or instances read from a replica would be saved back to it.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary.
+        return False if db in settings.REPLICA_DATABASES else None
+
+
+class ReplicaRoutingMiddleware:
+    """Route reads of safe requests to replicas and pin writers to the primary."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _routing.set(self.routing_for(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        token = _routing.set(self.routing_for(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(request, response)
+
+    @staticmethod
+    def routing_for(request):
+        if not settings.REPLICA_DATABASES or request.method not in SAFE_METHODS:
+            return None
+        return ReplicaRead(request)
+
+    @staticmethod
+    def finish(request, response):
+        if settings.REPLICA_DATABASES and request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request, response)
+        return response
@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework_simplejwt",
     "blog",
@@ -45,6 +46,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.timing.ServerTimingMiddleware",
+    "core.metrics.MetricsMiddleware",
+    "core.routers.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -54,7 +58,7 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-ROOT_URLCONF = "core.urls"
+ROOT_URLCONF = os.getenv("ROOT_URLCONF", "core.urls")
 
 TEMPLATES = [
     {
@@ -85,9 +89,74 @@ DATABASES = {
         "PASSWORD": os.getenv("DATABASE_PASSWORD"),
         "HOST": os.getenv("DATABASE_HOST", "db"),
         "PORT": os.getenv("DATABASE_PORT", "5432"),
+        # Keep each thread's connection open for this many seconds ("none": no limit, 0: close
+        # after every request), checking it still works before the first query of a request.
+        "CONN_MAX_AGE": (
+            None
+            if os.getenv("DATABASE_CONN_MAX_AGE", "").lower() == "none"
+            else int(os.getenv("DATABASE_CONN_MAX_AGE", 60))
+        ),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# In-process connection pool (core.db_pool): requests check a connection out of a pool of at
+# most DATABASE_POOL_MAX_SIZE per process and return it when they finish, instead of each
+# thread keeping its own. Size it to the worker's threads; across the deployment it opens
+# up to workers x DATABASE_POOL_MAX_SIZE connections per database.
+if os.getenv("DATABASE_POOL", "false").lower() == "true":
+    DATABASES["default"].update(
+        ENGINE="core.db_pool",
+        CONN_MAX_AGE=0,
+        POOL={
+            "MAX_SIZE": int(os.getenv("DATABASE_POOL_MAX_SIZE", 4)),
+            "TIMEOUT": float(os.getenv("DATABASE_POOL_TIMEOUT", 10)),
+            "MAX_LIFETIME": float(os.getenv("DATABASE_POOL_MAX_LIFETIME", 1800)),
+            "CHECK_IDLE": float(os.getenv("DATABASE_POOL_CHECK_IDLE", 5)),
+        },
+    )
+
+# Read replicas (core.routers): DATABASE_REPLICAS="host[:port][/name],..." adds aliases
+# replica1, replica2, ... with the primary's credentials. Safe-method requests read from
+# them; a client that wrote is pinned to the primary for REPLICA_PIN_SECONDS, and a replica
+# that fails to connect is skipped for REPLICA_RETRY_SECONDS.
+REPLICA_DATABASES = []
+for number, replica in enumerate(filter(None, os.getenv("DATABASE_REPLICAS", "").split(",")), start=1):
+    address, _, name = replica.strip().partition("/")
+    host, _, port = address.partition(":")
+    DATABASES[f"replica{number}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "NAME": name or DATABASES["default"]["NAME"],
+        "TEST": {"MIRROR": "default"},
+    }
+    REPLICA_DATABASES.append(f"replica{number}")
+
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", 5))
+REPLICA_RETRY_SECONDS = int(os.getenv("REPLICA_RETRY_SECONDS", 30))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# In-process LRU by default (tests, single process); set REDIS_URL to share it across workers.
+
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", 10000))},
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -135,9 +204,13 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication", 
-        "rest_framework_simplejwt.authentication.JWTAuthentication", 
+        "core.authentication.CachedJWTAuthentication",
     ],
     'DEFAULT_PAGINATION_CLASS': 'core.pagination.CustomPagination',
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
@@ -146,4 +219,85 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=int(os.getenv("SIMPLE_JWT_ACCESS_TOKEN_LIFETIME", 10))),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=int(os.getenv("SIMPLE_JWT_REFRESH_TOKEN_LIFETIME", 20))),
-}
\ No newline at end of file
+}
+
+# Pagination counts: above this many (planner-estimated) rows the estimate is
+# returned instead of running COUNT(*). Exact counts are cached per query.
+PAGINATION_COUNT_ESTIMATE_THRESHOLD = int(os.getenv("PAGINATION_COUNT_ESTIMATE_THRESHOLD", 100000))
+PAGINATION_COUNT_CACHE_TIMEOUT = int(os.getenv("PAGINATION_COUNT_CACHE_TIMEOUT", 300))
+
+# Response cache for public post endpoints (blog.cache). Entries are served fresh for
+# RESPONSE_CACHE_TIMEOUT seconds, then stale for up to RESPONSE_CACHE_STALE_TIMEOUT more
+# while one worker refreshes them.
+RESPONSE_CACHE_ALIAS = os.getenv("RESPONSE_CACHE_ALIAS", "default")
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", 60))
+RESPONSE_CACHE_STALE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_STALE_TIMEOUT", 30))
+RESPONSE_CACHE_LOCK_TIMEOUT = 10
+RESPONSE_CACHE_LOCK_WAIT = 2.0
+
+# Read endpoints render from .values() rows (blog.fast_serializers) instead of ModelSerializer.
+FAST_SERIALIZATION = os.getenv("FAST_SERIALIZATION", "true").lower() == "true"
+
+# Posts fetched per server-side cursor round trip (and comment query) by the streaming export.
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 2000))
+
+# Largest array accepted by /api/posts/bulk/ and /api/comments/bulk/, and most ids per
+# /api/posts/batch/ call.
+BULK_CREATE_MAX_ITEMS = int(os.getenv("BULK_CREATE_MAX_ITEMS", 500))
+POST_BATCH_MAX_IDS = int(os.getenv("POST_BATCH_MAX_IDS", 100))
+
+# Write-behind comments: /api/comments/create/ enqueues the comment (202 + a status URL) and
+# flush_comment_queue inserts queued comments in batches of COMMENT_QUEUE_FLUSH_SIZE, polling
+# every COMMENT_QUEUE_FLUSH_INTERVAL seconds. Past COMMENT_QUEUE_MAX_PENDING queued comments
+# the endpoint answers 503 with Retry-After.
+COMMENT_WRITE_BEHIND = os.getenv("COMMENT_WRITE_BEHIND", "false").lower() == "true"
+COMMENT_QUEUE_FLUSH_SIZE = int(os.getenv("COMMENT_QUEUE_FLUSH_SIZE", 500))
+COMMENT_QUEUE_FLUSH_INTERVAL = float(os.getenv("COMMENT_QUEUE_FLUSH_INTERVAL", 1.0))
+COMMENT_QUEUE_MAX_PENDING = int(os.getenv("COMMENT_QUEUE_MAX_PENDING", 10000))
+# Flushed entries stay pollable for this long.
+COMMENT_QUEUE_RETENTION_HOURS = int(os.getenv("COMMENT_QUEUE_RETENTION_HOURS", 24))
+
+# /api/posts/trending/ lists the TRENDING_SIZE posts with the highest Post.hot_score, where
+# publication and each comment count 1 and halve every TRENDING_HALF_LIFE_HOURS (run
+# refresh_hot_scores after changing it). The list is rebuilt in the background once it is
+# TRENDING_REFRESH_SECONDS old.
+TRENDING_SIZE = int(os.getenv("TRENDING_SIZE", 50))
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", 12))
+TRENDING_REFRESH_SECONDS = int(os.getenv("TRENDING_REFRESH_SECONDS", 30))
+
+# /api/authors/<id>/posts/ keeps the ids of each author's AUTHOR_TIMELINE_CACHE_SIZE newest
+# posts cached for AUTHOR_TIMELINE_CACHE_TIMEOUT seconds, rebuilt whenever one of them changes.
+AUTHOR_TIMELINE_CACHE_SIZE = int(os.getenv("AUTHOR_TIMELINE_CACHE_SIZE", 100))
+AUTHOR_TIMELINE_CACHE_TIMEOUT = int(os.getenv("AUTHOR_TIMELINE_CACHE_TIMEOUT", 3600))
+
+# Post detail embeds only this many of the newest comments; the rest are paged at
+# /api/posts/<id>/comments/.
+POST_DETAIL_COMMENT_LIMIT = int(os.getenv("POST_DETAIL_COMMENT_LIMIT", 20))
+
+# CachedJWTAuthentication keeps users in a per-process LRU instead of reading auth_user
+# on every request. Changes are seen at once by the writing process and by the others
+# within AUTH_USER_CACHE_TIMEOUT seconds.
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv("AUTH_USER_CACHE_TIMEOUT", 30))
+AUTH_USER_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_USER_CACHE_MAX_ENTRIES", 1024))
+
+# core.timing.ServerTimingMiddleware times this fraction of requests (0 disables it),
+# adds a Server-Timing header to them and logs one JSON line each to "core.timing".
+# Statements repeated SERVER_TIMING_REPEAT_THRESHOLD times in a request log a warning.
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv("SERVER_TIMING_SAMPLE_RATE", 0.01))
+SERVER_TIMING_HEADER = os.getenv("SERVER_TIMING_HEADER", "true").lower() == "true"
+SERVER_TIMING_REPEAT_THRESHOLD = int(os.getenv("SERVER_TIMING_REPEAT_THRESHOLD", 10))
+
+# /metrics (core.metrics) requires "Authorization: Bearer <METRICS_TOKEN>". Unset, it only
+# answers local requests while DEBUG is on.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "core.timing": {"handlers": ["console"], "level": "INFO"},
+    },
+}
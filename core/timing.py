@@ -0,0 +1,192 @@
+"""
+Sampled per-request timing: ``ServerTimingMiddleware`` plus the ``phase()``
+hooks that code on the request path wraps its work in.
+
+A sampled request gets a ``RequestTimer`` in a context variable. Phases nest
+and record exclusive time, so the SQL a lazy queryset runs while it is being
+serialized counts towards ``db`` and not ``serialize``. Every statement on every
+database connection is counted and timed (see ``core.queries``), and
+statements repeated with the same parameters are reported as duplicates.
+Unsampled requests only pay for one ``random()`` call and a context variable
+lookup per hook.
+"""
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .queries import observe_queries
+
+logger = logging.getLogger("core.timing")
+
+_timer = ContextVar("request_timer", default=None)
+
+# Server-Timing entries, in header order.
+PHASES = ("auth", "cache", "db", "view", "serialize", "render")
+PHASE_DESCRIPTIONS = {"view": "view code, excluding serialization"}
+
+
+class RequestTimer:
+    """Exclusive time per phase and the SQL statements run during one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = Counter()
+        self.statements = Counter()
+        self.executions = Counter()
+        self._stack = []
+
+    def enter(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self):
+        name, started, nested = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        self.phases[name] += elapsed - nested
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def close(self):
+        while self._stack:
+            self.exit()
+        return time.perf_counter() - self.started
+
+    def __call__(self, execute, sql, params, many, context):
+        """Query observer: time each statement as a ``db`` phase."""
+        self.enter("db")
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.exit()
+            self.statements[sql] += 1
+            self.executions[sql, repr(params)] += 1
+
+    @property
+    def query_count(self):
+        return sum(self.statements.values())
+
+    @property
+    def duplicate_count(self):
+        """Statements that repeated an earlier one with identical parameters."""
+        return sum(n - 1 for n in self.executions.values())
+
+    def repeated_statements(self, threshold):
+        """``(sql, count)`` of statements run at least ``threshold`` times, most frequent first."""
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+@contextmanager
+def phase(name):
+    """Attribute the enclosed block to ``name`` when the current request is sampled."""
+    timer = _timer.get()
+    if timer is None:
+        yield
+        return
+    timer.enter(name)
+    try:
+        yield
+    finally:
+        timer.exit()
+
+
+def server_timing_header(timer, total):
+    entries = []
+    for name in PHASES:
+        if name not in timer.phases:
+            continue
+        entry = f"{name};dur={timer.phases[name] * 1000:.2f}"
+        if name == "db":
+            entry += f';desc="{timer.query_count} queries, {timer.duplicate_count} duplicate"'
+        elif name in PHASE_DESCRIPTIONS:
+            entry += f';desc="{PHASE_DESCRIPTIONS[name]}"'
+        entries.append(entry)
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+class ServerTimingMiddleware:
+    """
+    Time a sample of requests (``SERVER_TIMING_SAMPLE_RATE``), add a
+    ``Server-Timing`` header to their response (unless ``SERVER_TIMING_HEADER``
+    is off) and log one JSON line per request to the ``core.timing`` logger.
+    Statements run ``SERVER_TIMING_REPEAT_THRESHOLD`` times or more are logged
+    as a warning, which usually means an N+1 query.
+
+    Keep it first in ``MIDDLEWARE`` so ``total`` covers the other middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django calls a coroutine process_view directly instead of in a thread.
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+        timer = RequestTimer()
+        token = _timer.set(timer)
+        try:
+            with observe_queries(timer):
+                response = self.get_response(request)
+        finally:
+            _timer.reset(token)
+        return self.finish(request, response, timer)
+
+    async def __acall__(self, request):
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return await self.get_response(request)
+        timer = RequestTimer()
+        token = _timer.set(timer)
+        try:
+            with observe_queries(timer):
+                response = await self.get_response(request)
+        finally:
+            _timer.reset(token)
+        return self.finish(request, response, timer)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.start_view()
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.start_view()
+
+    @staticmethod
+    def start_view():
+        # Closed by RequestTimer.close() once the response, rendering included, is back.
+        timer = _timer.get()
+        if timer is not None:
+            timer.enter("view")
+
+    def finish(self, request, response, timer):
+        total = timer.close()
+        if settings.SERVER_TIMING_HEADER:
+            response.headers["Server-Timing"] = server_timing_header(timer, total)
+        self.log(request, response, timer, total)
+        return response
+
+    def log(self, request, response, timer, total):
+        repeated = timer.repeated_statements(settings.SERVER_TIMING_REPEAT_THRESHOLD)
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 2),
+            **{f"{name}_ms": round(timer.phases[name] * 1000, 2) for name in PHASES if name in timer.phases},
+            "queries": timer.query_count,
+            "duplicate_queries": timer.duplicate_count,
+            "repeated_statements": [{"sql": sql[:500], "count": n} for sql, n in repeated],
+        }
+        logger.log(logging.WARNING if repeated else logging.INFO, json.dumps(record), extra={"timing": record})
@@ -25,6 +25,8 @@ from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
 
+from core.metrics import metrics_view
+
 
 schema_view = get_schema_view(
    openapi.Info(
@@ -52,4 +54,7 @@ urlpatterns = [
     # JWT
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+
+    # Prometheus
+    path("metrics", metrics_view, name="metrics"),
 ]
@@ -0,0 +1,35 @@
+"""
+Gunicorn settings for the production image (``gunicorn core.wsgi:application -c gunicorn.conf.py``).
+
+Workers share their Prometheus samples through files in PROMETHEUS_MULTIPROC_DIR
+(see core.metrics). The directory is emptied when the server starts, and a dead
+worker's files are marked so its counters keep counting but its gauges are dropped.
+With more than one worker the server refuses to start unless REDIS_URL is set.
+"""
+import os
+import shutil
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", 3))
+# Threads per sync worker; with DATABASE_POOL=true, keep DATABASE_POOL_MAX_SIZE at least this.
+threads = int(os.getenv("GUNICORN_THREADS", 1))
+# "uvicorn.workers.UvicornWorker" with core.asgi:application serves the async views.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+
+# Must be set before any worker imports prometheus_client.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus-multiproc")
+
+
+def on_starting(server):
+    # Cache invalidation (blog.cache, blog.signals) only reaches other workers through a shared cache.
+    if workers > 1 and not os.getenv("REDIS_URL"):
+        raise RuntimeError(f"{workers} workers need a shared cache: set REDIS_URL (or GUNICORN_WORKERS=1).")
+    directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)